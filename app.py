@@ -1,21 +1,36 @@
+import os
 import tkinter as tk
+import importlib
 import pandas as pd
 from tkinter import filedialog
 # internal
-from pages.start import StartPage
-from pages.preprocess import DataPreprocessPage
-from pages.view import DataViewPage
-from pages.text_view import TextViewPage
-from pages.clustering.kmeans import ClusteringKmeansPage
-from pages.clustering.hierarchy import ClusteringHierarchyPage
-from pages.clustering.ap import ClusteringApPage
-from pages.classification.biclass import ClassificationBiclassPage
-from pages.classification.multiclass import ClassificationMulticlassPage
-from pages.regression.linear import RegressionLinearPage
-from pages.regression.glm import RegressionGLMPage
-from pages.coincidence import AnalysisCoincidencePage
-
-DATAFRAMES = {}
+from libs import writer, sidecar
+from libs.loader import CsvLoader
+from libs.progress import Progress, format_bytes
+from libs.alert import Alert
+from libs.registry import DatasetRegistry, frame_state
+from libs.jobs import JobExecutor, JobStatus
+from libs.ooc import ChunkedDataset, is_out_of_core
+from libs.document import Document
+from libs.font import LABEL
+
+# pages are imported and built the first time they are shown
+PAGES = {
+    'StartPage': 'pages.start',
+    'DataViewPage': 'pages.view',
+    'DataPreprocessPage': 'pages.preprocess',
+    'TextViewPage': 'pages.text_view',
+    'ClusteringKmeansPage': 'pages.clustering.kmeans',
+    'ClusteringHierarchyPage': 'pages.clustering.hierarchy',
+    'ClusteringApPage': 'pages.clustering.ap',
+    'ClassificationBiclassPage': 'pages.classification.biclass',
+    'ClassificationMulticlassPage': 'pages.classification.multiclass',
+    'RegressionLinearPage': 'pages.regression.linear',
+    'RegressionGLMPage': 'pages.regression.glm',
+    'AnalysisCoincidencePage': 'pages.coincidence'
+}
+# pages that work on out-of-core data, the others need a sample in memory
+OUT_OF_CORE_PAGES = ('StartPage', 'DataViewPage', 'DataPreprocessPage', 'TextViewPage')
 
 
 class Scientist(tk.Tk):
@@ -24,8 +39,16 @@ class Scientist(tk.Tk):
         # data frame
         self.DF = pd.DataFrame()
 
-        # string
-        self.STR = ''
+        # text document, memory-mapped
+        self.STR = Document()
+
+        # imported data frames, spilled to disk over the memory budget
+        self.datasets = DatasetRegistry()
+
+        # background csv import
+        self.loader = None
+        self.progress = None
+        self.previous_df = self.DF
 
         # load tkinter
         tk.Tk.__init__(self, *args, **kwargs)
@@ -33,12 +56,19 @@ class Scientist(tk.Tk):
         # set root properties
         self.title("Scientist")
         self.geometry("1300x800")
+        self.protocol("WM_DELETE_WINDOW", self.client_exit)
 
         # create menu bar
         self.menu = tk.Menu(self)
         self.config(menu=self.menu)
         file_menu = tk.Menu(self.menu)
         file_menu.add_command(label='Import CSV', command=self.import_csv)
+        file_menu.add_command(
+            label='Import CSV (out-of-core)',
+            command=lambda: self.import_csv(out_of_core=True)
+        )
+        self.compact_load = tk.BooleanVar(self, value=False)
+        file_menu.add_checkbutton(label='Compact load', variable=self.compact_load)
         file_menu.add_command(label='Save CSV', command=self.save_csv)
         file_menu.add_command(label='Exit', command=self.client_exit)
         self.menu.add_cascade(label='File', menu=file_menu)
@@ -46,6 +76,9 @@ class Scientist(tk.Tk):
         data_menu.add_command(label="View", command=self.data_view)
         data_menu.add_command(label="Preprocess", command=self.data_preprocess)
         self.menu.add_cascade(label="Data", menu=data_menu)
+        dataset_menu = tk.Menu(self.menu, postcommand=self.update_dataset_menu)
+        self.menu.add_cascade(label="Datasets", menu=dataset_menu)
+        self.dataset_menu = dataset_menu
         analysis_menu = tk.Menu(self.menu)
 
         # clustering
@@ -104,58 +137,282 @@ class Scientist(tk.Tk):
 
         self.menu.add_cascade(label="Analysis", menu=analysis_menu)
 
+        # background jobs, shown in a status bar below the pages
+        status = JobStatus(self)
+        status.pack(side="bottom", fill="x")
+        self.jobs = JobExecutor(self, on_change=status.update_status)
+        # frames over the memory budget are written to disk in the background
+        self.datasets.jobs = self.jobs
+
         # create container
         container = tk.Frame(self)
         container.pack(side="top", fill="both", expand=True)
         container.grid_rowconfigure(0, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
-        # load frames
+        # frames are created on demand
+        self.container = container
         self.frames = {}
-        pages = (StartPage, DataViewPage, DataPreprocessPage,
-                 TextViewPage,
-                 ClusteringKmeansPage, ClusteringHierarchyPage,
-                 ClusteringApPage,
-                 ClassificationBiclassPage, ClassificationMulticlassPage,
-                 RegressionLinearPage, RegressionGLMPage,
-                 AnalysisCoincidencePage)
-        for F in pages:
-            frame = F(container, self)
-            self.frames[F] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
 
         # start with startPage
-        self.show_frame(StartPage)
-
-    def show_frame(self, controller):
-        frame = self.frames[controller]
+        self.show_frame('StartPage')
+
+    def build_frame(self, name):
+        module = importlib.import_module(PAGES[name])
+        frame = getattr(module, name)(self.container, self)
+        self.frames[name] = frame
+        frame.grid(row=0, column=0, sticky="nsew")
+        return frame
+
+    def show_frame(self, name):
+        if name not in self.frames:
+            self.build_frame(name)
+        frame = self.frames[name]
         frame.tkraise()
 
-    def import_csv(self):
+    def open_frame(self, name):
+        if is_out_of_core(self.DF) and name not in OUT_OF_CORE_PAGES:
+            self.ask_sample()
+            return
+        # a new page already reads the current data, only reload old ones
+        if name in self.frames:
+            self.frames[name].reload()
+        self.show_frame(name)
+
+    def reload_frames(self):
+        # pages still holding the old frame would keep it in memory
+        for frame in self.frames.values():
+            if getattr(frame, 'df', None) is not None and frame.df is not self.DF:
+                frame.reload()
+
+    def import_csv(self, out_of_core=False):
         filename = self.select_file()
         if not filename:
             return
-        self.DF = pd.read_csv(filename)
-        DATAFRAMES[filename] = self.DF
-        self.frames[DataViewPage].reload()
-        self.show_frame(DataViewPage)
+        # files bigger than the memory budget stay on disk
+        if out_of_core or os.path.getsize(filename) > self.datasets.budget:
+            self.import_out_of_core(filename)
+            return
+        if self.loader:
+            # the new import replaces the running one
+            self.loader.on_cancel = None
+            self.loader.cancel()
+            self.progress.close()
+        else:
+            self.previous_df = self.DF
+        loader = CsvLoader(
+            self, filename,
+            on_first_chunk=self.show_preview,
+            on_progress=self.show_import_progress,
+            on_done=lambda df: self.finish_import(filename, df, loader),
+            on_error=self.fail_import,
+            on_cancel=self.cancel_import,
+            on_compact=self.show_compact,
+            compact_load=self.compact_load.get()
+        )
+        self.progress = Progress(
+            "Import CSV", filename, on_cancel=loader.cancel
+        )
+        self.loader = loader
+        loader.start()
+
+    def show_preview(self, df):
+        # show the first chunk while the rest is still being read
+        self.DF = df
+        self.open_frame('DataViewPage')
+
+    def show_import_progress(self, rows, pos, size):
+        self.progress.update('%d rows, %s / %s' % (
+            rows, format_bytes(pos), format_bytes(size)
+        ))
+
+    def show_compact(self, before, after):
+        saved = 100.0 * (before - after) / before if before else 0.0
+        Alert().info('compact load: %s -> %s, saved %.0f%%' % (
+            format_bytes(before), format_bytes(after), saved
+        ))
+
+    def finish_import(self, filename, df, loader):
+        self.loader = None
+        self.progress.close()
+        self.add_dataset(filename, df)
+        if loader.parsed:
+            self.cache_csv(filename, df, loader.compact_load)
+
+    def cache_csv(self, filename, df, compact):
+        # the sidecar is written once the frame is already in use. a frame
+        # changed by a page meanwhile must not be cached as the csv, that is
+        # checked on the tk thread where the pages change it
+        state = frame_state(df)
+
+        def written(_):
+            if frame_state(df) != state:
+                sidecar.discard(sidecar.sidecar_dir(filename))
+
+        self.jobs.submit(
+            'cache ' + os.path.basename(filename),
+            lambda job: sidecar.save(filename, df, compact, job),
+            on_done=written, key=('sidecar', filename)
+        )
+
+    def fail_import(self, e):
+        self.loader = None
+        self.progress.close()
+        self.DF = self.previous_df
+        self.reload_frames()
+        Alert().warn(str(e))
+
+    def cancel_import(self):
+        self.loader = None
+        self.progress.close()
+        self.DF = self.previous_df
+        self.reload_frames()
+
+    def import_out_of_core(self, filename):
+        self.jobs.submit(
+            'import ' + os.path.basename(filename),
+            lambda job: ChunkedDataset.open(filename, job=job),
+            on_done=lambda dataset: self.add_dataset(filename, dataset)
+        )
+
+    def ask_sample(self):
+        pop_up_win = tk.Toplevel()
+        pop_up_win.wm_title("sample")
+
+        label = tk.Label(
+            pop_up_win, font=LABEL, bg='white',
+            text="%d rows are kept on disk, draw a sample\nto load into memory:" % len(self.DF)
+        )
+        label.grid(row=0, column=0)
+        entry_nrow = tk.Entry(pop_up_win, highlightbackground='white', width=10)
+        entry_nrow.insert(0, '100000')
+        entry_nrow.grid(row=1, column=0)
+        self.entry_nrow = entry_nrow
+
+        btn = tk.Button(pop_up_win, text="sample", command=self.sample_dataset)
+        btn.grid(row=2, column=0)
+        self.pop_up_win = pop_up_win
+
+    def sample_dataset(self):
+        nrows = self.read_count(self.entry_nrow, 'rows')
+        if nrows is None:
+            return
+        self.pop_up_win.destroy()
+        self.draw_sample(nrows)
+
+    def draw_sample(self, nrows):
+        dataset = self.DF
+        name = '%s (sample of %d)' % (dataset.name, nrows)
+        self.jobs.submit(
+            'sample ' + os.path.basename(dataset.name),
+            lambda job: dataset.sample(nrows, job=job),
+            on_done=lambda df: self.add_dataset(name, df)
+        )
+
+    def add_dataset(self, name, df):
+        # the frame kept to undo a failed import is not needed any more,
+        # holding it would keep a spilled frame in memory
+        if self.loader is None:
+            self.previous_df = None
+        self.datasets.add(name, df)
+        self.switch_dataset(df)
+
+    def switch_dataset(self, df):
+        self.DF = df
+        self.reload_frames()
+        self.show_frame('DataViewPage')
+
+    def select_dataset(self, name):
+        self.switch_dataset(self.datasets.get(name))
+
+    def update_dataset_menu(self):
+        menu = self.dataset_menu
+        menu.delete(0, tk.END)
+        for dataset in reversed(list(self.datasets)):
+            mark = '* ' if dataset.df is self.DF else '   '
+            if is_out_of_core(dataset.df):
+                state = 'out-of-core'
+            elif dataset.resident:
+                state = format_bytes(dataset.nbytes)
+            else:
+                state = 'on disk'
+            menu.add_command(
+                label='%s%s  (%s)' % (mark, dataset.name, state),
+                command=lambda name=dataset.name: self.select_dataset(name)
+            )
+        if self.datasets.datasets:
+            menu.add_separator()
+        menu.add_command(
+            label='Memory budget (%s resident / %s)' % (
+                format_bytes(self.datasets.resident_bytes()),
+                format_bytes(self.datasets.budget)
+            ),
+            command=self.budget_pop_up
+        )
+
+    def budget_pop_up(self):
+        pop_up_win = tk.Toplevel()
+        pop_up_win.wm_title("Memory budget")
+
+        label = tk.Label(
+            pop_up_win, text="budget in MB:",
+            font=LABEL, bg='white'
+        )
+        label.grid(row=0, column=0)
+        entry_budget = tk.Entry(pop_up_win, highlightbackground='#F3F3F3', width=10)
+        entry_budget.insert(0, str(self.datasets.budget // 1024 ** 2))
+        entry_budget.grid(row=1, column=0)
+        self.entry_budget = entry_budget
+
+        btn = tk.Button(pop_up_win, text="set", command=self.set_budget)
+        btn.grid(row=2, column=0)
+        self.pop_up_win = pop_up_win
+
+    def set_budget(self):
+        budget = self.read_count(self.entry_budget, 'budget')
+        if budget is None:
+            return
+        self.datasets.set_budget(budget * 1024 ** 2)
+        self.pop_up_win.destroy()
+
+    @staticmethod
+    def read_count(entry, what):
+        # a positive whole number from an entry, None after a warning
+        try:
+            value = int(entry.get().strip())
+        except ValueError:
+            value = 0
+        if value <= 0:
+            Alert().warn('%s must be a positive whole number' % what)
+            return None
+        return value
 
     def import_txt(self):
         filename = self.select_file()
         if not filename:
             return
-        with open(filename, 'r') as fin:
-            self.STR = fin.read()
-        self.frames[TextViewPage].reload()
-        self.show_frame(TextViewPage)
+        document = Document(filename)
+        self.STR = document
+        # the page shows the first lines while the rest is indexed
+        document.job = self.jobs.submit('index ' + document.name, document.index, key=document)
+        self.open_frame('TextViewPage')
 
     def save_csv(self):
-        filename = filedialog.asksaveasfile(
-            mode='w',
+        filename = filedialog.asksaveasfilename(
             title="Save file",
-            defaultextension=".csv"
+            defaultextension=".csv",
+            filetypes=writer.FILETYPES
+        )
+        if not filename:
+            return
+        df = self.DF
+        # rows are written in chunks on the job thread
+        self.jobs.submit(
+            'save ' + os.path.basename(filename),
+            lambda job: writer.save(df, filename, job),
+            on_done=lambda result: Alert().info(writer.describe(filename, *result)),
+            key=('save', filename)
         )
-        self.DF.to_csv(filename, index=False)
 
     def select_file(self):
         filename = filedialog.askopenfilename(
@@ -166,53 +423,45 @@ class Scientist(tk.Tk):
         return filename
 
     def client_exit(self):
+        self.datasets.close()
         exit()
 
     def data_view(self):
-        self.frames[DataViewPage].reload()
-        self.show_frame(DataViewPage)
+        self.open_frame('DataViewPage')
 
     def data_preprocess(self):
-        self.frames[DataPreprocessPage].reload()
-        self.show_frame(DataPreprocessPage)
+        self.open_frame('DataPreprocessPage')
 
     def clustering_kmeans(self):
-        self.frames[ClusteringKmeansPage].reload()
-        self.show_frame(ClusteringKmeansPage)
+        self.open_frame('ClusteringKmeansPage')
 
     def clustering_hierarchy(self):
-        self.frames[ClusteringHierarchyPage].reload()
-        self.show_frame(ClusteringHierarchyPage)
+        self.open_frame('ClusteringHierarchyPage')
 
     def clustering_ap(self):
-        self.frames[ClusteringApPage].reload()
-        self.show_frame(ClusteringApPage)
+        self.open_frame('ClusteringApPage')
 
     def classification_biclass(self):
-        self.frames[ClassificationBiclassPage].reload()
-        self.show_frame(ClassificationBiclassPage)
+        self.open_frame('ClassificationBiclassPage')
 
     def classification_multiclass(self):
-        self.frames[ClassificationMulticlassPage].reload()
-        self.show_frame(ClassificationMulticlassPage)
+        self.open_frame('ClassificationMulticlassPage')
 
     def regression_linear(self):
-        self.frames[RegressionLinearPage].reload()
-        self.show_frame(RegressionLinearPage)
+        self.open_frame('RegressionLinearPage')
 
     def regression_glm(self):
-        self.frames[RegressionGLMPage].reload()
-        self.show_frame(RegressionGLMPage)
+        self.open_frame('RegressionGLMPage')
 
     def analysis_coincidence(self):
-        self.frames[AnalysisCoincidencePage].reload()
-        self.show_frame(AnalysisCoincidencePage)
+        self.open_frame('AnalysisCoincidencePage')
 
 
-app = Scientist()
-while True:
-    try:
-        app.mainloop()
-        break
-    except UnicodeDecodeError:
-        pass
+if __name__ == '__main__':
+    app = Scientist()
+    while True:
+        try:
+            app.mainloop()
+            break
+        except UnicodeDecodeError:
+            pass
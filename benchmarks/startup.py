@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# runs in a fresh interpreter so every import is cold
+SNIPPET = """
+import time
+start = time.perf_counter()
+from app import Scientist
+app = Scientist()
+app.update()
+print(time.perf_counter() - start)
+app.destroy()
+"""
+
+
+def measure():
+    start = time.perf_counter()
+    out = subprocess.check_output([sys.executable, '-c', SNIPPET], cwd=ROOT)
+    total = time.perf_counter() - start
+    return float(out.decode().strip().splitlines()[-1]), total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='time from process start to the first drawn window'
+    )
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max', type=float, default=None,
+                        help='fail when the median window time is above this many seconds')
+    args = parser.parse_args()
+
+    windows, totals = [], []
+    for _ in range(args.runs):
+        window, total = measure()
+        windows.append(window)
+        totals.append(total)
+    window = statistics.median(windows)
+    print('first window: median %.3fs, min %.3fs' % (window, min(windows)))
+    print('process:      median %.3fs, min %.3fs' % (statistics.median(totals), min(totals)))
+    if args.max is not None and window > args.max:
+        print('startup regression: %.3fs > %.3fs' % (window, args.max))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
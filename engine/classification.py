@@ -0,0 +1,91 @@
+import pandas as pd
+
+BICLASS = ['kNN', 'SGD', 'Logistic', 'Perceptron']
+MULTICLASS = ['kNN', 'Naive Bayes', 'Decision Tree', 'LDA']
+
+
+def biclass_model(algo, n_neighbors=5):
+    if algo == 'kNN':
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier(n_neighbors=n_neighbors)
+    from sklearn.linear_model import Perceptron, SGDClassifier, LogisticRegression
+    if algo == 'SGD':
+        return SGDClassifier(random_state=101)
+    elif algo == 'Logistic':
+        return LogisticRegression(C=1., solver='lbfgs')
+    elif algo == 'Perceptron':
+        return Perceptron(tol=1e-3, random_state=0)
+    raise ValueError('unknown biclass algorithm: %s' % algo)
+
+
+def multiclass_model(algo):
+    if algo == 'kNN':
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier()
+    elif algo == 'Naive Bayes':
+        from sklearn.naive_bayes import BernoulliNB
+        return BernoulliNB()
+    elif algo == 'Decision Tree':
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier()
+    elif algo == 'LDA':
+        from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+        return LinearDiscriminantAnalysis()
+    raise ValueError('unknown multiclass algorithm: %s' % algo)
+
+
+def hold_out(X, y, ratio):
+    from sklearn.model_selection import train_test_split
+    return train_test_split(X, y, test_size=ratio, random_state=101, stratify=y)
+
+
+def check_binary(y):
+    if len(set(y)) > 2:
+        raise ValueError('target must be binary')
+
+
+def score_biclass(model, k, X_train, X_test, y_train, y_test):
+    from sklearn.model_selection import cross_val_predict
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+    from sklearn.metrics import confusion_matrix
+    # apply cross validation for training
+    y_train_pred = cross_val_predict(model, X_train, y_train, cv=k)
+    model.fit(X_train, y_train)
+    y_train_pred = model.predict(X_train)
+    y_test_pred = model.predict(X_test)
+    train_accuracy = accuracy_score(y_train, y_train_pred)
+    test_accuracy = accuracy_score(y_test, y_test_pred)
+    train_precision = precision_score(y_train, y_train_pred)
+    test_precision = precision_score(y_test, y_test_pred)
+    train_recall = recall_score(y_train, y_train_pred)
+    test_recall = recall_score(y_test, y_test_pred)
+    train_f1 = f1_score(y_train, y_train_pred)
+    test_f1 = f1_score(y_test, y_test_pred)
+    # create metric table
+    data = [
+        [train_accuracy, test_accuracy],
+        [train_precision, test_precision],
+        [train_recall, test_recall],
+        [train_f1, test_f1]
+    ]
+    index = ['accuracy', 'precision', 'recall', 'f1']
+    metrics = pd.DataFrame(data, index, ['train', 'test'])
+    # create confusion matrix
+    train_conf_df = pd.DataFrame(confusion_matrix(y_train, y_train_pred))
+    test_conf_df = pd.DataFrame(confusion_matrix(y_test, y_test_pred))
+    return metrics, train_conf_df, test_conf_df
+
+
+def score_multiclass(model, k, X_train, X_test, y_train, y_test):
+    from sklearn.model_selection import cross_val_predict
+    from sklearn.metrics import accuracy_score, confusion_matrix
+    # apply cross validation for training
+    y_train_pred = cross_val_predict(model, X_train, y_train, cv=k)
+    model.fit(X_train, y_train)
+    y_test_pred = model.predict(X_test)
+    train_accuracy = accuracy_score(y_train, y_train_pred)
+    test_accuracy = accuracy_score(y_test, y_test_pred)
+    # create confusion matrix
+    train_conf_df = pd.DataFrame(confusion_matrix(y_train, y_train_pred))
+    test_conf_df = pd.DataFrame(confusion_matrix(y_test, y_test_pred))
+    return train_accuracy, test_accuracy, train_conf_df, test_conf_df
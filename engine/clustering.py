@@ -0,0 +1,33 @@
+def kmeans(X, k):
+    from sklearn.cluster import MiniBatchKMeans
+    model = MiniBatchKMeans(
+        init='k-means++', n_clusters=k, batch_size=45,
+        n_init=10, max_no_improvement=10, verbose=0
+    )
+    model.fit(X)
+    return model.labels_
+
+
+def hierarchy(X, k, method='ward', metric='euclidean'):
+    from scipy.cluster.hierarchy import linkage, fcluster
+    # generate the linkage matrix
+    Z = linkage(X, method=method, metric=metric)
+    clusters = fcluster(Z, k, criterion='maxclust')
+    return Z, clusters
+
+
+def ap(X, preference=-50):
+    from sklearn.cluster import AffinityPropagation
+    model = AffinityPropagation(preference=preference)
+    model.fit(X)
+    return model.labels_
+
+
+def tsne(X):
+    from sklearn.manifold import TSNE
+    return TSNE().fit_transform(X)
+
+
+def pca(X):
+    from sklearn.decomposition import PCA
+    return PCA(n_components=2).fit_transform(X)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from libs.ooc import check
+
+METHODS = ['pearson', 'spearman']
+# columns per block, a block pair is one set of matrix products
+BLOCK = 256
+
+
+def prepare(X, method='pearson', dtype='float64'):
+    # ranks for spearman, then every column is centered once. without
+    # missing values the columns are scaled to unit length and a block of
+    # the matrix is a single product, else the mask is kept for pairwise
+    # complete sums. spearman ranks each column over all of its values,
+    # pandas ranks again per pair when both columns have gaps
+    X = pd.DataFrame(X)
+    if method == 'spearman':
+        X = X.rank()
+    X = X.values.astype('float64')
+    valid = ~np.isnan(X)
+    count = np.maximum(valid.sum(axis=0), 1)
+    X -= np.where(valid, X, 0).sum(axis=0) / count
+    if valid.all():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            X /= np.sqrt((X * X).sum(axis=0))
+        return X.astype(dtype), None
+    X[~valid] = 0
+    return X.astype(dtype), valid.astype(dtype)
+
+
+def block(A, MA, B, MB):
+    if MA is None and MB is None:
+        return np.clip(A.T @ B, -1, 1)
+    if MA is None:
+        MA = np.ones_like(A)
+    if MB is None:
+        MB = np.ones_like(B)
+    # correlation doesn't change under a shift or a scale of a column, so
+    # the sums work on the prepared values as well
+    N = MA.T @ MB
+    Sx, Sy = A.T @ MB, MA.T @ B
+    Sxx, Syy = (A * A).T @ MB, MA.T @ (B * B)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = A.T @ B - Sx * Sy / N
+        r = cov / np.sqrt((Sxx - Sx ** 2 / N) * (Syy - Sy ** 2 / N))
+    r[N < 2] = np.nan
+    return np.clip(r, -1, 1)
+
+
+def cross(X, Y, method='pearson', dtype='float64', workers=None, job=None, size=BLOCK):
+    # correlation of every column of X with every column of Y, the blocks
+    # run on a thread pool, numpy releases the gil inside the products
+    A, MA = prepare(X, method, dtype)
+    B, MB = prepare(Y, method, dtype)
+    R = np.empty((A.shape[1], B.shape[1]), dtype=dtype)
+    pairs = [(i, j) for i in range(0, A.shape[1], size) for j in range(0, B.shape[1], size)]
+    run_blocks(pairs, R, A, MA, B, MB, size, workers, job)
+    return R
+
+
+def matrix(X, method='pearson', dtype='float64', workers=None, job=None, size=BLOCK):
+    # the symmetric matrix, only the blocks on and above the diagonal
+    A, MA = prepare(X, method, dtype)
+    R = np.empty((A.shape[1], A.shape[1]), dtype=dtype)
+    pairs = [(i, j) for i in range(0, A.shape[1], size) for j in range(i, A.shape[1], size)]
+    run_blocks(pairs, R, A, MA, A, MA, size, workers, job)
+    return R
+
+
+def run_blocks(pairs, R, A, MA, B, MB, size, workers, job):
+    symmetric = A is B
+
+    def run(pair):
+        i, j = pair
+        a, b = slice(i, i + size), slice(j, j + size)
+        r = block(A[:, a], None if MA is None else MA[:, a], B[:, b], None if MB is None else MB[:, b])
+        R[a, b] = r
+        if symmetric and i != j:
+            R[b, a] = r.T
+
+    with ThreadPoolExecutor(workers) as pool:
+        futures = [pool.submit(run, pair) for pair in pairs]
+        try:
+            for done, future in enumerate(futures, 1):
+                future.result()
+                check(job, 'block %d of %d' % (done, len(pairs)))
+        except BaseException:
+            # a cancelled job doesn't wait for the blocks not started yet
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def top_pairs(R, names, k=50):
+    # the k strongest pairs of a correlation matrix, by absolute value
+    i, j = np.triu_indices(R.shape[0], 1)
+    values = R[i, j]
+    keep = ~np.isnan(values)
+    i, j, values = i[keep], j[keep], values[keep]
+    if len(values) > k:
+        idx = np.argpartition(-np.abs(values), k)[:k]
+        i, j, values = i[idx], j[idx], values[idx]
+    order = np.argsort(-np.abs(values), kind='mergesort')
+    names = np.asarray([str(n) for n in names], dtype=object)
+    return pd.DataFrame({
+        'feature 1': names[i[order]],
+        'feature 2': names[j[order]],
+        'correlation': values[order].astype('float64')
+    }, columns=['feature 1', 'feature 2', 'correlation'])
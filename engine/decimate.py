@@ -0,0 +1,61 @@
+import warnings
+import numpy as np
+
+# long series are cut down to a few points per pixel before matplotlib
+# sees them, the min and the max of every pixel column are kept so peaks
+# look the same as in the full plot
+
+
+def window(n, xlim):
+    # positions of the points inside the x limits plus one on each side,
+    # so the line still reaches the edges
+    lo = max(int(np.floor(xlim[0])) - 1, 0)
+    hi = min(int(np.ceil(xlim[1])) + 2, n)
+    return lo, max(hi, lo)
+
+
+def bucket_size(lo, hi, width):
+    return max(-(-(hi - lo) // max(int(width), 1)), 1)
+
+
+def minmax(y, lo, hi, width):
+    # x and y of the min and the max of each bucket in the order they
+    # occur, short ranges are returned as they are
+    y = np.asarray(y, dtype='float64')[lo: hi]
+    size = bucket_size(lo, hi, width)
+    if size <= 2:
+        return np.arange(lo, hi), y
+    count = len(y) // size
+    body = y[:count * size].reshape(count, size)
+    # missing values never win, a bucket of only nans stays a gap
+    first = np.argmin(np.where(np.isnan(body), np.inf, body), axis=1)
+    second = np.argmax(np.where(np.isnan(body), -np.inf, body), axis=1)
+    index = np.sort(np.stack([first, second], axis=1), axis=1) + (np.arange(count) * size)[:, None]
+    index = index.ravel()
+    tail = np.arange(count * size, len(y))
+    if len(tail):
+        tail = tail[[np.nanargmin(y[tail]), np.nanargmax(y[tail])]] if not np.isnan(y[tail]).all() else tail[:1]
+        index = np.concatenate([index, np.sort(tail)])
+    return index + lo, y[index]
+
+
+def envelope(lower, upper, lo, hi, width):
+    # x, the lowest lower and the highest upper value of each bucket, for
+    # filled areas between two series
+    lower = np.asarray(lower, dtype='float64')[lo: hi]
+    upper = np.asarray(upper, dtype='float64')[lo: hi]
+    size = bucket_size(lo, hi, width)
+    if size <= 2:
+        return np.arange(lo, hi), lower, upper
+    count = -(-len(lower) // size)
+    pad = count * size - len(lower)
+    lower = np.concatenate([lower, np.full(pad, np.nan)]).reshape(count, size)
+    upper = np.concatenate([upper, np.full(pad, np.nan)]).reshape(count, size)
+    with warnings.catch_warnings():
+        # all nan buckets are gaps
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanmin(lower, axis=1), np.nanmax(upper, axis=1)
+    # each bucket is drawn as a step over its whole width
+    x = np.arange(count) * size + lo
+    x = np.stack([x, np.minimum(x + size - 1, hi - 1)], axis=1).ravel()
+    return x, np.repeat(low, 2), np.repeat(high, 2)
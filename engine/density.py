@@ -0,0 +1,129 @@
+import os
+import numpy as np
+
+# densities of large columns at a cost that barely grows with the rows:
+# values are binned once in O(n), everything after works on the bins
+
+GRID_SIZE = 1024
+# rows drawn per scatter panel before sampling or rasterizing
+SAMPLE_POINTS = 20000
+RASTER_BINS = 128
+# scatter plots of more points than this are drawn as density rasters
+RASTER_POINTS = int(os.environ.get('SCIENTIST_RASTER_POINTS', 200000))
+VOXEL_BINS = 40
+
+
+def finite(values):
+    values = np.asarray(values, dtype='float64')
+    return values[np.isfinite(values)]
+
+
+def bandwidth(values):
+    # scott's rule, the default of scipy's gaussian_kde that pandas uses
+    n = len(values)
+    std = values.std(ddof=1) if n > 1 else 0.0
+    if std == 0 or not np.isfinite(std):
+        std = 1.0
+    return std * n ** (-1 / 5)
+
+
+def linear_bins(values, lo, dx, size):
+    # every value is split between its two nearest grid points
+    position = (values - lo) / dx
+    left = np.clip(np.floor(position).astype('int64'), 0, size - 2)
+    right_weight = np.clip(position - left, 0, 1)
+    counts = np.bincount(left, 1 - right_weight, minlength=size)
+    counts += np.bincount(left + 1, right_weight, minlength=size)
+    return counts
+
+
+def kde(values, bw=None, size=GRID_SIZE):
+    # a gaussian kde on a grid: the binned counts convolved with the
+    # kernel through an fft, O(n + size log size) instead of O(n * size)
+    values = finite(values)
+    if not len(values):
+        return np.empty(0), np.empty(0)
+    bw = bandwidth(values) if bw is None else bw
+    lo, hi = values.min() - 3 * bw, values.max() + 3 * bw
+    grid = np.linspace(lo, hi, size)
+    dx = grid[1] - grid[0]
+    counts = linear_bins(values, lo, dx, size)
+    reach = min(int(np.ceil(4 * bw / dx)), size - 1)
+    offsets = np.arange(-reach, reach + 1) * dx
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2) / (bw * np.sqrt(2 * np.pi))
+    length = 1 << int(np.ceil(np.log2(size + len(kernel) - 1)))
+    density = np.fft.irfft(np.fft.rfft(counts, length) * np.fft.rfft(kernel, length), length)
+    density = density[reach: reach + size] / len(values)
+    return grid, np.maximum(density, 0)
+
+
+def stratified_sample(n, k, seed=0):
+    # one random row from each of k equal blocks of rows, every part of
+    # the data shows up and the rows stay in order
+    if n <= k:
+        return np.arange(n)
+    edges = np.linspace(0, n, k + 1).astype('int64')
+    rng = np.random.RandomState(seed)
+    return edges[:-1] + (rng.random_sample(k) * (edges[1:] - edges[:-1])).astype('int64')
+
+
+def span(values):
+    # the range of a column, a constant column still gets a cell
+    values = finite(values)
+    lo, hi = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+    if hi <= lo:
+        lo, hi = lo - 0.5, lo + 0.5
+    return lo, hi
+
+
+def bin_index(values, lo, hi, bins=RASTER_BINS):
+    # the cell of every value along one axis, -1 for missing or outside
+    values = np.asarray(values, dtype='float64')
+    with np.errstate(invalid='ignore'):
+        index = np.floor((values - lo) / (hi - lo) * bins)
+        inside = (index >= 0) & (index <= bins)
+    index = np.where(inside, np.minimum(index, bins - 1), -1)
+    return index.astype('int64')
+
+
+def raster_index(ix, iy, bins=RASTER_BINS, ybins=None):
+    # counts per cell from the cells along both axes, rows go up in y.
+    # a column binned once serves every panel it appears in
+    ybins = bins if ybins is None else ybins
+    keep = (ix >= 0) & (iy >= 0)
+    return np.bincount(iy[keep] * bins + ix[keep], minlength=bins * ybins).reshape(ybins, bins)
+
+
+def class_rasters(x, y, labels, bins, ybins):
+    # one raster per class over the same cells, and the classes in order
+    x0, x1 = span(x)
+    y0, y1 = span(y)
+    ix, iy = bin_index(x, x0, x1, bins), bin_index(y, y0, y1, ybins)
+    classes, codes = np.unique(labels, return_inverse=True)
+    keep = (ix >= 0) & (iy >= 0)
+    flat = (codes[keep] * ybins + iy[keep]) * bins + ix[keep]
+    counts = np.bincount(flat, minlength=len(classes) * ybins * bins).reshape(len(classes), ybins, bins)
+    return counts, classes, [x0, x1, y0, y1]
+
+
+def voxels(X, bins=VOXEL_BINS):
+    # centers and counts of the occupied cells of a 3d grid
+    spans = [span(X[:, k]) for k in range(3)]
+    cells = [bin_index(X[:, k], lo, hi, bins) for k, (lo, hi) in enumerate(spans)]
+    keep = (cells[0] >= 0) & (cells[1] >= 0) & (cells[2] >= 0)
+    flat = (cells[0][keep] * bins + cells[1][keep]) * bins + cells[2][keep]
+    occupied, counts = np.unique(flat, return_counts=True)
+    index = np.stack([occupied // (bins * bins), occupied // bins % bins, occupied % bins], axis=1)
+    centers = np.stack([
+        lo + (index[:, k] + 0.5) * (hi - lo) / bins for k, (lo, hi) in enumerate(spans)
+    ], axis=1)
+    return centers, counts
+
+
+def raster(x, y, bins=RASTER_BINS, extent=None):
+    # counts of the points per cell and the extent they cover
+    if extent is None:
+        extent = list(span(x) + span(y))
+    x0, x1, y0, y1 = extent
+    counts = raster_index(bin_index(x, x0, x1, bins), bin_index(y, y0, y1, bins), bins)
+    return counts, [x0, x1, y0, y1]
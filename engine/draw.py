@@ -0,0 +1,238 @@
+import itertools as it
+import numpy as np
+
+# matplotlib drawing on a given axes or figure, shared by the plot widget
+# and the batch runner so neither needs the other's canvas
+
+# profiles of more rows are drawn as percentile bands
+PROFILE_ROWS = 20000
+
+
+def figure(figsize=(5, 4), dpi=150):
+    # a figure with its own Agg canvas, without pyplot or a gui backend
+    from matplotlib import style
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    style.use("ggplot")
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def scatter_2d(ax, X, y, max_points=None):
+    # plot first two columns, a density raster when there are too many
+    # points to draw one by one
+    from engine import density
+    max_points = density.RASTER_POINTS if max_points is None else max_points
+    if len(X) > max_points:
+        density_2d(ax, X, y)
+        return
+    colors, labels = [], []
+    C = set(y)
+    for ci in C:
+        label = "Class " + str(ci)
+        if X.shape[1] > 1:
+            col1, col2 = X[y == ci, 0], X[y == ci, 1]
+        else:
+            col1 = X[y == ci, 0]
+            col2 = np.zeros(col1.shape)
+        col = ax.scatter(
+            col1, col2, label=label, alpha=0.5
+        )
+        colors.append(col)
+        labels.append(label)
+    ax.set_title('clusters')
+
+    # make nice plotting
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.get_xaxis().tick_bottom()
+    ax.get_yaxis().tick_left()
+    ax.spines['left'].set_position(('outward', 10))
+    ax.spines['bottom'].set_position(('outward', 10))
+    ax.legend(
+        colors, labels, loc='best', labelspacing=0
+    )
+
+
+def density_2d(ax, X, y):
+    # the points binned into one cell per pixel of the axes, counts are
+    # log scaled into the opacity and a cell mixes the colors of its
+    # classes by their log counts
+    import matplotlib
+    from matplotlib.patches import Patch
+    from engine import density
+    box = ax.get_window_extent()
+    bins, ybins = max(int(box.width), 1), max(int(box.height), 1)
+    col2 = X[:, 1] if X.shape[1] > 1 else np.zeros(len(X))
+    counts, classes, extent = density.class_rasters(X[:, 0], col2, y, bins, ybins)
+    cycle = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+    rgb = np.array([matplotlib.colors.to_rgb(cycle[i % len(cycle)]) for i in range(len(classes))])
+    weights = np.log1p(counts)
+    total = weights.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mixed = np.nan_to_num(np.einsum('chw,ck->hwk', weights, rgb) / total[..., None])
+    alpha = np.log1p(counts.sum(axis=0))
+    alpha = alpha / alpha.max() if alpha.max() > 0 else alpha
+    ax.imshow(np.dstack([mixed, alpha]), origin='lower', extent=extent, aspect='auto', interpolation='nearest')
+    ax.grid(False)
+    ax.set_title('clusters')
+    ax.legend(
+        [Patch(color=c) for c in rgb], ["Class " + str(c) for c in classes], loc='best', labelspacing=0
+    )
+
+
+def scatter_3d(ax, X, mode='auto', max_points=None):
+    # every point, a stratified sample, or the occupied voxels of a grid
+    # sized and colored by their log count
+    from engine import density
+    max_points = density.RASTER_POINTS if max_points is None else max_points
+    if mode == 'auto':
+        mode = 'points' if len(X) <= max_points else 'raster'
+    if mode == 'sample':
+        X = X[density.stratified_sample(len(X), density.SAMPLE_POINTS)]
+    if mode == 'raster':
+        centers, counts = density.voxels(X)
+        weight = np.log1p(counts)
+        ax.scatter(centers[:, 0], centers[:, 1], centers[:, 2], c=weight, cmap='viridis',
+                   s=2 + 18 * weight / max(weight.max(), 1), depthshade=False)
+    else:
+        ax.scatter(X[:, 0], X[:, 1], X[:, 2])
+
+
+def profile(ax, X, y, names, mode='auto', max_rows=PROFILE_ROWS):
+    # one line collection per cluster with a line for every row, or the
+    # median and the 25-75 and 10-90 percentile bands of each cluster so
+    # the cost only grows with the number of clusters
+    import matplotlib.patches as mpatches
+    from matplotlib import cm
+    from matplotlib.collections import LineCollection
+    X = np.asarray(X, dtype='float64')
+    classes, codes = np.unique(y, return_inverse=True)
+    if mode == 'auto':
+        mode = 'lines' if len(X) <= max_rows else 'bands'
+    # custom x ticks
+    x = np.arange(len(names))
+    ax.set_xticks(x)
+    ax.set_xticklabels(names)
+    # rotate xticks
+    for label in ax.get_xmajorticklabels():
+        label.set_rotation(30)
+        label.set_horizontalalignment("right")
+    patches = []
+    colors = it.cycle(cm.rainbow(np.linspace(0, 1, len(classes))))
+    for k, (cls, clr) in enumerate(zip(classes, colors)):
+        patches.append(mpatches.Patch(color=clr, label=cls))
+        rows = X[codes == k]
+        if mode == 'lines':
+            segments = np.stack([np.broadcast_to(x, rows.shape), rows], axis=2)
+            ax.add_collection(LineCollection(segments, colors=[clr], alpha=0.02, linewidths=2.0))
+        else:
+            low, q1, median, q3, high = np.nanpercentile(rows, [10, 25, 50, 75, 90], axis=0)
+            ax.fill_between(x, low, high, color=clr, alpha=0.15, linewidth=0)
+            ax.fill_between(x, q1, q3, color=clr, alpha=0.3, linewidth=0)
+            ax.plot(x, median, color=clr, linewidth=2.0)
+    ax.autoscale_view()
+    # set ylabel and title
+    ax.set_title('profile for each individual' if mode == 'lines' else 'profile percentiles for each cluster')
+    ax.legend(handles=patches)
+
+
+def radviz(ax, df, cls):
+    from pandas.plotting import radviz
+    radviz(df, cls, ax=ax)
+
+
+def dendrogram(ax, Z):
+    import matplotlib
+    from scipy.cluster.hierarchy import dendrogram
+    ax.set_title('Hierarchical Clustering Dendrogram')
+    matplotlib.rcParams['lines.linewidth'] = 0.5
+    dendrogram(Z, leaf_rotation=90.,  # rotates the x axis labels
+               ax=ax)
+    matplotlib.rcParams['lines.linewidth'] = 1.5
+
+
+def dendrogram_matrix(fig, Z, X):
+    import matplotlib
+    from scipy.cluster.hierarchy import dendrogram
+    axdendro = fig.add_axes([0.1, 0.1, 0.2, 0.8])
+    matplotlib.rcParams['lines.linewidth'] = 0.3
+    dg = dendrogram(Z, orientation='left', ax=axdendro)
+    matplotlib.rcParams['lines.linewidth'] = 1.5
+    axdendro.set_xticks([])
+    axdendro.set_yticks([])
+
+    # Plot distance matrix.
+    axmatrix = fig.add_axes([0.3, 0.1, 0.6, 0.8])
+    index = dg['leaves']
+    D = X[index, :]
+    im = axmatrix.matshow(D, aspect='auto', origin='lower')
+    axmatrix.set_xticks([])
+    axmatrix.set_yticks([])
+
+    # Plot colorbar.
+    axcolor = fig.add_axes([0.91, 0.1, 0.02, 0.8])
+    fig.colorbar(im, cax=axcolor)
+    return [axdendro, axmatrix, axcolor]
+
+
+def heatmap(ax, R, names, max_labels=40):
+    # one pixel per pair, labels only while they can be read
+    im = ax.imshow(R, cmap='RdBu_r', vmin=-1, vmax=1, interpolation='nearest', aspect='auto')
+    ax.grid(False)
+    if len(names) <= max_labels:
+        ticks = np.arange(len(names))
+        ax.set_xticks(ticks)
+        ax.set_yticks(ticks)
+        ax.set_xticklabels(names, rotation=90, fontsize=5)
+        ax.set_yticklabels(names, fontsize=5)
+    else:
+        ax.set_xticks([])
+        ax.set_yticks([])
+    ax.set_title('correlation of %d features' % len(names))
+    return im
+
+
+def scatter_matrix(fig, columns, names, mode='auto', max_points=None):
+    # a binned kde on the diagonal; off it every point while there are
+    # few, else a stratified sample of rows or a log scaled density raster
+    from engine import density
+    max_points = density.SAMPLE_POINTS if max_points is None else max_points
+    p = len(columns)
+    n = len(columns[0]) if p else 0
+    if mode == 'auto':
+        mode = 'points' if n <= max_points else 'raster'
+    rows = density.stratified_sample(n, max_points) if mode == 'sample' else None
+    spans = [density.span(values) for values in columns]
+    if mode == 'raster':
+        cells = [density.bin_index(values, *span) for values, span in zip(columns, spans)]
+    axes = []
+    for i in range(p):
+        for j in range(p):
+            ax = fig.add_subplot(p, p, i * p + j + 1)
+            if i == j:
+                grid, values = density.kde(columns[i])
+                ax.plot(grid, values)
+            elif mode == 'raster':
+                counts = density.raster_index(cells[j], cells[i])
+                ax.imshow(np.log1p(counts), origin='lower', extent=list(spans[j] + spans[i]),
+                          aspect='auto', interpolation='nearest', cmap='viridis')
+                ax.grid(False)
+            else:
+                x, y = columns[j], columns[i]
+                if rows is not None:
+                    x, y = x[rows], y[rows]
+                ax.scatter(x, y, s=2, alpha=0.5)
+            # labels on the outer panels only
+            if i == p - 1:
+                ax.set_xlabel(names[j], fontsize=6)
+            else:
+                ax.set_xticklabels([])
+            if j == 0:
+                ax.set_ylabel(names[i], fontsize=6)
+            else:
+                ax.set_yticklabels([])
+            ax.tick_params(labelsize=5)
+            axes.append(ax)
+    return axes
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+# the data steps of the preprocess page, every one changes df in place
+# and returns it
+
+
+def scale_01(df, features):
+    # compact loads narrow the dtypes, scale in float64 so int8 columns
+    # can't overflow
+    for f in features:
+        col = df[f].astype('float64')
+        df[f] = (col - col.min()) / (col.max() - col.min())
+    return df
+
+
+def scale_11(df, features):
+    for f in features:
+        col = df[f].astype('float64')
+        df[f] = 2 * (col - col.min()) / (col.max() - col.min()) - 1
+    return df
+
+
+def norm(df, features):
+    for f in features:
+        col = df[f].astype('float64')
+        df[f] = (col - col.mean()) / col.std()
+    return df
+
+
+def label_encoder(df, features):
+    from sklearn.preprocessing import LabelEncoder
+    encoder = LabelEncoder()
+    for f in features:
+        new_col_name = f + '_label'
+        df[new_col_name] = encoder.fit_transform(df[f])
+        df[new_col_name].astype('int32')
+    return df
+
+
+def q_encoder(df, features, n):
+    for f in features:
+        new_col_name = f + '_quantile'
+        df[new_col_name] = pd.qcut(df[f], n, labels=False)
+        df[new_col_name].astype('int32')
+    return df
+
+
+def one_hot(df, features):
+    from sklearn.preprocessing import LabelBinarizer
+    encoder = LabelBinarizer()
+    for f in features:
+        data = encoder.fit_transform(np.asarray(df[f]))
+        names = [f + '_' + c for c in encoder.classes_]
+        for i, n in enumerate(names):
+            df[n] = pd.DataFrame(data[:, i], columns=[n])
+        df.drop(columns=f, inplace=True)
+    return df
+
+
+def sigma_encoder(df, features):
+    for f in features:
+        new_col_name = f + '_sigma'
+        col = df[f].astype('float64')
+        df[new_col_name] = (col - col.mean()) / col.std()
+        df[new_col_name] = df[new_col_name].round()
+    return df
+
+
+def drop_features(df, features):
+    df.drop(list(features), inplace=True, axis=1)
+    return df
+
+
+def drop_index(df, index):
+    df.drop(index=index, inplace=True)
+    return df
+
+
+def sample(df, nrows, seed=None):
+    new_df = df.sample(df.shape[0] - nrows, random_state=seed)
+    df.drop(new_df.index, inplace=True)  # remove old rows
+    return df
+
+
+def drop_na(df):
+    df.dropna(inplace=True)
+    return df
+
+
+def fill_mean(df):
+    df.fillna(df.mean(), inplace=True)
+    return df
+
+
+def fill_median(df):
+    df.fillna(df.median(), inplace=True)
+    return df
+
+
+def fill_forward(df):
+    df.fillna(df.ffill(), inplace=True)
+    return df
+
+
+def fill_backward(df):
+    df.fillna(df.bfill(), inplace=True)
+    return df
+
+
+def fill_linear(df):
+    df.fillna(df.interpolate(), inplace=True)
+    return df
+
+
+# names used by the job specs of the batch runner
+STEPS = {
+    'scale_01': scale_01,
+    'scale_11': scale_11,
+    'norm': norm,
+    'label': label_encoder,
+    'quantile': q_encoder,
+    'one_hot': one_hot,
+    'sigma': sigma_encoder,
+    'drop_features': drop_features,
+    'drop_index': drop_index,
+    'sample': sample,
+    'drop_na': drop_na,
+    'fill_mean': fill_mean,
+    'fill_median': fill_median,
+    'fill_forward': fill_forward,
+    'fill_backward': fill_backward,
+    'fill_linear': fill_linear
+}
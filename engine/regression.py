@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+FAMILIES = ['Binomial', 'Gamma', 'Gaussian', 'InverseGaussian', 'NegativeBinomial', 'Poisson', 'Tweedie']
+
+
+def linear(X, y, feat_list):
+    import statsmodels.api as sm
+    model = sm.OLS(y, sm.add_constant(X))
+    results = model.fit()
+    return linear_statistics(results), coefficients(results, feat_list)
+
+
+def glm(X, y, family, feat_list):
+    import statsmodels.api as sm
+    model = sm.GLM(y, sm.add_constant(X), family=getattr(sm.families, family)())
+    results = model.fit()
+    return glm_statistics(results), coefficients(results, feat_list)
+
+
+def coefficients(results, feat_list):
+    coefs = results.params
+    sde = results.bse
+    t_values = results.tvalues
+    p_values = results.pvalues
+    conf_int = results.conf_int().T
+    cfi_low = conf_int[0]
+    cfi_high = conf_int[1]
+
+    data = np.vstack((
+        np.array(['Intercept'] + feat_list),
+        np.round(coefs, 4),
+        np.round(sde, 4),
+        np.round(t_values, 4),
+        p_values,
+        # np.round(p_values, 4),
+        np.round(cfi_low, 4),
+        np.round(cfi_high, 4)
+    ))
+    columns = ['Features', 'Coefficients', 'Std Errors', 'T Values', 'P Values', '[0.025', '0.975]']
+    return pd.DataFrame(data=data.T, columns=columns)
+
+
+def linear_statistics(results):
+    stat_names = [
+        'R-squared', 'Adj. R-squared', 'F-statistic', 'Prob (F-statistic)',
+        'Log-Likelihood', 'AIC', 'BIC', 'Df Model'
+    ]
+    values = [
+        np.round(results.rsquared, 4),
+        np.round(results.rsquared_adj, 4),
+        np.round(results.fvalue, 4),
+        np.round(results.f_pvalue, 4),
+        np.round(results.llf, 4),
+        np.round(results.aic, 4),
+        np.round(results.bic, 4),
+        np.round(results.df_model, 4)
+    ]
+    data = np.vstack((np.array(stat_names), np.array(values)))
+    columns = ['Stats', 'Values']
+    return pd.DataFrame(data=data.T, columns=columns)
+
+
+def glm_statistics(results):
+    stat_names = [
+        'Df Model', 'Scale', 'Log-Likelihood', 'Deviance',
+        'Peareson chi2', 'AIC', 'BIC'
+    ]
+    values = [
+        np.round(results.df_model, 4),
+        np.round(results.scale, 4),
+        np.round(results.llf, 4),
+        np.round(results.deviance, 4),
+        np.round(results.pearson_chi2, 4),
+        np.round(results.aic, 4),
+        np.round(results.bic, 4)
+    ]
+    data = np.vstack((np.array(stat_names), np.array(values)))
+    columns = ['Stats', 'Values']
+    return pd.DataFrame(data=data.T, columns=columns)
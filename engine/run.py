@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from libs import sidecar, writer
+from libs.ooc import ChunkedDataset
+from engine import preprocess, clustering, classification, regression, draw
+
+# example job spec:
+# {
+#     "preprocess": [{"step": "fill_mean"}, {"step": "scale_01", "features": ["a", "b"]}],
+#     "analyses": [
+#         {"method": "kmeans", "features": ["a", "b"], "k": 3, "column": "cluster",
+#          "plots": ["scatter", "pca"]},
+#         {"method": "glm", "features": ["a"], "target": "b", "family": "Gaussian"}
+#     ],
+#     "save_data": "data.csv.gz"
+# }
+CLUSTER_PLOTS = ('scatter', 'pca', 'tsne', 'profile', 'bands', 'radviz', 'dendrogram', 'matrix')
+
+
+def load(path):
+    # a csv, or a folder of .npy columns written by Save CSV: one folder of
+    # columns, or chunks with a manifest when the data was out-of-core
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            dataset = ChunkedDataset(path)
+            return dataset.slice(0, len(dataset))
+        df = sidecar.read_columns(path)
+        if df is None:
+            raise ValueError('%s was written by another version' % path)
+        return df
+    return pd.read_csv(path)
+
+
+def apply_steps(df, steps):
+    for step in steps:
+        params = dict(step)
+        name = params.pop('step')
+        if name not in preprocess.STEPS:
+            raise ValueError('unknown preprocess step: %s' % name)
+        preprocess.STEPS[name](df, **params)
+    return df
+
+
+def save_plot(out_dir, name, plot, func, *args):
+    fig = draw.figure()
+    # the matrix lays out its own axes
+    target = fig if plot == 'matrix' else fig.add_subplot(111)
+    func(target, *args)
+    filename = os.path.join(out_dir, '%s_%s.png' % (name, plot))
+    fig.savefig(filename)
+    return filename
+
+
+def run_clustering(df, analysis, out_dir, name):
+    method = analysis['method']
+    feat_list = list(analysis['features'])
+    col_name = analysis.get('column', method)
+    X = df[feat_list].values
+    Z = None
+    if method == 'kmeans':
+        labels = clustering.kmeans(X, int(analysis['k']))
+    elif method == 'hierarchy':
+        Z, labels = clustering.hierarchy(
+            X, int(analysis['k']), analysis.get('linkage', 'ward'), analysis.get('distance', 'euclidean')
+        )
+    else:
+        labels = clustering.ap(X, analysis.get('preference', -50))
+    df[col_name] = pd.Series(labels, index=df.index)
+    filename = os.path.join(out_dir, name + '.csv')
+    df[[col_name]].to_csv(filename)
+    outputs = [filename]
+    for plot in analysis.get('plots', []):
+        if plot not in CLUSTER_PLOTS or (plot in ('dendrogram', 'matrix') and Z is None):
+            raise ValueError('%s can not draw %s' % (method, plot))
+        if plot == 'scatter':
+            args = (draw.scatter_2d, X[:, :2], labels)
+        elif plot == 'pca':
+            args = (draw.scatter_2d, clustering.pca(X), labels)
+        elif plot == 'tsne':
+            args = (draw.scatter_2d, clustering.tsne(X), labels)
+        elif plot == 'profile':
+            args = (draw.profile, X, labels, feat_list)
+        elif plot == 'bands':
+            args = (draw.profile, X, labels, feat_list, 'bands')
+        elif plot == 'radviz':
+            args = (draw.radviz, df[feat_list + [col_name]], col_name)
+        elif plot == 'dendrogram':
+            args = (draw.dendrogram, Z)
+        else:
+            args = (draw.dendrogram_matrix, Z, X)
+        outputs.append(save_plot(out_dir, name, plot, *args))
+    return outputs
+
+
+def run_classification(df, analysis, out_dir, name):
+    method = analysis['method']
+    X = df[list(analysis['features'])].values
+    y = df[analysis['target']].values
+    algo = analysis.get('algorithm', 'kNN')
+    folds = int(analysis.get('folds', 3))
+    if method == 'biclass':
+        classification.check_binary(y)
+        model = classification.biclass_model(algo, int(analysis.get('neighbors', 5)))
+    else:
+        model = classification.multiclass_model(algo)
+    split = classification.hold_out(X, y, float(analysis.get('hold_out', 0.3)))
+    if method == 'biclass':
+        metrics, train_conf_df, test_conf_df = classification.score_biclass(model, folds, *split)
+    else:
+        train_accuracy, test_accuracy, train_conf_df, test_conf_df = classification.score_multiclass(
+            model, folds, *split
+        )
+        metrics = pd.DataFrame([[train_accuracy, test_accuracy]], ['accuracy'], ['train', 'test'])
+    outputs = []
+    for suffix, table in (('metrics', metrics), ('train_confusion', train_conf_df),
+                          ('test_confusion', test_conf_df)):
+        filename = os.path.join(out_dir, '%s_%s.csv' % (name, suffix))
+        table.to_csv(filename)
+        outputs.append(filename)
+    return outputs
+
+
+def run_regression(df, analysis, out_dir, name):
+    feat_list = list(analysis['features'])
+    X = df[feat_list].values
+    y = df[analysis['target']].values
+    if analysis['method'] == 'linear':
+        stat_df, coef_df = regression.linear(X, y, feat_list)
+    else:
+        stat_df, coef_df = regression.glm(X, y, analysis.get('family', 'Gaussian'), feat_list)
+    outputs = []
+    for suffix, table in (('statistics', stat_df), ('coefficients', coef_df)):
+        filename = os.path.join(out_dir, '%s_%s.csv' % (name, suffix))
+        table.to_csv(filename, index=False)
+        outputs.append(filename)
+    return outputs
+
+
+METHODS = {
+    'kmeans': run_clustering,
+    'hierarchy': run_clustering,
+    'ap': run_clustering,
+    'biclass': run_classification,
+    'multiclass': run_classification,
+    'linear': run_regression,
+    'glm': run_regression
+}
+
+
+def output_name(path):
+    # the file name plus a short hash of the full path, datasets with the
+    # same name in different folders never share an output folder
+    path = os.path.abspath(os.path.normpath(path))
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+    return '%s_%s' % (os.path.basename(path), digest)
+
+
+def run_dataset(path, spec, out_root):
+    # one dataset through the whole spec, runs in a worker process
+    start = time.time()
+    out_dir = os.path.join(out_root, output_name(path))
+    os.makedirs(out_dir, exist_ok=True)
+    summary = {'dataset': path, 'out_dir': out_dir, 'steps': []}
+    df = load(path)
+    summary['rows'] = df.shape[0]
+    summary['steps'].append({'step': 'load', 'seconds': time.time() - start})
+    lap = time.time()
+    apply_steps(df, spec.get('preprocess', []))
+    summary['steps'].append({'step': 'preprocess', 'seconds': time.time() - lap})
+    for i, analysis in enumerate(spec.get('analyses', [])):
+        lap = time.time()
+        method = analysis['method']
+        if method not in METHODS:
+            raise ValueError('unknown analysis: %s' % method)
+        analysis_name = analysis.get('name', '%d_%s' % (i, method))
+        outputs = METHODS[method](df, analysis, out_dir, analysis_name)
+        summary['steps'].append({
+            'step': analysis_name, 'seconds': time.time() - lap, 'outputs': outputs
+        })
+    if spec.get('save_data'):
+        # the writer of Save CSV, the extension picks the format and the
+        # compression explicitly (.csv, .csv.gz, .csv.zst or .cols)
+        writer.save(df, os.path.join(out_dir, spec['save_data']))
+    summary['seconds'] = time.time() - start
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as fout:
+        json.dump(summary, fout, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='run preprocess steps and analyses on datasets without the gui'
+    )
+    parser.add_argument('spec', help='json job spec')
+    parser.add_argument('datasets', nargs='+', help='csv files or .cols folders')
+    parser.add_argument('--out', default='results', help='one sub folder per dataset is written here')
+    parser.add_argument('--workers', type=int, default=1, help='datasets run in parallel processes')
+    args = parser.parse_args(argv)
+
+    with open(args.spec, 'r') as fin:
+        spec = json.load(fin)
+    start = time.time()
+    rows, failed = 0, 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(run_dataset, path, spec, args.out): path for path in args.datasets}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                failed += 1
+                print('%s: failed, %s' % (path, e))
+                continue
+            rows += summary['rows']
+            print('%s: %d rows in %.2fs, results in %s' % (
+                path, summary['rows'], summary['seconds'], summary['out_dir']
+            ))
+    total = time.time() - start
+    done = len(args.datasets) - failed
+    print('%d datasets, %d rows in %.2fs: %.2f datasets/s, %.0f rows/s' % (
+        done, rows, total, done / total, rows / total
+    ))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
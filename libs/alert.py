@@ -5,8 +5,14 @@ from libs.font import LABEL
 class Alert():
 
     def warn(self, msg):
+        self.show("WARNING", msg)
+
+    def info(self, msg):
+        self.show("INFO", msg)
+
+    def show(self, title, msg):
         pop_up_win = tk.Toplevel()
-        pop_up_win.wm_title("WARNING")
+        pop_up_win.wm_title(title)
 
         label = tk.Label(
             pop_up_win, text=msg,
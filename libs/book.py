@@ -21,24 +21,29 @@ class AutoScrollbar(tk.Scrollbar):
         raise tk.TclError
 
 
+# lines shown at a time
+PAGE_LINES = 500
+POLL_MS = 200
+
+
 class InnerBook(tk.Frame):
 
-    def __init__(self, master, string):
+    def __init__(self, master, lines):
         tk.Frame.__init__(self, master)
         self.master = master
-        self.string = string
+        self.lines = lines
         self.text = None
         self.create_view()
 
     def create_view(self):
-        text = tk.Label(self, text=self.string)
-        text.grid(row=0, column=0)
+        text = tk.Label(self, text='\n'.join(self.lines), justify=tk.LEFT, anchor=tk.NW)
+        text.grid(row=0, column=0, sticky=tk.W)
         self.text = text
 
 
 class Book(tk.Frame):
 
-    def __init__(self, master, string, *args, **kw):
+    def __init__(self, master, document, *args, **kw):
         tk.Frame.__init__(self, master, *args, **kw)
 
         # create scrollbars
@@ -59,23 +64,74 @@ class Book(tk.Frame):
         vscrollbar.config(command=canvas.yview)
         hscrollbar.config(command=canvas.xview)
 
+        # which lines are shown, the index may still be growing
+        status = tk.Label(self, text='', font=FONT, anchor=tk.W)
+        status.grid(row=2, column=0, sticky=tk.E+tk.W)
+
         # make the canvas expandable
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self.canvas = canvas
+        self.status = status
 
         # create content
+        self.document = document
+        self.start = 0
+        self.shown = 0
         self.book = None
-        self.create_book(string)
+        self.polling = None
+        self.create_book()
+        self.poll()
 
-    def create_book(self, string):
+    def create_book(self):
         if self.book:
             self.book.destroy()
-        inner_book = InnerBook(self.canvas, string)
+        lines = self.document.lines(self.start, self.start + PAGE_LINES)
+        self.shown = len(lines)
+        inner_book = InnerBook(self.canvas, lines)
         inner_book.grid(row=0, column=0, sticky=tk.N+tk.S+tk.E+tk.W)
 
         # put content on canvas
+        self.canvas.delete('all')
         self.canvas.create_window(0, 0, anchor=tk.NW, window=inner_book)
         inner_book.update_idletasks()
         self.canvas.config(scrollregion=self.canvas.bbox("all"))
+        self.canvas.yview_moveto(0)
         self.book = inner_book
+        self.update_status()
+
+    def update_status(self):
+        total = len(self.document)
+        text = 'lines %d - %d of %d' % (
+            self.start + 1 if self.shown else 0, self.start + self.shown, total
+        )
+        if self.document.stopped:
+            text += ' (indexing stopped)'
+        elif not self.document.complete:
+            text += ' (indexing)'
+        self.status.config(text=text)
+
+    def poll(self):
+        # fill the page while the index is still being built
+        self.polling = None
+        if self.shown < PAGE_LINES and len(self.document) > self.start + self.shown:
+            self.create_book()
+        else:
+            self.update_status()
+        if not self.document.complete and not self.document.stopped:
+            self.polling = self.after(POLL_MS, self.poll)
+
+    def destroy(self):
+        if self.polling:
+            self.after_cancel(self.polling)
+        tk.Frame.destroy(self)
+
+    def next_view(self):
+        if self.start + PAGE_LINES < len(self.document):
+            self.start += PAGE_LINES
+            self.create_book()
+
+    def prev_view(self):
+        if self.start > 0:
+            self.start = max(self.start - PAGE_LINES, 0)
+            self.create_book()
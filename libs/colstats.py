@@ -0,0 +1,121 @@
+import itertools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, is_bool_dtype
+from engine import correlation
+from libs.ooc import Summary, check, CHUNK_SIZE
+
+# every change of a column gives it a new version, results computed from
+# a column are cached under its version so only changed columns are
+# computed again. the counter is shared, a dropped column that comes back
+# with the same name never matches its old results
+_counter = itertools.count(1)
+_frames = {}
+
+
+class FrameColumns():
+    # versions and cached results of one frame, dropped with the frame
+
+    def __init__(self):
+        self.versions = {}
+        self.stats = {}
+        self.approx = {}
+        self.corrs = {}
+
+
+def frame_columns(df):
+    key = id(df)
+    if key not in _frames:
+        _frames[key] = FrameColumns()
+        weakref.finalize(df, _frames.pop, key, None)
+    return _frames[key]
+
+
+def bump(df, columns=None):
+    # columns changed in place, None when rows were dropped or reordered
+    versions = frame_columns(df).versions
+    for column in (df.columns if columns is None else columns):
+        versions[column] = next(_counter)
+
+
+def version(df, column):
+    return frame_columns(df).versions.get(column, 0)
+
+
+def column_key(df, column):
+    return version(df, column), str(df[column].dtype), len(df)
+
+
+def numeric_columns(df, bools=False):
+    # the columns describe and corr use by default, corr counts booleans
+    return [c for c, t in df.dtypes.items() if is_numeric_dtype(t) and (bools or not is_bool_dtype(t))]
+
+
+def describe(df):
+    # same table as df.describe(), computed for the changed columns only
+    cache = frame_columns(df)
+    columns = numeric_columns(df) or list(df.columns)
+    keys = {c: column_key(df, c) for c in columns}
+    missing = [c for c in columns if cache.stats.get(c, (None,))[0] != keys[c]]
+    if missing:
+        stats = df[missing].describe()
+        for c in missing:
+            cache.stats[c] = (keys[c], stats[c])
+    return pd.DataFrame({c: cache.stats[c][1] for c in columns}, columns=columns)
+
+
+def describe_approx(df, job=None):
+    # one streaming pass over blocks of rows, the quartiles come from kll
+    # sketches instead of sorting the columns. frames without numbers are
+    # described exactly
+    cache = frame_columns(df)
+    columns = numeric_columns(df)
+    if not columns:
+        return describe(df)
+    keys = {c: column_key(df, c) for c in columns}
+    missing = [c for c in columns if cache.approx.get(c, (None,))[0] != keys[c]]
+    if missing:
+        # the columns are sketched on a thread pool, numpy sorts release
+        # the gil
+        with ThreadPoolExecutor() as pool:
+            stats = list(pool.map(lambda c: sketch_column(df[c], job), missing))
+        for c, column_stats in zip(missing, stats):
+            cache.approx[c] = (keys[c], column_stats)
+    return pd.DataFrame({c: cache.approx[c][1] for c in columns}, columns=columns)
+
+
+def sketch_column(col, job=None):
+    summary = Summary([col.name])
+    values = col.values.astype('float64')[:, None]
+    for start in range(0, len(values), CHUNK_SIZE):
+        check(job, 'column %s, rows %d / %d' % (col.name, start, len(values)))
+        summary.update(values[start: start + CHUNK_SIZE])
+    return summary.describe()[col.name]
+
+
+def corr(df, method='pearson', dtype='float64', job=None):
+    # df.corr() for pearson, and for spearman without missing values. with
+    # missing values spearman ranks each column over all of its values
+    # while pandas ranks each pair's common rows again, the entries differ.
+    # the entries of unchanged pairs are taken from the last matrix and
+    # only the changed columns are correlated with all the others
+    cache = frame_columns(df)
+    columns = numeric_columns(df, bools=True)
+    keys = {c: column_key(df, c) for c in columns}
+    old_keys, old = cache.corrs.get((method, dtype), ({}, None))
+    stale = [c for c in columns if old_keys.get(c) != keys[c]]
+    if old is None or 2 * len(stale) > len(columns):
+        values = correlation.matrix(df[columns].values, method, dtype, job=job)
+        matrix = pd.DataFrame(values, index=columns, columns=columns)
+    else:
+        matrix = old.reindex(index=columns, columns=columns)
+        if stale:
+            entries = correlation.cross(df[stale].values, df[columns].values, method, dtype, job=job)
+            position = [columns.index(c) for c in stale]
+            values = matrix.values.copy()
+            values[position, :] = entries
+            values[:, position] = entries.T
+            matrix = pd.DataFrame(values, index=columns, columns=columns)
+    cache.corrs[(method, dtype)] = (keys, matrix)
+    return matrix.copy()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+# object columns with fewer distinct values than this share of the rows
+# are stored as categories
+CATEGORY_RATIO = 0.5
+
+
+def compact_column(col):
+    if str(col.dtype) in ('object', 'string', 'str'):
+        n = col.shape[0]
+        if n and col.nunique() <= CATEGORY_RATIO * n:
+            return col.astype('category')
+        return col
+    if not isinstance(col.dtype, np.dtype):
+        return col
+    kind = col.dtype.kind
+    if kind in 'iu':
+        return pd.to_numeric(col, downcast='integer')
+    if kind == 'f':
+        narrow = col.astype('float32')
+        # only keep float32 when every value survives the round trip
+        same = (narrow.astype('float64') == col) | (col.isnull() & narrow.isnull())
+        return narrow if same.all() else col
+    return col
+
+
+def compact(df):
+    # narrow the dtypes of df in place, returns the bytes before and after
+    before = int(df.memory_usage(deep=True).sum())
+    for name in df.columns:
+        col = compact_column(df[name])
+        if col.dtype != df[name].dtype:
+            df[name] = col
+    after = int(df.memory_usage(deep=True).sum())
+    return before, after
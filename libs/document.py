@@ -0,0 +1,102 @@
+import os
+import mmap
+import threading
+import numpy as np
+from libs.ooc import check
+from libs.progress import format_bytes
+
+# bytes scanned for line breaks per step of the index
+BLOCK_SIZE = 16 * 1024 ** 2
+# longer lines are cut when shown
+MAX_LINE = 2000
+
+
+class Document():
+    # a text file mapped into memory, lines are found by an index of the
+    # line break offsets that a background job fills in block by block
+
+    def __init__(self, filename=None, encoding='utf-8'):
+        self.filename = filename
+        self.encoding = encoding
+        self.lock = threading.Lock()
+        self.ends = np.zeros(1024, dtype=np.int64)
+        self.count = 0
+        self.scanned = 0
+        self.size = 0
+        self.mm = None
+        if filename:
+            self.size = os.path.getsize(filename)
+        if self.size:
+            with open(filename, 'rb') as fin:
+                # the mapping stays valid after the file is closed
+                self.mm = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        self.complete = self.mm is None
+        # the job filling the index, a cancelled or failed one ends it
+        self.job = None
+        self.failed = False
+
+    @property
+    def name(self):
+        return os.path.basename(self.filename) if self.filename else ''
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def stopped(self):
+        # the index will never be complete, a job cancelled before it ran
+        # never gets to set failed
+        cancelled = self.job is not None and self.job.cancelled.is_set()
+        return not self.complete and (self.failed or cancelled)
+
+    def index(self, job=None):
+        try:
+            while self.scanned < self.size:
+                check(job, '%s / %s' % (format_bytes(self.scanned), format_bytes(self.size)))
+                start = self.scanned
+                block = np.frombuffer(self.mm[start: start + BLOCK_SIZE], dtype=np.uint8)
+                found = np.flatnonzero(block == 10) + start
+                self.append(found)
+                self.scanned = start + block.shape[0]
+        except Exception:
+            self.failed = True
+            raise
+        if self.size and self.mm[self.size - 1: self.size] != b'\n':
+            # the last line has no line break
+            self.append(np.array([self.size]))
+        self.complete = True
+        return self
+
+    def append(self, found):
+        with self.lock:
+            needed = self.count + found.shape[0]
+            if needed > self.ends.shape[0]:
+                ends = np.zeros(max(needed, 2 * self.ends.shape[0]), dtype=np.int64)
+                ends[:self.count] = self.ends[:self.count]
+                self.ends = ends
+            self.ends[self.count: needed] = found
+            self.count = needed
+
+    def lines(self, start, stop):
+        # decoded lines [start, stop) of the part indexed so far
+        with self.lock:
+            stop = min(stop, self.count)
+            if start >= stop:
+                return []
+            begin = int(self.ends[start - 1]) + 1 if start else 0
+            end = int(self.ends[stop - 1])
+        text = self.mm[begin: end].decode(self.encoding, errors='replace')
+        return [line.rstrip('\r')[:MAX_LINE] for line in text.split('\n')]
+
+    def blocks(self, size=BLOCK_SIZE, job=None):
+        # the text in pieces of about size bytes, cut at line breaks so
+        # words aren't split
+        pos = 0
+        while pos < self.size:
+            check(job, '%s / %s' % (format_bytes(pos), format_bytes(self.size)))
+            end = min(pos + size, self.size)
+            if end < self.size:
+                cut = self.mm.rfind(b'\n', pos, end)
+                end = cut + 1 if cut >= 0 else end
+            yield self.mm[pos: end].decode(self.encoding, errors='replace')
+            pos = end
@@ -0,0 +1,163 @@
+import time
+import queue
+import threading
+import tkinter as tk
+from collections import deque
+from libs.font import LABEL
+from libs.alert import Alert
+
+POLL_MS = 100
+
+
+class Job():
+
+    def __init__(self, label, func, on_done=None, on_error=None, key=None):
+        self.label = label
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.key = key if key is not None else label
+        self.progress = ''
+        self.started = None
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def report(self, progress):
+        # called from the worker, only read by the ui when it polls
+        self.progress = progress
+
+    def elapsed(self):
+        return time.time() - self.started if self.started else 0.0
+
+
+class JobExecutor():
+    # runs one job at a time on a worker thread, the result is handed back
+    # to the tk thread with after() so callbacks may touch widgets
+
+    def __init__(self, master, on_change=None):
+        self.master = master
+        self.on_change = on_change
+        self.pending = deque()
+        self.current = None
+        self.results = queue.Queue()
+        self.polling = False
+
+    def submit(self, label, func, on_done=None, on_error=None, key=None):
+        job = Job(label, func, on_done, on_error, key)
+        # a second click on the same action doesn't stack another run
+        for other in self.jobs():
+            if other.key == job.key:
+                return other
+        self.pending.append(job)
+        self.next()
+        return job
+
+    def jobs(self):
+        return ([self.current] if self.current else []) + list(self.pending)
+
+    def cancel(self, job=None):
+        job = job or self.current
+        if not job:
+            return
+        job.cancel()
+        if job in self.pending:
+            self.pending.remove(job)
+        elif job is self.current:
+            # the thread can't be interrupted, its result is dropped and
+            # the next job doesn't have to wait for it
+            self.current = None
+            self.next()
+        self.changed()
+
+    def next(self):
+        if self.current or not self.pending:
+            self.changed()
+            return
+        job = self.pending.popleft()
+        job.started = time.time()
+        self.current = job
+        thread = threading.Thread(target=self.work, args=(job,), daemon=True)
+        thread.start()
+        self.changed()
+        if not self.polling:
+            self.polling = True
+            self.master.after(POLL_MS, self.poll)
+
+    def work(self, job):
+        try:
+            result = job.func(job)
+        except Exception as e:
+            self.results.put((job, None, e))
+        else:
+            self.results.put((job, result, None))
+
+    def poll(self):
+        while True:
+            try:
+                job, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if job.cancelled.is_set():
+                continue
+            if job is self.current:
+                self.current = None
+            if error is not None:
+                if job.on_error:
+                    job.on_error(error)
+                else:
+                    Alert().warn(str(error))
+            elif job.on_done:
+                job.on_done(result)
+        self.next()
+        if self.current:
+            self.master.after(POLL_MS, self.poll)
+        else:
+            self.polling = False
+
+    def changed(self):
+        if self.on_change:
+            self.on_change(self)
+
+
+class JobStatus(tk.Frame):
+    # status bar with the running job, its elapsed time and a cancel button
+
+    def __init__(self, master):
+        tk.Frame.__init__(self, master, bg='#F3F3F3')
+        self.master = master
+        self.executor = None
+        self.label = tk.Label(self, text='', font=LABEL, bg='#F3F3F3', anchor=tk.W)
+        self.label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+        self.btn = tk.Button(
+            self, text="cancel", command=self.cancel,
+            highlightbackground='#F3F3F3'
+        )
+        self.ticking = False
+
+    def update_status(self, executor):
+        self.executor = executor
+        job = executor.current
+        if not job:
+            self.label.config(text='')
+            self.btn.pack_forget()
+            return
+        text = '%s  %.1fs' % (job.label, job.elapsed())
+        if job.progress:
+            text += '  %s' % job.progress
+        if executor.pending:
+            text += '  (%d queued)' % len(executor.pending)
+        self.label.config(text=text)
+        self.btn.pack(side=tk.RIGHT, padx=10)
+        if not self.ticking:
+            self.ticking = True
+            self.after(POLL_MS, self.tick)
+
+    def tick(self):
+        self.ticking = False
+        self.update_status(self.executor)
+
+    def cancel(self):
+        if self.executor:
+            self.executor.cancel()
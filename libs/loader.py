@@ -0,0 +1,124 @@
+import os
+import queue
+import threading
+import pandas as pd
+from libs import sidecar
+from libs.compact import compact
+
+CHUNK_SIZE = 100000
+POLL_MS = 50
+
+
+class CsvLoader():
+    # read a csv file in chunks on a worker thread, the tk side polls
+    # a queue with after() so every callback runs on the main thread
+
+    def __init__(self, master, filename, on_first_chunk=None, on_progress=None,
+                 on_done=None, on_error=None, on_cancel=None, on_compact=None,
+                 chunksize=CHUNK_SIZE, use_cache=True, compact_load=False):
+        self.master = master
+        self.filename = filename
+        self.on_first_chunk = on_first_chunk
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.on_compact = on_compact
+        self.chunksize = chunksize
+        self.use_cache = use_cache
+        self.compact_load = compact_load
+        self.queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = None
+        # the frame was parsed from the text, the caller writes the sidecar
+        self.parsed = False
+
+    def start(self):
+        self.thread = threading.Thread(target=self.read, daemon=True)
+        self.thread.start()
+        self.master.after(POLL_MS, self.poll)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def read(self):
+        try:
+            df = self.read_chunks()
+        except Exception as e:
+            self.queue.put(('error', e))
+            return
+        if df is None:
+            self.queue.put(('cancel', None))
+        else:
+            self.queue.put(('done', df))
+
+    def read_chunks(self):
+        df = self.read_file()
+        if df is not None and self.compact_load:
+            self.queue.put(('compact', compact(df)))
+        return df
+
+    def read_file(self):
+        size = os.path.getsize(self.filename)
+        if self.use_cache:
+            df = sidecar.load(self.filename, self.compact_load)
+            if df is not None:
+                self.queue.put(('progress', (df.shape[0], size, size)))
+                return df
+        df = self.parse(size)
+        # writing the sidecar here would keep the frame from the user until
+        # it is on disk, it is written by a background job after 'done'
+        self.parsed = df is not None and self.use_cache
+        return df
+
+    def parse(self, size):
+        chunks, rows = [], 0
+        with open(self.filename, 'rb') as fin:
+            for chunk in pd.read_csv(fin, chunksize=self.chunksize):
+                if self.cancelled.is_set():
+                    return None
+                chunks.append(chunk)
+                rows += chunk.shape[0]
+                if len(chunks) == 1:
+                    self.queue.put(('first', chunk))
+                self.queue.put(('progress', (rows, fin.tell(), size)))
+        if self.cancelled.is_set():
+            return None
+        if not chunks:
+            # header only, nothing was yielded by the reader
+            return pd.read_csv(self.filename)
+        if len(chunks) == 1:
+            return chunks[0]
+        # same frame as a single read_csv, indices are renumbered
+        return pd.concat(chunks, ignore_index=True)
+
+    def poll(self):
+        while True:
+            try:
+                kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.cancelled.is_set():
+                # drop whatever the worker produced after the cancel
+                kind = 'cancel'
+            if kind == 'first':
+                self.callback(self.on_first_chunk, payload)
+            elif kind == 'progress':
+                self.callback(self.on_progress, *payload)
+            elif kind == 'compact':
+                self.callback(self.on_compact, *payload)
+            elif kind == 'done':
+                self.callback(self.on_done, payload)
+                return
+            elif kind == 'error':
+                self.callback(self.on_error, payload)
+                return
+            elif kind == 'cancel':
+                self.callback(self.on_cancel)
+                return
+        self.master.after(POLL_MS, self.poll)
+
+    @staticmethod
+    def callback(func, *args):
+        if func:
+            func(*args)
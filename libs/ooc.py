@@ -0,0 +1,466 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from libs import sidecar
+from libs.progress import format_bytes
+from libs.sketch import KLL
+
+OOC_DIR = os.path.join(os.path.dirname(sidecar.CACHE_DIR), 'ooc')
+CHUNK_SIZE = 500000
+STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+class Cancelled(Exception):
+    pass
+
+
+def is_out_of_core(df):
+    return isinstance(df, ChunkedDataset)
+
+
+def check(job, msg):
+    if job is None:
+        return
+    if job.cancelled.is_set():
+        raise Cancelled()
+    job.report(msg)
+
+
+class Summary():
+    # count, mean, sum of squares, min and max per column, merged chunk by
+    # chunk with the parallel variance formula, plus a kll sketch for the
+    # quantiles. summaries of different chunks merge into one
+
+    def __init__(self, columns, seed=0):
+        p = len(columns)
+        self.columns = list(columns)
+        self.n = np.zeros(p)
+        self.mean = np.zeros(p)
+        self.m2 = np.zeros(p)
+        self.min = np.full(p, np.inf)
+        self.max = np.full(p, -np.inf)
+        self.sketches = [KLL(seed=seed + j) for j in range(p)]
+
+    def update(self, X):
+        if not X.shape[0]:
+            return
+        # column by column, the columns of a frame's values are contiguous
+        p = X.shape[1]
+        n, mean, m2 = np.zeros(p), np.zeros(p), np.zeros(p)
+        for j, sketch in enumerate(self.sketches):
+            values = X[:, j]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            n[j] = len(values)
+            mean[j] = values.mean()
+            centered = values - mean[j]
+            m2[j] = centered @ centered
+            self.min[j] = min(self.min[j], values.min())
+            self.max[j] = max(self.max[j], values.max())
+            sketch.update(values)
+        self.combine(n, mean, m2)
+
+    def merge(self, other):
+        self.combine(other.n, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        for sketch, theirs in zip(self.sketches, other.sketches):
+            sketch.merge(theirs)
+        return self
+
+    def combine(self, n, mean, m2):
+        total = self.n + n
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / safe_total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.n * n / safe_total
+        self.n = total
+
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 1, np.sqrt(self.m2 / (self.n - 1)), np.nan)
+
+    def quantile(self, q):
+        return np.array([sketch.quantile(q) for sketch in self.sketches])
+
+    def describe(self):
+        empty = self.n == 0
+        data = [
+            self.n, np.where(empty, np.nan, self.mean), self.std(),
+            np.where(empty, np.nan, self.min),
+            self.quantile(0.25), self.quantile(0.5), self.quantile(0.75),
+            np.where(empty, np.nan, self.max)
+        ]
+        return pd.DataFrame(data, index=STATS, columns=self.columns)
+
+
+class ChunkedDataset():
+    # a csv converted to chunks of .npy columns (the sidecar format) and
+    # only ever read one chunk at a time. the conversion is a cache of the
+    # csv and is never changed, the first rewrite moves the dataset to a
+    # working copy that is removed with it
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.objects = (None, {})
+        with open(os.path.join(path, 'manifest.json'), 'r') as fin:
+            self.manifest = json.load(fin)
+
+    @classmethod
+    def open(cls, filename, job=None, chunksize=CHUNK_SIZE):
+        digest = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()
+        path = os.path.join(OOC_DIR, digest)
+        key = sidecar.file_key(filename)
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            dataset = cls(path)
+            # reuse the chunks of an unchanged csv
+            if dataset.manifest.get('key') == key:
+                return dataset
+        return cls.from_csv(filename, path, key, job, chunksize)
+
+    @classmethod
+    def from_csv(cls, filename, path, key, job=None, chunksize=CHUNK_SIZE):
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        size = os.path.getsize(filename)
+        chunks, columns, rows = [], None, 0
+        try:
+            with open(filename, 'rb') as fin:
+                for i, chunk in enumerate(pd.read_csv(fin, chunksize=chunksize)):
+                    rows += chunk.shape[0]
+                    check(job, '%d rows, %s / %s' % (
+                        rows, format_bytes(fin.tell()), format_bytes(size)
+                    ))
+                    name = 'chunk_%05d' % i
+                    sidecar.write_columns(chunk.reset_index(drop=True), os.path.join(path, name))
+                    chunks.append(cls.chunk_entry(name, chunk))
+                    columns = list(chunk.columns)
+        except Exception:
+            shutil.rmtree(path)
+            raise
+        if columns is None:
+            columns = list(pd.read_csv(filename, nrows=0).columns)
+        manifest = {'key': key, 'version': 0, 'columns': columns, 'chunks': chunks}
+        with open(os.path.join(path, 'manifest.json'), 'w') as fout:
+            json.dump(manifest, fout)
+        return cls(path)
+
+    @staticmethod
+    def chunk_entry(name, chunk):
+        return {
+            'dir': name, 'rows': chunk.shape[0],
+            'dtypes': [str(t) for t in chunk.dtypes]
+        }
+
+    @property
+    def name(self):
+        return self.manifest['key']['path']
+
+    @property
+    def columns(self):
+        return pd.Index(self.manifest['columns'])
+
+    @property
+    def dtypes(self):
+        # a column can be int in one chunk and float in the next
+        dtypes = []
+        for j in range(len(self.manifest['columns'])):
+            kinds = set(c['dtypes'][j] for c in self.manifest['chunks'])
+            try:
+                dtypes.append(np.result_type(*kinds) if kinds else np.dtype('object'))
+            except TypeError:
+                dtypes.append(np.dtype('object'))
+        return pd.Series(dtypes, index=self.columns)
+
+    @property
+    def shape(self):
+        return len(self), len(self.manifest['columns'])
+
+    def __len__(self):
+        return int(sum(c['rows'] for c in self.manifest['chunks']))
+
+    def numeric_columns(self):
+        dtypes = self.dtypes
+        return [c for c in self.columns if dtypes[c].kind in 'iuf']
+
+    def offsets(self):
+        return np.cumsum([0] + [c['rows'] for c in self.manifest['chunks']])
+
+    def nbytes_on_disk(self):
+        total = 0
+        for root, _, files in os.walk(self.path):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+    def read_chunk(self, i, columns=None, rows=None):
+        # rows is a (start, stop) range inside the chunk, a page only reads
+        # its own rows of the mapped columns
+        start = rows[0] if rows is not None else 0
+        with self.lock:
+            entry = self.manifest['chunks'][i]
+            path = os.path.join(self.path, entry['dir'])
+            if rows is None:
+                df = sidecar.read_columns(path, columns)
+            else:
+                # the pickled columns of the chunk being paged are kept,
+                # the next page of it doesn't unpickle them again
+                if self.objects[0] != path:
+                    self.objects = (path, {})
+                df = sidecar.read_columns(path, columns, rows, self.objects[1])
+            offset = int(self.offsets()[i])
+        stop = start + df.shape[0]
+        if isinstance(df.index, pd.RangeIndex) and df.index.equals(pd.RangeIndex(start, stop)):
+            df.index = pd.RangeIndex(offset + start, offset + stop)
+        return df
+
+    def iter_chunks(self, job=None, columns=None, reverse=False):
+        n = len(self.manifest['chunks'])
+        order = range(n - 1, -1, -1) if reverse else range(n)
+        for step, i in enumerate(order):
+            check(job, 'chunk %d / %d' % (step + 1, n))
+            yield i, self.read_chunk(i, columns)
+
+    def slice(self, start, stop):
+        offsets = self.offsets()
+        stop = min(stop, int(offsets[-1]))
+        if start >= stop:
+            return self.read_chunk(0, rows=(0, 0)) if self.manifest['chunks'] else pd.DataFrame(
+                columns=self.columns
+            )
+        first = int(np.searchsorted(offsets, start, side='right')) - 1
+        last = int(np.searchsorted(offsets, stop, side='left')) - 1
+        frames = [
+            self.read_chunk(i, rows=(max(start - int(offsets[i]), 0), min(stop, int(offsets[i + 1])) - int(offsets[i])))
+            for i in range(first, last + 1)
+        ]
+        return frames[0] if len(frames) == 1 else pd.concat(frames)
+
+    # one pass statistics
+
+    def summarize(self, columns=None, job=None):
+        columns = self.numeric_columns() if columns is None else list(columns)
+        summary = Summary(columns)
+        for _, chunk in self.iter_chunks(job, columns):
+            summary.update(chunk[columns].values.astype('float64'))
+        return summary
+
+    def describe(self, job=None):
+        # count, mean, std, min and max are exact, the quartiles come from
+        # the kll sketches
+        return self.summarize(job=job).describe()
+
+    def corr(self, job=None, dtype='float64'):
+        # pairwise complete pearson like DataFrame.corr, the sums are taken
+        # over the rows where both columns are present. with float32 the
+        # products of a chunk are float32, the sums over chunks stay float64
+        columns = self.numeric_columns()
+        p = len(columns)
+        N, Sx, Sxx, Sxy = (np.zeros((p, p)) for _ in range(4))
+        shift = None
+        for _, chunk in self.iter_chunks(job, columns):
+            X = chunk[columns].values.astype('float64')
+            valid = ~np.isnan(X)
+            if shift is None:
+                # correlation doesn't change under a shift, centering on
+                # the first chunk keeps the sums small
+                shift = np.where(valid, X, 0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+            Z = np.where(valid, X - shift, 0).astype(dtype)
+            M = valid.astype(dtype)
+            N += M.T @ M
+            Sx += Z.T @ M
+            Sxx += (Z * Z).T @ M
+            Sxy += Z.T @ Z
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = Sxy - Sx * Sx.T / N
+            var_x = Sxx - Sx ** 2 / N
+            r = cov / np.sqrt(var_x * var_x.T)
+        r[N < 2] = np.nan
+        r = np.clip(r, -1, 1).astype(dtype)
+        return pd.DataFrame(r, index=columns, columns=columns)
+
+    def histogram(self, column, bins, job=None):
+        summary = self.summarize([column], job)
+        lo, hi = summary.min[0], summary.max[0]
+        if not np.isfinite(lo):
+            return np.zeros(bins), np.linspace(0, 1, bins + 1)
+        edges = np.linspace(lo, hi if hi > lo else lo + 1, bins + 1)
+        counts = np.zeros(bins)
+        for _, chunk in self.iter_chunks(job, [column]):
+            values = chunk[column].values.astype('float64')
+            counts += np.histogram(values[~np.isnan(values)], bins=edges)[0]
+        return counts, edges
+
+    def sample(self, n, seed=None, job=None):
+        # bottom-k over random row keys, every row has the same chance
+        rng = np.random.RandomState(seed)
+        keys, sample = np.empty(0), None
+        for _, chunk in self.iter_chunks(job):
+            chunk_keys = rng.random_sample(chunk.shape[0])
+            if sample is not None and len(keys) >= n:
+                # rows above the current threshold can never make it
+                keep = chunk_keys < keys.max()
+                chunk, chunk_keys = chunk[keep], chunk_keys[keep]
+            keys = np.concatenate([keys, chunk_keys])
+            sample = chunk if sample is None else pd.concat([sample, chunk])
+            if len(keys) > n:
+                idx = np.sort(np.argpartition(keys, n)[:n])
+                keys, sample = keys[idx], sample.iloc[idx]
+        if sample is None:
+            return pd.DataFrame(columns=self.columns)
+        return sample
+
+    # chunked rewrites, the new chunks only replace the old ones once all
+    # of them are written so a cancelled job leaves the data untouched
+
+    def map_chunks(self, func, job=None):
+        version = self.manifest.get('version', 0) + 1
+        working = self.manifest.get('working', False)
+        path = self.path if working else tempfile.mkdtemp(prefix='work_', dir=OOC_DIR)
+        chunks, columns, offset = [], None, 0
+        try:
+            for i, chunk in self.iter_chunks(job):
+                new = func(i, chunk)
+                if new.index.equals(pd.RangeIndex(offset, offset + new.shape[0])):
+                    new = new.reset_index(drop=True)
+                name = 'chunk_%05d_v%d' % (i, version)
+                sidecar.write_columns(new, os.path.join(path, name))
+                chunks.append(self.chunk_entry(name, new))
+                columns = list(new.columns)
+                offset += new.shape[0]
+        except Exception:
+            if working:
+                for entry in chunks:
+                    shutil.rmtree(os.path.join(path, entry['dir']))
+            else:
+                shutil.rmtree(path)
+            raise
+        with self.lock:
+            old = self.manifest['chunks']
+            manifest = dict(self.manifest)
+            manifest.update({
+                'version': version, 'chunks': chunks, 'working': True,
+                'columns': columns if columns is not None else self.manifest['columns']
+            })
+            tmp = os.path.join(path, 'manifest.json.tmp')
+            with open(tmp, 'w') as fout:
+                json.dump(manifest, fout)
+            os.replace(tmp, os.path.join(path, 'manifest.json'))
+            self.manifest = manifest
+            if working:
+                for entry in old:
+                    shutil.rmtree(os.path.join(path, entry['dir']))
+            else:
+                # the conversion stays as it is for the next import
+                self.path = path
+                weakref.finalize(self, shutil.rmtree, path, True)
+
+    def fillna(self, values, job=None):
+        self.map_chunks(lambda i, chunk: chunk.fillna(values), job)
+
+    def fill_mean(self, job=None):
+        summary = self.summarize(job=job)
+        self.fillna(pd.Series(summary.mean, index=summary.columns)[summary.n > 0], job)
+
+    def fill_median(self, job=None):
+        # the median from the kll sketches, within their rank error
+        summary = self.summarize(job=job)
+        self.fillna(pd.Series(summary.quantile(0.5), index=summary.columns).dropna(), job)
+
+    def ffill(self, job=None):
+        carry = [None]
+
+        def fill(i, chunk):
+            chunk = chunk.ffill()
+            if carry[0] is not None:
+                chunk = chunk.fillna(carry[0])
+            if chunk.shape[0]:
+                carry[0] = chunk.iloc[-1]
+            return chunk
+
+        self.map_chunks(fill, job)
+
+    def bfill(self, job=None):
+        # first pass backwards to find what each chunk's tail is filled with
+        carries, carry = {}, None
+        for i, chunk in self.iter_chunks(job, reverse=True):
+            carries[i] = carry
+            if chunk.shape[0]:
+                first = chunk.bfill().iloc[0]
+                carry = first if carry is None else first.fillna(carry)
+
+        def fill(i, chunk):
+            chunk = chunk.bfill()
+            return chunk if carries[i] is None else chunk.fillna(carries[i])
+
+        self.map_chunks(fill, job)
+
+    def interpolate(self, job=None):
+        # linear in the row position like DataFrame.interpolate, the gaps
+        # crossing a chunk border use the last value before the chunk and
+        # the first one after it
+        columns = self.numeric_columns()
+        offsets = self.offsets()
+        after, nxt = {}, {}
+        for i, chunk in self.iter_chunks(job, columns, reverse=True):
+            after[i] = dict(nxt)
+            for c in columns:
+                valid = np.flatnonzero(chunk[c].notnull().values)
+                if len(valid):
+                    nxt[c] = (offsets[i] + valid[0], chunk[c].values[valid[0]])
+        before = {}
+
+        def fill(i, chunk):
+            positions = offsets[i] + np.arange(chunk.shape[0])
+            for c in columns:
+                values = chunk[c].values.astype('float64')
+                xs, ys = [positions], [values]
+                if c in before:
+                    xs.insert(0, [before[c][0]])
+                    ys.insert(0, [before[c][1]])
+                if c in after[i]:
+                    xs.append([after[i][c][0]])
+                    ys.append([after[i][c][1]])
+                s = pd.Series(np.concatenate(ys), index=np.concatenate(xs)).interpolate(method='index')
+                filled = s.values[1:] if c in before else s.values
+                chunk[c] = filled[:chunk.shape[0]]
+                valid = np.flatnonzero(~np.isnan(values))
+                if len(valid):
+                    before[c] = (positions[valid[-1]], values[valid[-1]])
+            return chunk
+
+        self.map_chunks(fill, job)
+
+    def scale(self, columns, kind, job=None):
+        summary = self.summarize(columns, job)
+        lo = pd.Series(summary.min, index=summary.columns)
+        hi = pd.Series(summary.max, index=summary.columns)
+        mean = pd.Series(summary.mean, index=summary.columns)
+        std = pd.Series(summary.std(), index=summary.columns)
+
+        def transform(i, chunk):
+            for c in summary.columns:
+                col = chunk[c].astype('float64')
+                if kind == '01':
+                    chunk[c] = (col - lo[c]) / (hi[c] - lo[c])
+                elif kind == '11':
+                    chunk[c] = 2 * (col - lo[c]) / (hi[c] - lo[c]) - 1
+                else:
+                    chunk[c] = (col - mean[c]) / std[c]
+            return chunk
+
+        self.map_chunks(transform, job)
+
+    def dropna(self, job=None):
+        self.map_chunks(lambda i, chunk: chunk.dropna(), job)
+
+    def drop_columns(self, columns, job=None):
+        self.map_chunks(lambda i, chunk: chunk.drop(columns=list(columns)), job)
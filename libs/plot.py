@@ -1,17 +1,113 @@
+import threading
 import tkinter as tk
-import matplotlib
 import numpy as np
-import matplotlib.patches as mpatches
-import itertools as it
-import pylab
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk # noqa
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
 from matplotlib import style
-from mpl_toolkits.mplot3d import Axes3D
-from pandas.plotting import radviz
+from engine import draw, decimate, density
 matplotlib.use("TkAgg")
 style.use("ggplot")
+POLL_MS = 20
+
+
+class Canvas(FigureCanvasTkAgg):
+    # draw() rasterizes the figure with agg on a worker thread and the
+    # finished bitmap is blitted on the tk thread, so a heavy figure doesn't
+    # freeze the ui. a draw asked for during a render runs once after it.
+    # the figure must not change while the worker draws it: code that
+    # changes it calls wait() first, and mouse, key and resize events wait
+    # for the render before they reach the toolbar
+
+    def __init__(self, figure, master):
+        self.rendering = False
+        self.pending = False
+        self.failed = False
+        self.done = threading.Event()
+        self.done.set()
+        # called on the tk thread after a render, before the blit
+        self.on_rendered = None
+        FigureCanvasTkAgg.__init__(self, figure, master)
+
+    def draw(self):
+        if self.rendering:
+            self.pending = True
+            return
+        self.rendering = True
+        self.done.clear()
+        threading.Thread(target=self.render, daemon=True).start()
+        self.get_tk_widget().after(POLL_MS, self.poll)
+
+    def render(self):
+        try:
+            FigureCanvasAgg.draw(self)
+            self.failed = False
+        except Exception:
+            self.failed = True
+        self.done.set()
+
+    def wait(self):
+        # blocks until the worker is done with the figure, the bitmap is
+        # still shown by the next poll
+        self.done.wait()
+
+    def alive(self):
+        try:
+            return bool(self.get_tk_widget().winfo_exists())
+        except tk.TclError:
+            return False
+
+    def poll(self):
+        # the plot may have been destroyed during the render
+        if not self.alive():
+            return
+        if not self.done.is_set():
+            self.get_tk_widget().after(POLL_MS, self.poll)
+            return
+        self.rendering = False
+        if self.pending:
+            self.pending = False
+            self.draw()
+            return
+        if self.failed:
+            # drawn on the tk thread so the error shows up as usual
+            self.failed = False
+            FigureCanvasTkAgg.draw(self)
+        if self.on_rendered is not None:
+            self.on_rendered()
+        self.blit()
+
+    # events that change the figure wait for the render, moves during a
+    # render are dropped, the next one carries the pointer position
+
+    def motion_notify_event(self, *args, **kwargs):
+        if self.done.is_set():
+            FigureCanvasTkAgg.motion_notify_event(self, *args, **kwargs)
+
+    def button_press_event(self, *args, **kwargs):
+        self.wait()
+        FigureCanvasTkAgg.button_press_event(self, *args, **kwargs)
+
+    def button_release_event(self, *args, **kwargs):
+        self.wait()
+        FigureCanvasTkAgg.button_release_event(self, *args, **kwargs)
+
+    def scroll_event(self, *args, **kwargs):
+        self.wait()
+        FigureCanvasTkAgg.scroll_event(self, *args, **kwargs)
+
+    def scroll_event_windows(self, *args, **kwargs):
+        self.wait()
+        FigureCanvasTkAgg.scroll_event_windows(self, *args, **kwargs)
+
+    def key_press(self, *args, **kwargs):
+        self.wait()
+        FigureCanvasTkAgg.key_press(self, *args, **kwargs)
+
+    def resize(self, event):
+        self.wait()
+        FigureCanvasTkAgg.resize(self, event)
 
 
 class Plot(tk.Frame):
@@ -20,13 +116,26 @@ class Plot(tk.Frame):
         tk.Frame.__init__(self, master)
         self.init_fig()
         self.tmp_axes = []
+        # scatter plots with more points become density rasters
+        self.raster_points = density.RASTER_POINTS
+        # full series behind decimated lines and areas, drawn again from
+        # them for the current x limits
+        self.series = []
+        self.areas = []
+        self.decimating = None
+        # legend entries that hide and show their artists, the artists are
+        # drawn over a cached background instead of a full render
+        self.toggles = {}
+        self.background = None
+        self.canvas.on_rendered = self.rendered
+        self.canvas.mpl_connect('pick_event', self.pick)
 
     def init_fig(self):
         # create matplotlib plot
         self.fig = Figure(figsize=(5, 4), dpi=150)
         self.ax = self.fig.add_subplot(111)
 
-        canvas = FigureCanvasTkAgg(self.fig, self)
+        canvas = Canvas(self.fig, self)
         canvas.draw()
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
@@ -37,79 +146,188 @@ class Plot(tk.Frame):
         self.toolbar = toolbar
 
     def clear(self):
+        self.series = []
+        self.areas = []
+        self.toggles = {}
+        self.background = None
+        # the next plot draws, a render here would race the artists it adds
+        self.canvas.wait()
         self.fig.clf()
         self.ax = self.fig.add_subplot(111)
-        self.canvas.draw()
         self.toolbar.update()
 
+    # every method that changes the figure first waits for the render in
+    # flight, callers don't have to clear() before
+
     def switch_to_3d_ax(self):
+        from mpl_toolkits.mplot3d import Axes3D
+        self.canvas.wait()
         self.ax = Axes3D(self.fig, rect=[0, 0, .95, 1], elev=48, azim=134)
 
     def add_color_bar(self, mappable=None, label=""):
+        self.canvas.wait()
         if not mappable:
             mappable = self.ax
         cax = self.fig.add_axes([0.91, 0.11, 0.02, 0.77])
-        cbar = pylab.colorbar(ax=self.ax, cax=cax, mappable=mappable)
+        cbar = self.fig.colorbar(mappable, ax=self.ax, cax=cax)
         cbar.ax.tick_params(labelsize=5, pad=-2)
         cbar.set_label(label, rotation=270, labelpad=4, size=8)
 
     def plot_radviz(self, df, cls):
-        radviz(df, cls, ax=self.ax)
+        self.canvas.wait()
+        draw.radviz(self.ax, df, cls)
         self.canvas.draw()
 
     def plot_2d_scatter(self, X, y):
-        # plot first two columns
-        colors, labels = [], []
-        C = set(y)
-        for ci in C:
-            label = "Class " + str(ci)
-            if X.shape[1] > 1:
-                col1, col2 = X[y == ci, 0], X[y == ci, 1]
-            else:
-                col1 = X[y == ci, 0]
-                col2 = np.zeros(col1.shape)
-            col = self.ax.scatter(
-                col1, col2, label=label, alpha=0.5
-            )
-            colors.append(col)
-            labels.append(label)
-        self.ax.set_title('clusters')
-
-        # make nice plotting
-        self.ax.spines['top'].set_visible(False)
-        self.ax.spines['right'].set_visible(False)
-        self.ax.get_xaxis().tick_bottom()
-        self.ax.get_yaxis().tick_left()
-        self.ax.spines['left'].set_position(('outward', 10))
-        self.ax.spines['bottom'].set_position(('outward', 10))
-        self.ax.legend(
-            colors, labels, loc='best', labelspacing=0
-        )
+        self.canvas.wait()
+        draw.scatter_2d(self.ax, X, y, self.raster_points)
+        self.legend_toggles()
         self.canvas.draw()
 
-    def plot_profile(self, X, y, names):
-        # spilt the data into clusters by class label
-        clusters = {i: [] for i in set(y)}
-        for i in range(len(y)):
-            clusters[y[i]].append(i)
-        # choose subplot
-        # custom x ticks
-        x = [i for i in range(len(names))]
-        self.ax.set_xticks(x, names)
-        # rotate xticks
-        for label in self.ax.get_xmajorticklabels():
-            label.set_rotation(30)
-            label.set_horizontalalignment("right")
-            # Plot first center
-            # ax.plot(x,centers.tolist()[j],color='red')
-            # plot data points in a cluster
-            patches = []
-            colors = it.cycle(plt.cm.rainbow(np.linspace(0, 1, len(clusters))))
-            for cls, clr in zip(clusters, colors):
-                patches.append(mpatches.Patch(color=clr, label=cls))
-                for i in clusters[cls]:
-                    self.ax.plot(x, X[i], color=clr, alpha=0.02, linewidth=2.0)
-            # set ylabel and title
-            self.ax.set_title('profile for each individual')
-        self.ax.legend(handles=patches)
+    def plot_profile(self, X, y, names, mode='auto'):
+        self.canvas.wait()
+        draw.profile(self.ax, X, y, names, mode)
         self.canvas.draw()
+
+    def pixel_width(self):
+        return self.ax.get_window_extent().width
+
+    def plot_lines(self, columns, labels):
+        # every line keeps a min and a max per pixel, zooming decimates
+        # again from the full column
+        self.canvas.wait()
+        for values, label in zip(columns, labels):
+            line, = self.ax.plot([], [], label=label)
+            self.series.append((line, values))
+        n = max([len(values) for values in columns] + [1])
+        self.ax.set_xlim(0, n - 1)
+        self.decimate()
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        self.ax.legend(loc='best', labelspacing=0)
+        self.legend_toggles()
+        self.watch_xlim()
+
+    def plot_area(self, columns, labels):
+        # stacked like pandas, missing values count as 0
+        self.canvas.wait()
+        colors = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+        lower = 0
+        for i, (values, label) in enumerate(zip(columns, labels)):
+            upper = lower + np.nan_to_num(np.asarray(values, dtype='float64'))
+            self.areas.append([None, lower, upper, colors[i % len(colors)], label])
+            lower = upper
+        n = max([len(values) for values in columns] + [1])
+        self.ax.set_xlim(0, n - 1)
+        # fill_between updates the data limits itself, relim would skip it
+        self.decimate()
+        self.ax.autoscale_view(scalex=False)
+        self.ax.legend(loc='best', labelspacing=0)
+        self.legend_toggles()
+        self.watch_xlim()
+
+    def watch_xlim(self):
+        self.ax.callbacks.connect('xlim_changed', lambda ax: self.schedule_decimate())
+        self.canvas.draw()
+
+    def schedule_decimate(self):
+        # a pan fires many limit changes, they are decimated once
+        if self.decimating is None:
+            self.decimating = self.after_idle(self.redraw_decimated)
+
+    def redraw_decimated(self):
+        self.decimating = None
+        if self.series or self.areas:
+            self.decimate()
+            self.canvas.draw_idle()
+
+    def decimate(self):
+        self.canvas.wait()
+        width = self.pixel_width()
+        xlim = self.ax.get_xlim()
+        for line, values in self.series:
+            x, y = decimate.minmax(values, *decimate.window(len(values), xlim), width)
+            line.set_data(x, y)
+        for area in self.areas:
+            polygon, lower, upper, color, label = area
+            if polygon is not None:
+                polygon.remove()
+            lower = np.zeros(len(upper)) if np.isscalar(lower) else lower
+            x, low, high = decimate.envelope(lower, upper, *decimate.window(len(upper), xlim), width)
+            area[0] = self.ax.fill_between(x, low, high, color=color, label=label, alpha=0.5, linewidth=0)
+            self.retarget(polygon, area[0])
+
+    def retarget(self, old, new):
+        # a redrawn area replaces its old polygon behind the legend entry
+        for artists in self.toggles.values():
+            if old in artists:
+                artists[artists.index(old)] = new
+                new.set_visible(old.get_visible())
+                new.set_animated(old.get_animated())
+
+    def legend_toggles(self):
+        # legend entries are matched to the artists with the same label
+        self.canvas.wait()
+        self.toggles = {}
+        self.background = None
+        legend = self.ax.get_legend()
+        if legend is None:
+            return
+        children = self.ax.get_children()
+        handles = getattr(legend, 'legend_handles', None) or getattr(legend, 'legendHandles', [])
+        for handle, text in zip(handles, legend.get_texts()):
+            artists = [a for a in children if a.get_label() == text.get_text()]
+            if artists:
+                for entry in (handle, text):
+                    entry.set_picker(True)
+                    self.toggles[entry] = artists
+
+    def animated(self):
+        artists = []
+        for entry_artists in self.toggles.values():
+            artists += [a for a in entry_artists if a not in artists]
+        return artists + [self.ax.get_legend()]
+
+    def pick(self, event):
+        artists = self.toggles.get(event.artist)
+        if not artists:
+            return
+        self.canvas.wait()
+        visible = not artists[0].get_visible()
+        for artist in artists:
+            artist.set_visible(visible)
+        for entry, entry_artists in self.toggles.items():
+            if entry_artists is artists:
+                entry.set_alpha(1.0 if visible else 0.2)
+        if self.background is None:
+            # one full render without the toggled artists gives the
+            # background, every later toggle only blits
+            for artist in self.animated():
+                artist.set_animated(True)
+            self.canvas.draw()
+            return
+        self.blit_animated()
+
+    def rendered(self):
+        # a full render leaves the animated artists out, they are put back
+        # over the new background before it is shown
+        if not self.toggles or not self.ax.get_legend() or not self.ax.get_legend().get_animated():
+            self.background = None
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.animated():
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def blit_animated(self):
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.fig.bbox)
+
+    def destroy(self):
+        if self.decimating is not None:
+            self.after_cancel(self.decimating)
+        tk.Frame.destroy(self)
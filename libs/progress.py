@@ -0,0 +1,51 @@
+import tkinter as tk
+from libs.font import LABEL, SECTION
+
+
+class Progress():
+
+    def __init__(self, title, msg='', on_cancel=None):
+        self.on_cancel = on_cancel
+        pop_up_win = tk.Toplevel()
+        pop_up_win.wm_title(title)
+        pop_up_win.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        label_title = tk.Label(
+            pop_up_win, text=title,
+            font=SECTION, bg='#F3F3F3', padx=20, pady=10
+        )
+        label_title.grid(row=0, column=0)
+        label = tk.Label(
+            pop_up_win, text=msg, width=40,
+            font=LABEL, bg='#F3F3F3', padx=20, pady=10
+        )
+        label.grid(row=1, column=0)
+        btn = tk.Button(
+            pop_up_win, text="cancel", command=self.cancel,
+            highlightbackground='#F3F3F3'
+        )
+        btn.grid(row=2, column=0, pady=10)
+        self.label = label
+        self.pop_up_win = pop_up_win
+
+    def update(self, msg):
+        if self.pop_up_win:
+            self.label.config(text=msg)
+
+    def cancel(self):
+        if self.on_cancel:
+            self.on_cancel()
+        self.close()
+
+    def close(self):
+        if self.pop_up_win:
+            self.pop_up_win.destroy()
+            self.pop_up_win = None
+
+
+def format_bytes(n):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(n) < 1024:
+            return '%.1f %s' % (n, unit)
+        n /= 1024
+    return '%.1f TB' % n
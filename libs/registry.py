@@ -0,0 +1,173 @@
+import os
+import shutil
+import hashlib
+from collections import OrderedDict
+from libs import sidecar, colstats
+from libs.ooc import is_out_of_core, check
+from libs.alert import Alert
+
+SPILL_DIR = os.path.join(os.path.dirname(sidecar.CACHE_DIR), 'spill')
+DEFAULT_BUDGET = int(os.environ.get('SCIENTIST_MEMORY_BUDGET', 2048)) * 1024 ** 2
+
+
+def frame_state(df):
+    # pages change frames in place and bump the changed columns, a frame
+    # with the same shape and versions has the same contents and size
+    return df.shape, tuple(df.columns), tuple(colstats.version(df, c) for c in df.columns)
+
+
+class Dataset():
+
+    def __init__(self, name, df):
+        self.name = name
+        self.df = df
+        self.nbytes = 0
+        self.state = None
+        self.spill_path = None
+        self.spill_job = None
+        self.measure()
+
+    @property
+    def resident(self):
+        return self.df is not None
+
+    @property
+    def spilling(self):
+        return self.spill_job is not None and not self.spill_job.cancelled.is_set()
+
+    def frame_state(self):
+        return frame_state(self.df)
+
+    def measure(self):
+        if is_out_of_core(self.df):
+            # only the manifest is in memory
+            self.nbytes = 0
+        elif self.df is not None:
+            state = self.frame_state()
+            # deep sizes walk every string, only changed frames are measured
+            if state != self.state:
+                self.nbytes = int(self.df.memory_usage(deep=True).sum())
+                self.state = state
+        return self.nbytes
+
+
+class DatasetRegistry():
+    # imported frames in least recently used order, the ones at the front
+    # are written to disk when the resident total goes over the budget.
+    # with a job executor the frames are written in the background and
+    # dropped from memory once they are on disk
+
+    def __init__(self, budget=DEFAULT_BUDGET, spill_dir=SPILL_DIR, jobs=None):
+        self.budget = budget
+        self.spill_dir = spill_dir
+        self.jobs = jobs
+        self.datasets = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self.datasets
+
+    def __iter__(self):
+        return iter(self.datasets.values())
+
+    def current(self):
+        return next(reversed(self.datasets.values()), None)
+
+    def leave_current(self):
+        # only the current frame is changed by the pages, it is measured
+        # again when another one takes its place
+        dataset = self.current()
+        if dataset is not None:
+            dataset.measure()
+
+    def add(self, name, df):
+        self.leave_current()
+        if name in self.datasets:
+            # a reused name replaces the old frame and its spilled copy
+            self.remove(name)
+        self.datasets[name] = Dataset(name, df)
+        self.evict()
+
+    def get(self, name):
+        dataset = self.datasets[name]
+        if dataset is not self.current():
+            self.leave_current()
+        self.datasets.move_to_end(name)
+        if not dataset.resident:
+            dataset.df = sidecar.read_columns(dataset.spill_path)
+            dataset.state = None
+            dataset.measure()
+        self.evict()
+        return dataset.df
+
+    def remove(self, name):
+        dataset = self.datasets.pop(name)
+        if dataset.spill_path and os.path.exists(dataset.spill_path):
+            shutil.rmtree(dataset.spill_path)
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.evict()
+
+    def resident_bytes(self):
+        return sum(d.nbytes for d in self.datasets.values() if d.resident)
+
+    def evict(self):
+        # frames already being written count as gone
+        total = sum(d.nbytes for d in self.datasets.values() if d.resident and not d.spilling)
+        # the most recently used one is the current frame, never spill it
+        candidates = list(self.datasets.values())[:-1]
+        for dataset in candidates:
+            if total <= self.budget:
+                break
+            if dataset.resident and not dataset.spilling and not is_out_of_core(dataset.df):
+                total -= dataset.nbytes
+                self.spill(dataset)
+
+    def spill(self, dataset):
+        digest = hashlib.sha1(dataset.name.encode('utf-8')).hexdigest()
+        path = os.path.join(self.spill_dir, digest)
+        if self.jobs is None:
+            self.write_spill(dataset.df, path)
+            self.finish_spill(dataset, path, dataset.frame_state())
+            return
+        df, state = dataset.df, dataset.frame_state()
+        dataset.spill_job = self.jobs.submit(
+            'spill ' + os.path.basename(dataset.name),
+            lambda job: self.write_spill(df, path, job),
+            on_done=lambda _: self.finish_spill(dataset, path, state),
+            on_error=lambda e: self.spill_failed(dataset, e),
+            key=('spill', dataset.name)
+        )
+
+    @staticmethod
+    def write_spill(df, path, job=None):
+        check(job, 'writing columns')
+        sidecar.write_columns(df, path)
+
+    def finish_spill(self, dataset, path, state):
+        dataset.spill_job = None
+        if self.datasets.get(dataset.name) is not dataset:
+            # removed while it was written, unless a frame of the same name
+            # took its place and spilled there since
+            replaced = self.datasets.get(dataset.name)
+            if replaced is None or replaced.spill_path != path:
+                shutil.rmtree(path, ignore_errors=True)
+            return
+        if not dataset.resident:
+            return
+        # a frame that was selected or changed while it was written stays
+        if dataset is self.current() or dataset.frame_state() != state:
+            return
+        dataset.spill_path = path
+        dataset.df = None
+
+    def spill_failed(self, dataset, e):
+        # the frame stays in memory
+        dataset.spill_job = None
+        Alert().warn('could not write %s to disk: %s' % (dataset.name, e))
+
+    def close(self):
+        for dataset in self.datasets.values():
+            if dataset.spill_path and os.path.exists(dataset.spill_path):
+                shutil.rmtree(dataset.spill_path)
+        self.datasets.clear()
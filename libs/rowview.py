@@ -0,0 +1,152 @@
+from collections import OrderedDict
+import numpy as np
+from libs.colstats import column_key
+
+OPS = ['==', '!=', '<', '<=', '>', '>=', 'contains', 'is null', 'not null']
+# argsorts and masks kept, the least recently used ones go first
+MAX_ORDERS = 8
+MAX_MASKS = 16
+
+
+class RowView():
+    # the sort and the filters of the data view, kept as positions into the
+    # frame so paging takes rows straight from it and nothing is copied.
+    # argsorts and masks are cached, sorting a column again is instant.
+    # a shuffle is a seeded permutation, the same seed shows the same rows,
+    # only the permutation of the current seed is kept.
+    # the caches are keyed by column versions and outlive a reload
+
+    def __init__(self, df):
+        self.df = df
+        self.sort = None
+        self.seed = None
+        self.filters = []
+        self.orders = OrderedDict()
+        self.masks = OrderedDict()
+        self.shuffled = (None, None)
+
+    def set_sort(self, column, ascending=True):
+        self.sort = (column, ascending) if column is not None else None
+        self.seed = None
+        self.shuffled = (None, None)
+
+    def shuffle(self, seed=None):
+        # a sort and a shuffle replace each other, the seed is kept to
+        # show the same order again
+        if seed is None:
+            seed = np.random.randint(2 ** 31 - 1)
+        self.seed = seed
+        self.sort = None
+        return seed
+
+    def toggle_sort(self, column):
+        # ascending, descending, then back to the frame's order
+        if self.sort is None or self.sort[0] != column:
+            self.set_sort(column, True)
+        elif self.sort[1]:
+            self.set_sort(column, False)
+        else:
+            self.set_sort(None)
+
+    def add_filter(self, column, op, value=''):
+        if op not in OPS:
+            raise ValueError('unknown filter: %s' % op)
+        self.filters.append((column, op, value))
+
+    def clear_filters(self):
+        self.filters = []
+
+    def prune(self):
+        # a sort or filter of a dropped column is gone
+        columns = set(self.df.columns)
+        if self.sort is not None and self.sort[0] not in columns:
+            self.sort = None
+        self.filters = [f for f in self.filters if f[0] in columns]
+
+    def argsort(self, column, ascending):
+        key = (column, ascending, column_key(self.df, column))
+        if key not in self.orders:
+            self.orders = self.current(self.orders, column, key[-1])
+            # stable, missing values last in both directions
+            col = self.df[column].reset_index(drop=True)
+            order = col.sort_values(ascending=ascending, kind='mergesort', na_position='last').index.values
+            self.remember(self.orders, key, order, MAX_ORDERS)
+        self.orders.move_to_end(key)
+        return self.orders[key]
+
+    @staticmethod
+    def current(cache, column, version):
+        # results of older versions of the column are dropped
+        return OrderedDict((k, v) for k, v in cache.items() if k[0] != column or k[-1] == version)
+
+    @staticmethod
+    def remember(cache, key, value, size):
+        cache[key] = value
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+    def permutation(self, seed):
+        key = (seed, len(self.df))
+        if self.shuffled[0] != key:
+            self.shuffled = (key, np.random.RandomState(seed).permutation(len(self.df)))
+        return self.shuffled[1]
+
+    def mask(self, column, op, value):
+        key = (column, op, value, column_key(self.df, column))
+        if key not in self.masks:
+            self.masks = self.current(self.masks, column, key[-1])
+            col = self.df[column]
+            if op == 'is null':
+                mask = col.isnull().values
+            elif op == 'not null':
+                mask = col.notnull().values
+            elif op == 'contains':
+                mask = col.astype(str).str.contains(value, regex=False).values
+            else:
+                mask = self.compare(col, op, value)
+            self.remember(self.masks, key, np.asarray(mask, dtype=bool), MAX_MASKS)
+        self.masks.move_to_end(key)
+        return self.masks[key]
+
+    @staticmethod
+    def compare(col, op, value):
+        if col.dtype.kind in 'iufb':
+            value = float(value)
+        else:
+            col = col.astype(str)
+        if op == '==':
+            return (col == value).values
+        elif op == '!=':
+            return (col != value).values
+        elif op == '<':
+            return (col < value).values
+        elif op == '<=':
+            return (col <= value).values
+        elif op == '>':
+            return (col > value).values
+        return (col >= value).values
+
+    def rows(self):
+        # positions of the rows to show in order, None for the whole frame
+        mask = None
+        for column, op, value in self.filters:
+            m = self.mask(column, op, value)
+            mask = m if mask is None else mask & m
+        order = None
+        if self.sort is not None:
+            order = self.argsort(*self.sort)
+        elif self.seed is not None:
+            order = self.permutation(self.seed)
+        if order is not None:
+            return order if mask is None else order[mask[order]]
+        if mask is not None:
+            return np.flatnonzero(mask)
+        return None
+
+    def describe(self):
+        parts = ['%s %s %s' % f for f in self.filters]
+        if self.sort is not None:
+            parts.append('sorted by %s %s' % (self.sort[0], 'ascending' if self.sort[1] else 'descending'))
+        if self.seed is not None:
+            parts.append('shuffled with seed %d' % self.seed)
+        return ', '.join(parts)
@@ -0,0 +1,183 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.environ.get(
+    'SCIENTIST_CACHE', os.path.join(os.path.expanduser('~'), '.scientist', 'cache')
+)
+VERSION = 1
+# the least recently used sidecars are removed above this size
+CACHE_LIMIT = int(os.environ.get('SCIENTIST_CACHE_LIMIT', 10240)) * 1024 ** 2
+
+
+def file_key(filename):
+    stat = os.stat(filename)
+    return {
+        'path': os.path.abspath(filename),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns
+    }
+
+
+def sidecar_dir(filename):
+    digest = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, digest)
+
+
+def write_columns(df, path, meta=None, job=None):
+    # one .npy file per column, written to a temp dir and moved in place
+    # so a half written cache is never picked up
+    from libs.ooc import check
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    columns = []
+    for i, name in enumerate(df.columns):
+        check(job, 'column %d / %d' % (i + 1, df.shape[1]))
+        col = df[name]
+        entry = {'name': name, 'file': '%d.npy' % i, 'kind': 'array'}
+        if str(col.dtype) == 'category':
+            entry['kind'] = 'category'
+            entry['categories'] = '%d.cat.npy' % i
+            np.save(os.path.join(tmp, entry['file']), np.asarray(col.cat.codes))
+            np.save(os.path.join(tmp, entry['categories']),
+                    np.asarray(col.cat.categories, dtype=object), allow_pickle=True)
+        elif isinstance(col.dtype, np.dtype) and col.dtype.kind in 'biufcmM':
+            np.save(os.path.join(tmp, entry['file']), col.values)
+        else:
+            # strings and mixed columns can't be memory-mapped
+            entry['kind'] = 'object'
+            np.save(os.path.join(tmp, entry['file']),
+                    np.asarray(col.values, dtype=object), allow_pickle=True)
+        columns.append(entry)
+    index = None
+    if not df.index.equals(pd.RangeIndex(df.shape[0])):
+        # rows were dropped or sampled, keep the labels
+        index = 'index.npy'
+        np.save(os.path.join(tmp, index), np.asarray(df.index), allow_pickle=True)
+    meta = dict(meta or {})
+    meta.update({
+        'version': VERSION, 'rows': df.shape[0], 'index': index,
+        'columns': columns
+    })
+    with open(os.path.join(tmp, 'meta.json'), 'w') as fout:
+        json.dump(meta, fout)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.rename(tmp, path)
+
+
+def read_columns(path, columns=None, rows=None, objects=None):
+    # rows is a (start, stop) range, the mapped columns are sliced before
+    # the frame is built so only those rows are copied. pickled columns
+    # can't be mapped and are loaded whole, objects is an optional dict
+    # that keeps them for the next read of the same folder
+    with open(os.path.join(path, 'meta.json'), 'r') as fin:
+        meta = json.load(fin)
+    if meta.get('version') != VERSION:
+        return None
+    if columns is not None:
+        # only the requested columns are read, in the requested order
+        entries = {entry['name']: entry for entry in meta['columns']}
+        meta['columns'] = [entries[name] for name in columns]
+    start, stop = rows if rows is not None else (0, meta['rows'])
+    start, stop = max(start, 0), min(stop, meta['rows'])
+    stop = max(stop, start)
+    data = {}
+    for entry in meta['columns']:
+        filename = os.path.join(path, entry['file'])
+        if entry['kind'] == 'object':
+            if objects is None:
+                values = np.load(filename, allow_pickle=True)
+            else:
+                if filename not in objects:
+                    objects[filename] = np.load(filename, allow_pickle=True)
+                values = objects[filename]
+            data[entry['name']] = values[start: stop]
+            continue
+        values = np.load(filename, mmap_mode='r')[start: stop]
+        if entry['kind'] == 'category':
+            categories = np.load(
+                os.path.join(path, entry['categories']), allow_pickle=True
+            )
+            values = pd.Categorical.from_codes(values, categories)
+        data[entry['name']] = values
+    names = [entry['name'] for entry in meta['columns']]
+    if meta.get('index'):
+        index = pd.Index(np.load(os.path.join(path, meta['index']), allow_pickle=True)[start: stop])
+    else:
+        index = pd.RangeIndex(start, stop)
+    # the constructor copies the mapped pages into the frame's own blocks,
+    # so the result is writable and doesn't hold the files open
+    return pd.DataFrame(data, columns=names, index=index)
+
+
+def load(filename, compact=False):
+    # a cache of narrowed dtypes only serves compact loads, a compact load
+    # narrows a plain cache itself
+    path = sidecar_dir(filename)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        return None
+    try:
+        with open(os.path.join(path, 'meta.json'), 'r') as fin:
+            meta = json.load(fin)
+        if meta.get('key') != file_key(filename):
+            # stale, the csv changed since the sidecar was written
+            return None
+        if meta.get('compact', False) and not compact:
+            return None
+        # the modification time of meta.json is the last use
+        os.utime(os.path.join(path, 'meta.json'))
+        return read_columns(path)
+    except Exception:
+        # a broken cache (bad json, truncated or unpicklable columns) is
+        # dropped and the csv is parsed again
+        discard(path)
+        return None
+
+
+def save(filename, df, compact=False, job=None, limit=CACHE_LIMIT):
+    path = sidecar_dir(filename)
+    try:
+        key = file_key(filename)
+        write_columns(df, path, {'key': key, 'compact': compact}, job)
+    except Exception:
+        # the cache is only an optimization, never fail an import for it,
+        # e.g. column names json can't hold or columns that can't be pickled
+        discard(path)
+        return
+    trim(limit, keep=path)
+
+
+def folder_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def trim(limit=CACHE_LIMIT, keep=None):
+    # the least recently used sidecars go until the cache fits the limit,
+    # the one just written stays
+    entries = []
+    for name in os.listdir(CACHE_DIR) if os.path.isdir(CACHE_DIR) else []:
+        path = os.path.join(CACHE_DIR, name)
+        meta = os.path.join(path, 'meta.json')
+        if os.path.exists(meta):
+            entries.append((os.path.getmtime(meta), path, folder_size(path)))
+    total = sum(size for _, _, size in entries)
+    for _, path, size in sorted(entries):
+        if total <= limit:
+            break
+        if path != keep:
+            discard(path)
+            total -= size
+
+
+def discard(path):
+    for folder in (path, path + '.tmp'):
+        shutil.rmtree(folder, ignore_errors=True)
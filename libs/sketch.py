@@ -0,0 +1,85 @@
+import numpy as np
+
+# items kept on the top level, the rank error shrinks about like 1 / K
+K = 200
+
+
+def rank_error(k=K):
+    # normalized rank error of a kll sketch with 99% confidence, the fit
+    # published with the apache datasketches kll implementation
+    return 2.296 / k ** 0.9723
+
+
+class KLL():
+    # a kll quantile sketch. level h holds items that stand for 2 ** h
+    # values, a full level is sorted and every other item moves up, so the
+    # sketch keeps O(k) items for any number of values. two sketches merge
+    # level by level, chunks can be sketched apart and merged later
+
+    def __init__(self, k=K, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.RandomState(seed)
+
+    def capacity(self, h):
+        # levels shrink by 2/3 going down from the top one
+        depth = len(self.levels) - h - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def add(self, h, values):
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0))
+        self.levels[h] = np.concatenate([self.levels[h], values])
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        # a batch far bigger than a level is sorted once and halved until
+        # it fits instead of going through compress level by level. the odd
+        # item of a halving stays on its level so no weight is lost
+        values = np.sort(values)
+        h = 0
+        while len(values) > self.k:
+            odd = len(values) % 2
+            if odd:
+                self.add(h, values[:1])
+            values = values[odd:][self.rng.randint(2)::2]
+            h += 1
+        self.add(h, values)
+        self.compress()
+
+    def merge(self, other):
+        for h, level in enumerate(other.levels):
+            self.add(h, level)
+        self.compress()
+        return self
+
+    def compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.capacity(h):
+                # an odd item stays so no weight is lost
+                level = np.sort(level)
+                odd = len(level) % 2
+                self.levels[h] = level[:odd]
+                self.add(h + 1, level[odd:][self.rng.randint(2)::2])
+            h += 1
+
+    def weights(self):
+        return np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+
+    def __len__(self):
+        # the number of values the sketch stands for
+        return int(self.weights().sum())
+
+    def quantile(self, q):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.nan
+        order = np.argsort(items, kind='mergesort')
+        items, cumulative = items[order], np.cumsum(self.weights()[order])
+        i = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return items[min(i, len(items) - 1)]
@@ -1,9 +1,25 @@
 import tkinter as tk
+from tkinter import font as tkfont
+from collections import OrderedDict
 import numpy as np
-import pandas as pd
 import decimal
 BOLD = 'Helvetica 14 bold'
 FONT = 'Helvetica 14'
+NAN_COLOR = '#E83015'
+# pixel sizes of the drawn cells
+ROW_HEIGHT = 32
+PAD_X = 6
+MAX_COL_WIDTH = 320
+# longer cell texts are cut so they stay inside their column
+MAX_CHARS = 36
+# the most a table asks for, bigger pages scroll
+MAX_WIDTH = 1200
+MAX_HEIGHT = 800
+PAGE_SIZE = 100
+# formatted pages kept per table, the pages next to the shown one are
+# formatted ahead while the ui is idle
+CACHED_PAGES = 8
+PREFETCH_PAGES = 1
 
 
 class AutoScrollbar(tk.Scrollbar):
@@ -24,131 +40,397 @@ class AutoScrollbar(tk.Scrollbar):
         raise tk.TclError
 
 
-class InnerTable(tk.Frame):
+def format_cell(value):
+    number = str(value)
+    if number.replace('.', '').replace('-', '').isdecimal(
+    ) and decimal.Decimal(number).as_tuple().exponent < -4:
+        # round number to 4 decimal places
+        number = str(round(float(number), 4))
+    return number
 
-    def __init__(self, master, dataframe):
-        tk.Frame.__init__(self, master)
-        self.master = master
+
+def format_column(values):
+    # the strings of a whole column at once, same as format_cell
+    kind = values.dtype.kind if isinstance(values, np.ndarray) else 'O'
+    if kind == 'f':
+        if values.dtype.itemsize < 8:
+            # float32 is formatted like float64, from the shortest decimal
+            # of each value so 0.1 doesn't become 0.10000000149
+            values = values.astype(str).astype('float64')
+        cells = np.round(values, 4).astype(str)
+        # scientific notation isn't rounded, 1e-05 stays 1e-05
+        with np.errstate(invalid='ignore'):
+            keep = ((values != 0) & (np.abs(values) < 1e-4)) | (np.abs(values) >= 1e16)
+        if keep.any():
+            cells[keep] = values[keep].astype(str)
+        return cells.astype(object)
+    if kind in 'iub':
+        return values.astype(str).astype(object)
+    return np.array([format_cell(v) for v in values], dtype=object)
+
+
+def column_values(col):
+    # categoricals and extension arrays are formatted as objects
+    values = col.values
+    return values if isinstance(values, np.ndarray) else np.asarray(values, dtype=object)
+
+
+def clip(text):
+    return text if len(text) <= MAX_CHARS else text[:MAX_CHARS - 1] + '\u2026'
+
+
+class Pages():
+    # fixed size pages, each one is a positional slice taken when it is
+    # shown, so no page exists before it is needed. with an order the
+    # slice is taken from its positions, a sorted or filtered page costs
+    # the same as a plain one
+
+    def __init__(self, data, size, order=None):
+        self.data = data
+        self.size = size
+        self.order = order
+
+    def __len__(self):
+        return max(-(-self.rows() // self.size), 1)
+
+    def rows(self):
+        return len(self.data) if self.order is None else len(self.order)
+
+    @property
+    def on_disk(self):
+        # out-of-core data reads the rows of a page from disk
+        return hasattr(self.data, 'slice')
+
+    def __getitem__(self, i):
+        start, stop = i * self.size, (i + 1) * self.size
+        if self.order is not None:
+            return self.data.iloc[self.order[start: stop]]
+        if self.on_disk:
+            return self.data.slice(start, stop)
+        return self.data.iloc[start: stop]
+
+
+class PageView():
+    # one page of the table, its columns are formatted and measured the
+    # first time they are scrolled into view
+
+    def __init__(self, dataframe, measure):
         self.dataframe = dataframe
-        num_of_rows, self.num_of_cols = dataframe.shape
-        self.start_idx = 0
-        self.current_view_id = 0
-        self.next_view_id = 1 if num_of_rows > 100 else 0
-        self.num_of_rows = min(num_of_rows, 100)
-        self.create_view()
-
-    def create_view(self):
-        # create body
-        df = self.dataframe[self.start_idx: self.start_idx + 100]
-        data = df.values
-        header = df.columns.values
-        indices = df.index.values
-
-        # create header
-        for j in range(1, self.num_of_cols + 1):
-            cell = tk.Label(
-                self,
-                height=2,
-                padx=3,
-                text=header[j - 1],
-                font=BOLD
-            )
-            cell.grid(row=0, column=j)
-
-        # 0 for header
-        for i in range(1, self.num_of_rows + 1):
-            # show index
-            bg_color = '#FFFFFF' if i % 2 else '#F5F5F5'
-            cell = tk.Label(
-                self,
-                height=2,
-                padx=3,
-                text=str(indices[i - 1]),
-                bg=bg_color,
-                font=BOLD
-            )
-            cell.grid(row=i, column=0)
-            for j in range(1, self.num_of_cols + 1):
-                number = str(data[i-1, j-1])
-                if number.replace('.', '').replace('-', '').isdecimal(
-                ) and decimal.Decimal(number).as_tuple().exponent < -4:
-                    # round number to 4 decimal places
-                    number = str(round(float(number), 4))
-                # change color for nan value
-                if pd.isnull(data[i-1, j-1]):
-                    cur_bg_color = '#E83015'
-                else:
-                    cur_bg_color = bg_color
+        self.measure = measure
+        self.header = [str(c) for c in dataframe.columns]
+        self.index = np.array([str(v) for v in dataframe.index], dtype=object)
+        self.index_width = measure(self.index, '', True)
+        self.columns = {}
+
+    def __len__(self):
+        return self.index.shape[0]
 
-                cell = tk.Label(
-                    self,
-                    height=2,
-                    padx=3,
-                    text=number,
-                    bg=cur_bg_color,
-                    font=FONT
-                )
-                cell.grid(row=i, column=j)
+    def column(self, j):
+        if j not in self.columns:
+            col = self.dataframe.iloc[:, j]
+            cells = format_column(column_values(col))
+            self.columns[j] = (cells, col.isnull().values, self.measure(cells, self.header[j]))
+        return self.columns[j]
 
 
 class Table(tk.Frame):
+    # the header and the index are frozen on their own canvases, the body
+    # shows a window of columns starting at first_col and only the cells
+    # inside the visible part of it are drawn. order holds the positions
+    # of the rows to show, on_sort is called with the position of a
+    # clicked header and sort marks the sorted column
 
-    def __init__(self, master, dataframe, *args, **kw):
+    def __init__(self, master, dataframe, *args, order=None, on_sort=None, sort=None, **kw):
         tk.Frame.__init__(self, master, *args, **kw)
 
-        # create scrollbars
+        # create scrollbars, the horizontal one moves by whole columns
         vscrollbar = AutoScrollbar(self)
-        vscrollbar.grid(row=0, column=1, sticky=tk.N+tk.S)
+        vscrollbar.grid(row=1, column=2, sticky=tk.N+tk.S)
         hscrollbar = AutoScrollbar(self, orient=tk.HORIZONTAL)
-        hscrollbar.grid(row=1, column=0, sticky=tk.E+tk.W)
+        hscrollbar.grid(row=2, column=1, sticky=tk.E+tk.W)
 
-        # create a canvas to scroll on
+        # create the canvases
+        corner = tk.Canvas(self, bd=0, highlightthickness=0, bg='#F3F3F3', height=ROW_HEIGHT)
+        corner.grid(row=0, column=0, sticky=tk.N+tk.S+tk.E+tk.W)
+        header = tk.Canvas(self, bd=0, highlightthickness=0, bg='#F3F3F3', width=1, height=ROW_HEIGHT)
+        header.grid(row=0, column=1, sticky=tk.E+tk.W)
+        index = tk.Canvas(
+            self, bd=0, highlightthickness=0, bg='#FFFFFF', height=1, yscrollincrement=ROW_HEIGHT
+        )
+        index.grid(row=1, column=0, sticky=tk.N+tk.S)
         canvas = tk.Canvas(
-            self, bd=0, highlightthickness=0,
-            yscrollcommand=vscrollbar.set,
-            xscrollcommand=hscrollbar.set
+            self, bd=0, highlightthickness=0, bg='#FFFFFF',
+            yscrollcommand=vscrollbar.set, yscrollincrement=ROW_HEIGHT
         )
-        canvas.grid(row=0, column=0, sticky=tk.N+tk.S+tk.E+tk.W)
+        canvas.grid(row=1, column=1, sticky=tk.N+tk.S+tk.E+tk.W)
+
+        # which rows and columns are shown
+        status = tk.Label(self, text='', font=FONT, anchor=tk.W)
+        status.grid(row=3, column=0, columnspan=3, sticky=tk.E+tk.W)
 
         # reset the view
-        vscrollbar.config(command=canvas.yview)
-        hscrollbar.config(command=canvas.xview)
+        vscrollbar.config(command=self.yview)
+        hscrollbar.config(command=self.xview)
+        canvas.bind('<Configure>', lambda e: self.schedule_draw())
+        for widget in (canvas, index, header):
+            widget.bind('<MouseWheel>', lambda e: self.scroll(e, 'y'))
+            widget.bind('<Shift-MouseWheel>', lambda e: self.scroll(e, 'x'))
+            widget.bind('<Button-4>', lambda e: self.yview('scroll', -1, 'units'))
+            widget.bind('<Button-5>', lambda e: self.yview('scroll', 1, 'units'))
+        header.bind('<Button-1>', self.click_header)
 
-        # make the canvas expandable
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_columnconfigure(0, weight=1)
+        # make the body expandable
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(1, weight=1)
         self.canvas = canvas
+        self.header_canvas = header
+        self.index_canvas = index
+        self.corner = corner
+        self.hscrollbar = hscrollbar
+        self.status = status
+        self.font = tkfont.Font(font=FONT)
+        self.bold = tkfont.Font(font=BOLD)
+        self.drawing = None
+        self.prefetching = None
+        self.formatted = OrderedDict()
+        self.first_col = 0
+        self.last_col = 0
+        self.columns = []
+        self.on_sort = on_sort
+        self.sort = sort
 
         # create content
-        self.views = self.split_df(dataframe, 100)
+        self.n_cols = dataframe.shape[1]
+        self.views = Pages(dataframe, PAGE_SIZE, order)
+        self.frame_key = self.frame_state()
         self.current_view_id = 0
-        self.table = None
-        self.create_table(self.views[self.current_view_id])
+        self.create_table(self.current_view_id)
+
+    def frame_state(self):
+        # formatted pages of a frame that has since changed are dropped
+        return id(self.views.data), self.views.data.shape, self.views.rows()
+
+    def format(self, i):
+        # flipping back to a page takes it with its formatted columns from
+        # the cache
+        key = self.frame_state()
+        if key != self.frame_key:
+            self.formatted.clear()
+            self.frame_key = key
+        if i in self.formatted:
+            self.formatted.move_to_end(i)
+            return self.formatted[i]
+        page = PageView(self.views[i], self.measure)
+        self.formatted[i] = page
+        if len(self.formatted) > CACHED_PAGES:
+            self.formatted.popitem(last=False)
+        return page
+
+    def create_table(self, i):
+        page = self.format(i)
+        self.page = page
+        height = len(page) * ROW_HEIGHT
+        # ask for the width of the first columns only
+        width, j = 0, self.first_col
+        while j < self.n_cols and width < MAX_WIDTH:
+            width += page.column(j)[2]
+            j += 1
+        self.corner.config(width=page.index_width)
+        self.index_canvas.config(width=page.index_width, scrollregion=(0, 0, page.index_width, height))
+        self.canvas.config(
+            scrollregion=(0, 0, width, height),
+            width=min(width, MAX_WIDTH), height=min(height, MAX_HEIGHT)
+        )
+        self.canvas.yview_moveto(0)
+        self.index_canvas.yview_moveto(0)
+        self.draw()
+        self.schedule_prefetch()
 
-    def create_table(self, dataframe):
-        if self.table:
-            self.table.destroy()
-        inner_table = InnerTable(self.canvas, dataframe)
-        inner_table.grid(row=0, column=0, sticky=tk.N+tk.S+tk.E+tk.W)
+    def schedule_prefetch(self):
+        if self.prefetching is not None:
+            self.after_cancel(self.prefetching)
+        self.prefetching = self.after_idle(self.prefetch)
 
-        # put content on canvas
-        self.canvas.create_window(0, 0, anchor=tk.NW, window=inner_table)
-        inner_table.update_idletasks()
-        self.canvas.config(scrollregion=self.canvas.bbox("all"))
-        self.table = inner_table
+    def prefetch(self):
+        # one page per idle call so clicks in between are not held up, the
+        # shown page stays the most recent one in the cache
+        self.prefetching = None
+        if self.views.on_disk:
+            # pages of out-of-core data come from disk, reading them here
+            # would hold up the ui while it is idle
+            return
+        current = self.current_view_id
+        for step in range(1, PREFETCH_PAGES + 1):
+            for i in (current + step, current - step):
+                if 0 <= i < len(self.views) and i not in self.formatted:
+                    page = self.format(i)
+                    for j in range(self.first_col, self.last_col):
+                        page.column(j)
+                    if current in self.formatted:
+                        self.formatted.move_to_end(current)
+                    self.prefetching = self.after_idle(self.prefetch)
+                    return
+
+    def measure(self, column, header, bold=False):
+        # only the longest string of the column is measured
+        longest = ''
+        if len(column):
+            longest = clip(column[int(np.argmax([len(text) for text in column]))])
+        font = self.bold if bold else self.font
+        width = max(font.measure(longest), self.bold.measure(clip(header)))
+        return min(width + 2 * PAD_X, MAX_COL_WIDTH)
+
+    def view_size(self):
+        # the requested size until the body is mapped
+        canvas = self.canvas
+        if canvas.winfo_ismapped():
+            return canvas.winfo_width(), canvas.winfo_height()
+        return int(canvas.cget('width')), int(canvas.cget('height'))
+
+    def visible_columns(self):
+        # (column, x, width) of the columns that fit from first_col on
+        page = self.page
+        view_width, _ = self.view_size()
+        columns, x, j = [], 0, self.first_col
+        while j < self.n_cols and x < view_width:
+            width = page.column(j)[2]
+            columns.append((j, x, width))
+            x += width
+            j += 1
+        return columns
+
+    def draw(self):
+        self.drawing = None
+        page = self.page
+        body, header, index = self.canvas, self.header_canvas, self.index_canvas
+        for canvas in (body, header, index, self.corner):
+            canvas.delete('cell')
+        columns = self.visible_columns()
+        self.columns = columns
+        self.last_col = columns[-1][0] + 1 if columns else self.first_col
+        width = columns[-1][1] + columns[-1][2] if columns else 0
+        body.config(scrollregion=(0, 0, width, len(page) * ROW_HEIGHT))
+        top = body.canvasy(0)
+        bottom = body.canvasy(self.view_size()[1])
+        first_row = max(int(top // ROW_HEIGHT), 0)
+        last_row = min(int(bottom // ROW_HEIGHT) + 1, len(page))
+
+        # frozen header and index
+        self.draw_cell(self.corner, 0, 0, page.index_width, '', self.bold, '#F3F3F3')
+        for j, x, w in columns:
+            self.draw_cell(header, x, 0, w, self.header_text(j), self.bold, '#F3F3F3')
+        for i in range(first_row, last_row):
+            bg_color = '#F5F5F5' if i % 2 else '#FFFFFF'
+            self.draw_cell(index, 0, i * ROW_HEIGHT, page.index_width, page.index[i], self.bold, bg_color)
+        # body
+        for j, x, w in columns:
+            cells, nulls, _ = page.column(j)
+            for i in range(first_row, last_row):
+                # change color for nan value
+                if nulls[i]:
+                    bg_color = NAN_COLOR
+                else:
+                    bg_color = '#F5F5F5' if i % 2 else '#FFFFFF'
+                self.draw_cell(body, x, i * ROW_HEIGHT, w, cells[i], self.font, bg_color)
+
+        if self.n_cols:
+            self.hscrollbar.set(self.first_col / self.n_cols, self.last_col / self.n_cols)
+        else:
+            self.hscrollbar.set(0, 1)
+        self.update_status()
+
+    def header_text(self, j):
+        text = self.page.header[j]
+        if self.sort is not None and self.sort[0] == j:
+            # the arrow goes first so clipping never hides it
+            text = ('\u25B2 ' if self.sort[1] else '\u25BC ') + text
+        return text
+
+    def click_header(self, event):
+        if self.on_sort is None:
+            return
+        for j, x, w in self.columns:
+            if x <= event.x < x + w:
+                self.on_sort(j)
+                return
 
     @staticmethod
-    def split_df(df, chunk_size):
-        nrows = df.shape[0]
-        indices = range(1 * chunk_size, (nrows // chunk_size + 1) * chunk_size, chunk_size)  # noqa
-        return np.split(df, indices)
+    def draw_cell(canvas, x, y, width, text, font, bg):
+        canvas.create_rectangle(x, y, x + width, y + ROW_HEIGHT, fill=bg, outline='', tags='cell')
+        canvas.create_text(
+            x + width / 2, y + ROW_HEIGHT / 2, text=clip(text), font=font, tags='cell'
+        )
+
+    def update_status(self):
+        start = self.current_view_id * self.views.size
+        if len(self.views) > 1 or self.first_col > 0 or self.last_col < self.n_cols:
+            self.status.grid()
+        else:
+            self.status.grid_remove()
+        self.status.config(text='rows %d - %d of %d, columns %d - %d of %d, page %d of %d' % (
+            start, start + max(len(self.page) - 1, 0), self.views.rows(),
+            self.first_col, max(self.last_col - 1, 0), self.n_cols,
+            self.current_view_id + 1, len(self.views)
+        ))
+
+    def schedule_draw(self):
+        # many scroll events in a row are drawn once
+        if self.drawing is None:
+            self.drawing = self.after_idle(self.draw)
+
+    def xview(self, *args):
+        # moveto a fraction of the columns, or scroll by columns and pages
+        shown = max(self.last_col - self.first_col, 1)
+        if args[0] == 'moveto':
+            first = int(float(args[1]) * self.n_cols)
+        elif args[2] == 'pages':
+            first = self.first_col + int(args[1]) * shown
+        else:
+            first = self.first_col + int(args[1])
+        self.show_column(first)
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.index_canvas.yview_moveto(self.canvas.yview()[0])
+        self.schedule_draw()
+
+    def scroll(self, event, axis):
+        # windows reports multiples of 120, mac os reports single steps
+        step = -1 if event.delta > 0 else 1
+        if axis == 'y':
+            self.yview('scroll', step, 'units')
+        else:
+            self.xview('scroll', step, 'units')
+
+    def destroy(self):
+        if self.drawing is not None:
+            self.after_cancel(self.drawing)
+        if self.prefetching is not None:
+            self.after_cancel(self.prefetching)
+        tk.Frame.destroy(self)
+
+    def show_page(self, i):
+        self.current_view_id = min(max(i, 0), len(self.views) - 1)
+        self.create_table(self.current_view_id)
+
+    def show_row(self, row):
+        # positional row, its page is shown and scrolled to the row
+        row = min(max(row, 0), max(self.views.rows() - 1, 0))
+        self.show_page(row // self.views.size)
+        height = max(len(self.page), 1) * ROW_HEIGHT
+        self.yview('moveto', (row % self.views.size) * ROW_HEIGHT / height)
+
+    def show_column(self, column):
+        # a column name or position becomes the first one of the body
+        if not isinstance(column, int):
+            column = self.page.header.index(str(column))
+        self.first_col = min(max(column, 0), max(self.n_cols - 1, 0))
+        self.schedule_draw()
 
     def next_view(self):
         if self.current_view_id < len(self.views) - 1:
-            self.current_view_id += 1
-            self.create_table(self.views[self.current_view_id])
+            self.show_page(self.current_view_id + 1)
 
     def prev_view(self):
         if self.current_view_id > 0:
-            self.current_view_id -= 1
-            self.create_table(self.views[self.current_view_id])
+            self.show_page(self.current_view_id - 1)
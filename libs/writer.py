@@ -0,0 +1,125 @@
+import io
+import os
+import gzip
+import json
+import shutil
+import pandas as pd
+from libs import sidecar
+from libs.ooc import check, is_out_of_core
+from libs.progress import format_bytes
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 100000
+# file dialog choices, the format is picked from the extension
+FILETYPES = (
+    ("csv files", "*.csv"), ("gzip csv files", "*.csv.gz"),
+    ("zstd csv files", "*.csv.zst"), ("numpy columns", "*.cols")
+)
+
+
+def output_format(filename):
+    if filename.endswith('.cols'):
+        return 'columns'
+    if filename.endswith('.gz'):
+        return 'gzip'
+    if filename.endswith('.zst'):
+        return 'zstd'
+    return 'csv'
+
+
+def open_output(filename, fmt):
+    if fmt == 'gzip':
+        # level 6 is the usual speed/size trade off, 9 is several times slower
+        return gzip.open(filename, 'wt', compresslevel=6, newline='')
+    if fmt == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('install the zstandard package to save .zst files')
+        raw = open(filename, 'wb')
+        stream = zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return open(filename, 'w', newline='')
+
+
+def row_chunks(df, chunksize):
+    if is_out_of_core(df):
+        for _, chunk in df.iter_chunks():
+            yield chunk
+        return
+    for start in range(0, df.shape[0], chunksize):
+        yield df.iloc[start: start + chunksize]
+
+
+def write_csv(df, filename, fmt='csv', job=None, chunksize=CHUNK_SIZE):
+    # only one chunk of rows is formatted at a time, and the file is moved
+    # in place at the end so a cancelled save never leaves half a file
+    tmp = filename + '.tmp'
+    total, rows, header = len(df), 0, True
+    try:
+        with open_output(tmp, fmt) as fout:
+            for chunk in row_chunks(df, chunksize):
+                check(job, '%d / %d rows' % (rows, total))
+                chunk.to_csv(fout, header=header, index=False)
+                rows += chunk.shape[0]
+                header = False
+            if header:
+                pd.DataFrame(columns=df.columns).to_csv(fout, index=False)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, filename)
+    return rows
+
+
+def write_npy(df, path, job=None):
+    # the sidecar layout, one .npy file per column. out-of-core data is
+    # copied chunk by chunk together with its manifest
+    check(job, 'writing columns')
+    if not is_out_of_core(df):
+        sidecar.write_columns(df, path)
+        return df.shape[0]
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    try:
+        chunks = df.manifest['chunks']
+        for i, entry in enumerate(chunks):
+            check(job, 'chunk %d / %d' % (i + 1, len(chunks)))
+            shutil.copytree(os.path.join(df.path, entry['dir']), os.path.join(tmp, entry['dir']))
+        # the saved copy is not a working copy, rewrites never change it
+        manifest = {k: v for k, v in df.manifest.items() if k != 'working'}
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as fout:
+            json.dump(manifest, fout)
+    except BaseException:
+        shutil.rmtree(tmp)
+        raise
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.rename(tmp, path)
+    return len(df)
+
+
+def save(df, filename, job=None):
+    fmt = output_format(filename)
+    if fmt == 'columns':
+        rows = write_npy(df, filename, job)
+    else:
+        rows = write_csv(df, filename, fmt, job)
+    return rows, size_on_disk(filename)
+
+
+def size_on_disk(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def describe(filename, rows, size):
+    return 'saved %d rows to %s (%s)' % (rows, os.path.basename(filename), format_bytes(size))
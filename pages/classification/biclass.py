@@ -1,15 +1,10 @@
 import tkinter as tk
-import pandas as pd
-from sklearn.model_selection import train_test_split, cross_val_predict
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.linear_model import Perceptron, SGDClassifier, LogisticRegression
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from sklearn.metrics import confusion_matrix
 from libs.font import TITLE, LABEL
 from libs.button import Button
 from libs.select import Select
 from libs.table import Table
 from libs.alert import Alert
+from engine import classification
 
 
 class ClassificationBiclassPage(tk.Frame):
@@ -93,7 +88,7 @@ class ClassificationControlPane(tk.Frame):
         label_algo.grid(row=self.row, column=0, columnspan=6)
         self.row += 1
         chosen_algo = tk.StringVar(self)
-        algos = ['kNN', 'SGD', 'Logistic', 'Perceptron']
+        algos = classification.BICLASS
         chosen_algo.set(algos[0])
         algo_menu = tk.OptionMenu(self, chosen_algo, *algos)
         algo_menu.config(bg="#F3F3F3")
@@ -134,54 +129,36 @@ class ClassificationControlPane(tk.Frame):
         algo = self.chose_algo.get()
         self.X = self.df[feat_list].values
         self.y = self.df[self.chose_cls.get()].values
-        if len(set(self.y)) > 2:
+        try:
+            classification.check_binary(self.y)
+        except ValueError as e:
             alert = Alert()
-            alert.warn("target must be binary")
+            alert.warn(str(e))
             return
         self.hold_out()
         if algo == 'kNN':
+            # evaluated once k is entered
             self.knn_pop_up()
-        elif algo == 'SGD':
-            self.model = SGDClassifier(random_state=101)
-        elif algo == 'Logistic':
-            self.model = LogisticRegression(C=1., solver='lbfgs')
-        elif algo == 'Perceptron':
-            self.model = Perceptron(tol=1e-3, random_state=0)
+            return
+        self.model = classification.biclass_model(algo)
         self.evaluate()
 
     def hold_out(self):
         r = float(self.split_rate.get())
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(self.X, self.y, test_size=r, random_state=101, stratify=self.y)  # noqa
+        self.X_train, self.X_test, self.y_train, self.y_test = classification.hold_out(self.X, self.y, r)
 
     def evaluate(self):
-        # apply cross validation for training
         k = int(self.cv_k.get())
-        y_train_pred = cross_val_predict(self.model, self.X_train, self.y_train, cv=k)
-        self.model.fit(self.X_train, self.y_train)
-        y_test_pred = self.model.predict(self.X_test)
-        y_train_pred = self.model.predict(self.X_train)
-        y_test_pred = self.model.predict(self.X_test)
-        train_accuracy = accuracy_score(self.y_train, y_train_pred)
-        test_accuracy = accuracy_score(self.y_test, y_test_pred)
-        train_precision = precision_score(self.y_train, y_train_pred)
-        test_precision = precision_score(self.y_test, y_test_pred)
-        train_recall = recall_score(self.y_train, y_train_pred)
-        test_recall = recall_score(self.y_test, y_test_pred)
-        train_f1 = f1_score(self.y_train, y_train_pred)
-        test_f1 = f1_score(self.y_test, y_test_pred)
-        # create metric table
-        data = [
-            [train_accuracy, test_accuracy],
-            [train_precision, test_precision],
-            [train_recall, test_recall],
-            [train_f1, test_f1]
-        ]
-        index = ['accuracy', 'precision', 'recall', 'f1']
-        metrics = pd.DataFrame(data, index, ['train', 'test'])
-        self.controller.result_pane.metric_df = metrics
-        # create confusion matrix
-        self.controller.result_pane.train_conf_df = pd.DataFrame(confusion_matrix(self.y_train, y_train_pred))
-        self.controller.result_pane.test_conf_df = pd.DataFrame(confusion_matrix(self.y_test, y_test_pred))
+        model = self.model
+        split = (self.X_train, self.X_test, self.y_train, self.y_test)
+        self.controller.controller.jobs.submit(
+            'biclass', lambda job: classification.score_biclass(model, k, *split),
+            on_done=self.show_scores, key=('biclass', 'classify')
+        )
+
+    def show_scores(self, scores):
+        result_pane = self.controller.result_pane
+        result_pane.metric_df, result_pane.train_conf_df, result_pane.test_conf_df = scores
         self.controller.reload()
 
     def knn_pop_up(self):
@@ -202,8 +179,7 @@ class ClassificationControlPane(tk.Frame):
     def get_k(self):
         k = self.entry_k.get()
         if k:
-            params = {'n_neighbors': int(k)}
-            self.model = KNeighborsClassifier(**params)
+            self.model = classification.biclass_model('kNN', int(k))
             self.evaluate()
 
 
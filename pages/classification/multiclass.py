@@ -1,15 +1,9 @@
 import tkinter as tk
-import pandas as pd
-from sklearn.model_selection import train_test_split, cross_val_predict
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.naive_bayes import BernoulliNB
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-from sklearn.metrics import accuracy_score, confusion_matrix
 from libs.font import TITLE, LABEL
 from libs.button import Button
 from libs.select import Select
 from libs.table import Table
+from engine import classification
 
 
 class ClassificationMulticlassPage(tk.Frame):
@@ -93,7 +87,7 @@ class ClassificationControlPane(tk.Frame):
         label_algo.grid(row=self.row, column=0, columnspan=6)
         self.row += 1
         chosen_algo = tk.StringVar(self)
-        algos = ['kNN', 'Naive Bayes', 'Decision Tree', 'LDA']
+        algos = classification.MULTICLASS
         chosen_algo.set(algos[0])
         algo_menu = tk.OptionMenu(self, chosen_algo, *algos)
         algo_menu.config(bg="#F3F3F3")
@@ -135,31 +129,26 @@ class ClassificationControlPane(tk.Frame):
         self.X = self.df[feat_list].values
         self.y = self.df[self.chose_cls.get()].values
         self.hold_out()
-        if algo == 'kNN':
-            self.model = KNeighborsClassifier()
-        elif algo == 'Naive Bayes':
-            self.model = BernoulliNB()
-        elif algo == 'Decision Tree':
-            self.model = DecisionTreeClassifier()
-        elif algo == 'LDA':
-            self.model = LinearDiscriminantAnalysis()
+        self.model = classification.multiclass_model(algo)
         self.evaluate()
 
     def hold_out(self):
         r = float(self.split_rate.get())
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(self.X, self.y, test_size=r, random_state=101, stratify=self.y)  # noqa
+        self.X_train, self.X_test, self.y_train, self.y_test = classification.hold_out(self.X, self.y, r)
 
     def evaluate(self):
-        # apply cross validation for training
         k = int(self.cv_k.get())
-        y_train_pred = cross_val_predict(self.model, self.X_train, self.y_train, cv=k)
-        self.model.fit(self.X_train, self.y_train)
-        y_test_pred = self.model.predict(self.X_test)
-        train_accuracy = accuracy_score(self.y_train, y_train_pred)
-        test_accuracy = accuracy_score(self.y_test, y_test_pred)
-        # create confusion matrix
-        self.controller.result_pane.train_conf_df = pd.DataFrame(confusion_matrix(self.y_train, y_train_pred))
-        self.controller.result_pane.test_conf_df = pd.DataFrame(confusion_matrix(self.y_test, y_test_pred))
+        model = self.model
+        split = (self.X_train, self.X_test, self.y_train, self.y_test)
+        self.controller.controller.jobs.submit(
+            'multiclass', lambda job: classification.score_multiclass(model, k, *split),
+            on_done=self.show_scores, key=('multiclass', 'classify')
+        )
+
+    def show_scores(self, scores):
+        train_accuracy, test_accuracy, train_conf_df, test_conf_df = scores
+        self.controller.result_pane.train_conf_df = train_conf_df
+        self.controller.result_pane.test_conf_df = test_conf_df
         self.controller.reload()
         # update accuracy score
         self.controller.result_pane.label_train_accuracy['text'] += str(train_accuracy)  # noqa
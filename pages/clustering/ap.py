@@ -1,12 +1,11 @@
 import tkinter as tk
-import pandas as pd
-from sklearn.cluster import AffinityPropagation
 from libs.plot import Plot
 from libs.button import Button
 from libs.select import Select
 from libs.font import TITLE, SECTION, LABEL
 from pages.clustering.base import BaseClusteringPage
 from pages.clustering.base import BaseControlPane
+from engine import clustering
 
 
 class ClusteringApPage(BaseClusteringPage):
@@ -75,16 +74,14 @@ class ApControlPane(BaseControlPane):
         Button(self, "radviz", 0, 2, 2, lambda: self.plot_radvis())
         Button(self, "PCA", 0, 4, 2, lambda: self.plot_pca())
         Button(self, "profile", 1, 0, 2, lambda: self.plot_profile())
+        Button(self, "bands", 0, 2, 2, lambda: self.plot_profile('bands'))
         # clear plot
         Button(self, "clear", 1, 0, 6, lambda: self.clear())
 
     def run(self):
+        df = self.df
         feat_list = list(self.select.tags)
-        X = self.df[feat_list].values
-        model = AffinityPropagation(preference=-50)
-        model.fit(X)
-        self.df[self.entry_col_name.get()] = pd.Series(
-            model.labels_, index=self.df.index
-        )
-        # default is plotting first features
-        self.plot.plot_2d_scatter(X[:, :2], model.labels_)
+        X = df[feat_list].values
+        col_name = self.entry_col_name.get()
+        self.submit('affinity propagation', lambda job: clustering.ap(X),
+                    lambda labels: self.show_clusters(df, col_name, X, labels))
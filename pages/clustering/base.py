@@ -1,11 +1,12 @@
 import tkinter as tk
+import pandas as pd
 from abc import ABC, abstractmethod
-from sklearn.manifold import TSNE
-from sklearn.decomposition import PCA
 from libs.plot import Plot
 from libs.button import Button
 from libs.select import Select
 from libs.font import TITLE, SECTION, LABEL
+from libs import colstats
+from engine import clustering
 
 
 class BaseClusteringPage(tk.Frame, ABC):
@@ -127,7 +128,21 @@ class BaseControlPane(tk.Frame):
             fg='#A93E2F', padx=20, pady=20
         )
         label.grid(row=0, column=0)
-    
+
+    def submit(self, label, func, on_done):
+        # run func off the ui thread, on_done gets its result back on it
+        self.controller.controller.jobs.submit(
+            label, func, on_done=on_done,
+            on_error=lambda e: self.alert_pop_up(str(e)),
+            key=(self.__class__.__name__, label)
+        )
+
+    def show_clusters(self, df, col_name, X, labels):
+        df[col_name] = pd.Series(labels, index=df.index)
+        colstats.bump(df, [col_name])
+        # default is plotting first features
+        self.plot.plot_2d_scatter(X[:, :2], labels)
+
     @abstractmethod
     def run(self):
         pass
@@ -144,27 +159,31 @@ class BaseControlPane(tk.Frame):
         X = self.df[feat_list].values
         cls = self.entry_col_name.get()
         y = self.df[cls].values
-        X_embedded = TSNE().fit_transform(X)
-        self.plot.clear()
-        self.plot.plot_2d_scatter(X_embedded, y)
+        self.submit('t-SNE', lambda job: clustering.tsne(X),
+                    lambda X_embedded: self.plot_embedded(X_embedded, y))
 
     def plot_pca(self):
         feat_list = list(self.select.tags)
         X = self.df[feat_list].values
         cls = self.entry_col_name.get()
         y = self.df[cls].values
-        X_embedded = PCA(n_components=2).fit_transform(X)
+        self.submit('PCA', lambda job: clustering.pca(X),
+                    lambda X_embedded: self.plot_embedded(X_embedded, y))
+
+    def plot_embedded(self, X_embedded, y):
         self.plot.clear()
         self.plot.plot_2d_scatter(X_embedded, y)
 
-    def plot_profile(self):
+    def plot_profile(self, mode='auto'):
+        # a line per row, or percentile bands per cluster for many rows
         feat_list = list(self.select.tags)
         X = self.df[feat_list].values
         cls = self.entry_col_name.get()
         y = self.df[cls].values
         self.plot.clear()
-        self.plot.plot_profile(X, y, feat_list)
+        self.plot.plot_profile(X, y, feat_list, mode)
 
     def clear(self):
         self.select.clear()
         self.plot.clear()
+        self.plot.canvas.draw()
@@ -1,14 +1,13 @@
 import tkinter as tk
 import pandas as pd
-import pylab
-import matplotlib
-from scipy.cluster.hierarchy import dendrogram, linkage, fcluster
 from libs.plot import Plot
 from libs.button import Button
 from libs.select import Select
 from libs.font import TITLE, SECTION, LABEL
+from libs import colstats
 from pages.clustering.base import BaseClusteringPage
 from pages.clustering.base import BaseControlPane
+from engine import clustering, draw
 
 
 class ClusteringHierarchyPage(BaseClusteringPage):
@@ -132,59 +131,36 @@ class HierarchyControlPane(BaseControlPane):
         Button(self, "radviz", 0, 4, 2, lambda: self.plot_radvis())
         Button(self, "PCA", 1, 0, 2, lambda: self.plot_pca())
         Button(self, "profile", 0, 2, 2, lambda: self.plot_profile())
+        Button(self, "bands", 0, 4, 2, lambda: self.plot_profile('bands'))
         # clear plot
         Button(self, "clear", 1, 0, 6, lambda: self.clear())
 
     def run(self):
+        df = self.df
         feat_list = list(self.select.tags)
-        X = self.df[feat_list].values
+        X = df[feat_list].values
         k = int(self.entry_k.get())
         method = self.link.get()
         metric = self.dist.get()
-        # generate the linkage matrix
-        Z = linkage(X, method=method, metric=metric)
-        clusters = fcluster(Z, k, criterion='maxclust')
-        self.df[self.entry_col_name.get()] = pd.Series(
-            clusters, index=self.df.index
-        )
+        col_name = self.entry_col_name.get()
+        self.submit('hierarchy', lambda job: clustering.hierarchy(X, k, method, metric),
+                    lambda result: self.show_tree(df, col_name, X, *result))
+
+    def show_tree(self, df, col_name, X, Z, clusters):
+        df[col_name] = pd.Series(clusters, index=df.index)
+        colstats.bump(df, [col_name])
         self.X = X
         self.Z = Z
         self.plot_dendro()
 
     def plot_dendro(self):
         self.plot.clear()
-        # calculate full dendrogram# calcul
-        self.plot.ax.set_title('Hierarchical Clustering Dendrogram')
-        # plt.xlabel('sample index')
-        # plt.ylabel('distance')
-        matplotlib.rcParams['lines.linewidth'] = 0.5
-        dendrogram(self.Z, leaf_rotation=90.,  # rotates the x axis labels
-                   ax=self.plot.ax)
-        matplotlib.rcParams['lines.linewidth'] = 1.5
+        draw.dendrogram(self.plot.ax, self.Z)
         self.plot.canvas.draw()
 
     def plot_matrix(self):
         self.plot.clear()
-        fig = self.plot.fig
-        axdendro = fig.add_axes([0.1, 0.1, 0.2, 0.8])
-        matplotlib.rcParams['lines.linewidth'] = 0.3
-        dg = dendrogram(self.Z, orientation='left', ax=axdendro)
-        matplotlib.rcParams['lines.linewidth'] = 1.5
-        axdendro.set_xticks([])
-        axdendro.set_yticks([])
-
-        # Plot distance matrix.
-        axmatrix = fig.add_axes([0.3, 0.1, 0.6, 0.8])
-        index = dg['leaves']
-        D = self.X[index, :]
-        im = axmatrix.matshow(D, aspect='auto', origin='lower')
-        axmatrix.set_xticks([])
-        axmatrix.set_yticks([])
-
-        # Plot colorbar.
-        axcolor = fig.add_axes([0.91, 0.1, 0.02, 0.8])
-        pylab.colorbar(im, cax=axcolor)
-        self.axes = [axdendro, axmatrix, axcolor]
+        self.axes = draw.dendrogram_matrix(self.plot.fig, self.Z, self.X)
         self.plot.canvas.draw()
 
     def clear(self):
@@ -192,3 +168,4 @@ class HierarchyControlPane(BaseControlPane):
         self.plot.clear()
         for ax in self.axes:
             ax.remove()
+        self.plot.canvas.draw()
@@ -1,12 +1,11 @@
 import tkinter as tk
-import pandas as pd
-from sklearn.cluster import MiniBatchKMeans
 from libs.button import Button
 from libs.select import Select
 from libs.plot import Plot
 from libs.font import TITLE, SECTION, LABEL
 from pages.clustering.base import BaseClusteringPage
 from pages.clustering.base import BaseControlPane
+from engine import clustering
 
 
 class ClusteringKmeansPage(BaseClusteringPage):
@@ -84,21 +83,16 @@ class KmeansControlPane(BaseControlPane):
         Button(self, "radviz", 0, 2, 2, lambda: self.plot_radvis())
         Button(self, "PCA", 0, 4, 2, lambda: self.plot_pca())
         Button(self, "profile", 1, 0, 2, lambda: self.plot_profile())
+        Button(self, "bands", 0, 2, 2, lambda: self.plot_profile('bands'))
 
         # clear plot
         Button(self, "clear", 1, 0, 6, lambda: self.clear())
 
     def run(self):
+        df = self.df
         feat_list = list(self.select.tags)
-        X = self.df[feat_list].values
+        X = df[feat_list].values
         k = int(self.entry_k.get())
-        model = MiniBatchKMeans(
-            init='k-means++', n_clusters=k, batch_size=45,
-            n_init=10, max_no_improvement=10, verbose=0
-        )
-        model.fit(X)
-        self.df[self.entry_col_name.get()] = pd.Series(
-            model.labels_, index=self.df.index
-        )
-        # default is plotting first features
-        self.plot.plot_2d_scatter(X[:, :2], model.labels_)
+        col_name = self.entry_col_name.get()
+        self.submit('kmeans', lambda job: clustering.kmeans(X, k),
+                    lambda labels: self.show_clusters(df, col_name, X, labels))
@@ -2,9 +2,7 @@ import tkinter as tk
 import numpy as np
 import math
 from collections import Counter
-from scipy.stats import hypergeom
-import matplotlib.pyplot as plt
-from sklearn import preprocessing
+from matplotlib import cm, colors
 from libs.plot import Plot
 from libs.font import TITLE, SECTION, LABEL
 from libs.button import Button
@@ -122,7 +120,8 @@ class CoincidenceControlPane(tk.Frame):
         color = self.calc_color(y1, y2, x, y, z)
         x, y, xticks, yticks, xticklabels, yticklabels = self.get_ticks(x, y)
 
-        # use the scatter function to plot
+        # use the scatter function to plot, once the last render is done
+        self.plot.canvas.wait()
         ax = self.plot.ax
         ax.set_title('coincidence')
         ax.scatter(
@@ -142,13 +141,14 @@ class CoincidenceControlPane(tk.Frame):
         ax.set_xlabel(name1)
         ax.set_ylabel(name2)
         # create a mappable
-        color_bar = plt.cm.ScalarMappable(cmap="autumn", norm=plt.Normalize(vmin=0, vmax=1))
+        color_bar = cm.ScalarMappable(cmap="autumn", norm=colors.Normalize(vmin=0, vmax=1))
         color_bar._A = []
         self.plot.add_color_bar(color_bar, "scaled pvalues(-log)")
         self.plot.canvas.draw()
 
     @staticmethod
     def calc_size(size_count):
+        from sklearn import preprocessing
         size = size_count * size_count  # size is square of coincidence
         # rescale size
         scaler_size = preprocessing.MinMaxScaler()
@@ -158,6 +158,8 @@ class CoincidenceControlPane(tk.Frame):
 
     @staticmethod
     def calc_color(list1, list2, x, y, count):
+        from scipy.stats import hypergeom
+        from sklearn import preprocessing
         count = list(count)
         # count cluster size
         cnt1 = Counter(list1)
@@ -187,3 +189,4 @@ class CoincidenceControlPane(tk.Frame):
 
     def clear(self):
         self.plot.clear()
+        self.plot.canvas.draw()
@@ -1,10 +1,12 @@
 import tkinter as tk
-import pandas as pd
-from sklearn.preprocessing import LabelEncoder, LabelBinarizer
 from libs.table import Table
 from libs.font import SECTION, LABEL, TITLE
 from libs.button import Button
 from libs.select import Select
+from libs.alert import Alert
+from libs.ooc import is_out_of_core
+from libs import colstats
+from engine import preprocess
 
 
 class DataPreprocessPage(tk.Frame):
@@ -133,104 +135,155 @@ class PrepControlPane(tk.Frame):
         Button(self, "fill backward", 0, 2, 2, lambda: self.fill_backward())
         Button(self, "fill linear", 0, 4, 2, lambda: self.fill_linear())
 
+    # out-of-core data is rewritten chunk by chunk in the background
+    def run_chunked(self, label, func):
+        self.controller.controller.jobs.submit(
+            label, func, on_done=lambda _: self.controller.reload(),
+            key=('preprocess', label)
+        )
+
+    def changed(self, columns=None):
+        # new versions for the changed columns, None when rows changed, so
+        # cached statistics of the other columns stay valid
+        colstats.bump(self.df, columns)
+        self.controller.reload()
+
+    def in_memory(self):
+        if is_out_of_core(self.df):
+            Alert().warn('draw a sample first, this operation needs the data in memory')
+            self.controller.controller.ask_sample()
+            return False
+        return True
+
     def scale_01(self):
         df = self.df
-        for f in self.select.tags:
-            df[f] = (df[f] - df[f].min()) / (df[f].max() - df[f].min())
-        self.controller.reload()
+        if is_out_of_core(df):
+            tags = list(self.select.tags)
+            self.run_chunked('scale 0~1', lambda job: df.scale(tags, '01', job))
+            return
+        preprocess.scale_01(df, self.select.tags)
+        self.changed(self.select.tags)
 
     def scale_11(self):
         df = self.df
-        for f in self.select.tags:
-            df[f] = 2 * (df[f] - df[f].min()) / (df[f].max() - df[f].min()) - 1
-        self.controller.reload()
+        if is_out_of_core(df):
+            tags = list(self.select.tags)
+            self.run_chunked('scale -1~1', lambda job: df.scale(tags, '11', job))
+            return
+        preprocess.scale_11(df, self.select.tags)
+        self.changed(self.select.tags)
 
     def norm(self):
         df = self.df
-        for f in self.select.tags:
-            df[f] = (df[f] - df[f].mean()) / df[f].std()
-        self.controller.reload()
+        if is_out_of_core(df):
+            tags = list(self.select.tags)
+            self.run_chunked('scale norm', lambda job: df.scale(tags, 'norm', job))
+            return
+        preprocess.norm(df, self.select.tags)
+        self.changed(self.select.tags)
 
     def label_encoder(self):
-        encoder = LabelEncoder()
-        df = self.df
-        for f in self.select.tags:
-            new_col_name = f + '_label'
-            df[new_col_name] = encoder.fit_transform(df[f])
-            df[new_col_name].astype('int32')
-        self.controller.reload()
+        if not self.in_memory():
+            return
+        preprocess.label_encoder(self.df, self.select.tags)
+        self.changed([f + '_label' for f in self.select.tags])
 
     def q_encoder(self):
-        df = self.df
-        n = int(self.entry_nq.get())
-        for f in self.select.tags:
-            new_col_name = f + '_quantile'
-            df[new_col_name] = pd.qcut(df[f], n, labels=False)
-            df[new_col_name].astype('int32')
         self.pop_up_win.destroy()
-        self.controller.reload()
+        if not self.in_memory():
+            return
+        n = int(self.entry_nq.get())
+        preprocess.q_encoder(self.df, self.select.tags, n)
+        self.changed([f + '_quantile' for f in self.select.tags])
 
     def one_hot(self):
-        encoder = LabelBinarizer()
-        df = self.df
-        for f in self.select.tags:
-            data = encoder.fit_transform(df[f].values)
-            names = [f + '_' + c for c in encoder.classes_]
-            for i, n in enumerate(names):
-                df[n] = pd.DataFrame(data[:, i], columns=[n])
-            df.drop(columns=f, inplace=True)
-        self.controller.reload()
+        if not self.in_memory():
+            return
+        before = set(self.df.columns)
+        tags = list(self.select.tags)
+        preprocess.one_hot(self.df, tags)
+        self.changed(tags + [c for c in self.df.columns if c not in before])
 
     def sigma_encoder(self):
-        df = self.df
-        for f in self.select.tags:
-            new_col_name = f + '_sigma'
-            df[new_col_name] = (df[f] - df[f].mean()) / df[f].std()
-            df[new_col_name] = df[new_col_name].round()
-        self.controller.reload()
+        if not self.in_memory():
+            return
+        preprocess.sigma_encoder(self.df, self.select.tags)
+        self.changed([f + '_sigma' for f in self.select.tags])
 
     def drop_feature(self):
         df = self.df
-        df.drop(list(self.select.tags), inplace=True, axis=1)
-        self.controller.reload()
+        if is_out_of_core(df):
+            tags = list(self.select.tags)
+            self.run_chunked('drop features', lambda job: df.drop_columns(tags, job))
+            return
+        tags = list(self.select.tags)
+        preprocess.drop_features(df, tags)
+        self.changed(tags)
 
     def drop_index(self):
         df = self.df
         index = int(self.entry_index.get())
-        df.drop(index=index, inplace=True)
         self.pop_up_win.destroy()
-        self.controller.reload()
+        if not self.in_memory():
+            return
+        preprocess.drop_index(df, index)
+        self.changed()
 
     def sample(self):
         df = self.df
         nrows = int(self.entry_nrow.get())
-        new_df = df.sample(df.shape[0] - nrows)
-        df.drop(new_df.index, inplace=True)  # remove old rows
-        self.controller.reload()
+        if is_out_of_core(df):
+            # the sample is loaded as a new in-memory dataset
+            self.pop_up_win.destroy()
+            self.controller.controller.draw_sample(nrows)
+            return
+        preprocess.sample(df, nrows)
+        self.changed()
 
     def drop_na(self):
-        self.df.dropna(inplace=True)
-        self.controller.reload()
+        if is_out_of_core(self.df):
+            df = self.df
+            self.run_chunked('drop NAN', lambda job: df.dropna(job))
+            return
+        preprocess.drop_na(self.df)
+        self.changed()
 
     def fill_mean(self):
-        self.df.fillna(self.df.mean(), inplace=True)
-        self.controller.reload()
+        if is_out_of_core(self.df):
+            self.run_chunked('fill mean', self.df.fill_mean)
+            return
+        self.fill(preprocess.fill_mean)
 
     def fill_median(self):
-        self.df.fillna(self.df.median(), inplace=True)
-        self.controller.reload()
+        if is_out_of_core(self.df):
+            self.run_chunked('fill median', self.df.fill_median)
+            return
+        self.fill(preprocess.fill_median)
 
     def fill_forward(self):
-        self.df.fillna(self.df.ffill(), inplace=True)
-        self.controller.reload()
+        if is_out_of_core(self.df):
+            self.run_chunked('fill forward', self.df.ffill)
+            return
+        self.fill(preprocess.fill_forward)
 
     def fill_backward(self):
-        self.df.fillna(self.df.bfill(), inplace=True)
-        self.controller.reload()
+        if is_out_of_core(self.df):
+            self.run_chunked('fill backward', self.df.bfill)
+            return
+        self.fill(preprocess.fill_backward)
 
     def fill_linear(self):
-        self.df.fillna(self.df.interpolate(), inplace=True)
-        self.controller.reload()
+        if is_out_of_core(self.df):
+            self.run_chunked('fill linear', self.df.interpolate)
+            return
+        self.fill(preprocess.fill_linear)
+
+    def fill(self, step):
+        # only the columns with missing values change
+        df = self.df
+        columns = df.columns[df.isnull().any().values].tolist()
+        step(df)
+        self.changed(columns)
 
     def q_encode_pop_up(self):
         pop_up_win = tk.Toplevel()
@@ -1,11 +1,9 @@
 import tkinter as tk
-import numpy as np
-import pandas as pd
-import statsmodels.api as sm
 from libs.table import Table
 from libs.font import TITLE, SECTION, LABEL
 from libs.button import Button
 from libs.select import Select
+from engine import regression
 
 
 class RegressionGLMPage(tk.Frame):
@@ -89,7 +87,7 @@ class RegressionControlPane(tk.Frame):
         label_fam.grid(row=self.row, column=0, columnspan=6)
         self.row += 1
         chosen_fam = tk.StringVar(self)
-        choices_fam = ['Binomial', 'Gamma', 'Gaussian', 'InverseGaussian', 'NegativeBinomial', 'Poisson', 'Tweedie']
+        choices_fam = regression.FAMILIES
         chosen_fam.set(choices_fam[0])
         fam_menu = tk.OptionMenu(self, chosen_fam, *choices_fam)
         fam_menu.config(bg="#F3F3F3")
@@ -110,56 +108,15 @@ class RegressionControlPane(tk.Frame):
         self.X = self.df[feat_list].values
         self.y = self.df[self.chose_cls.get()].values
         fam = self.chose_fam.get()
-        self.model = sm.GLM(self.y, sm.add_constant(self.X), family=getattr(sm.families, fam)())
-        results = self.model.fit()
-        self.evaluate(results)
-
-    def evaluate(self, results):
-        stat_df = self.get_statistics(results)
-        coef_df = self.get_coefficients(results)
-        self.controller.result_pane.stat_df = stat_df
-        self.controller.result_pane.coef_df = coef_df
-        self.controller.reload()
+        X, y = self.X, self.y
+        self.controller.controller.jobs.submit(
+            'glm', lambda job: regression.glm(X, y, fam, feat_list),
+            on_done=self.show_results, key=('glm', 'regress')
+        )
 
-    def get_coefficients(self, results):
-        coefs = results.params
-        sde = results.bse
-        t_values = results.tvalues
-        p_values = results.pvalues
-        conf_int = results.conf_int().T
-        cfi_low = conf_int[0]
-        cfi_high = conf_int[1]
-
-        data = np.vstack((
-            np.array(['Intercept'] + list(self.select.tags)),
-            np.round(coefs, 4),
-            np.round(sde, 4),
-            np.round(t_values, 4),
-            p_values,
-            # np.round(p_values, 4),
-            np.round(cfi_low, 4),
-            np.round(cfi_high, 4)
-        ))
-        columns = ['Features', 'Coefficients', 'Std Errors', 'T Values', 'P Values', '[0.025', '0.975]']
-        return pd.DataFrame(data=data.T, columns=columns)
-
-    def get_statistics(self, results):
-        stat_names = [
-            'Df Model', 'Scale', 'Log-Likelihood', 'Deviance',
-            'Peareson chi2', 'AIC', 'BIC'
-        ]
-        values = [
-            np.round(results.df_model, 4),
-            np.round(results.scale, 4),
-            np.round(results.llf, 4),
-            np.round(results.deviance, 4),
-            np.round(results.pearson_chi2, 4),
-            np.round(results.aic, 4),
-            np.round(results.bic, 4)
-        ]
-        data = np.vstack((np.array(stat_names), np.array(values)))
-        columns = ['Stats', 'Values']
-        return pd.DataFrame(data=data.T, columns=columns)
+    def show_results(self, dfs):
+        self.controller.result_pane.stat_df, self.controller.result_pane.coef_df = dfs
+        self.controller.reload()
 
 
 class RegressionResultPane(tk.Frame):
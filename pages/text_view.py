@@ -1,8 +1,7 @@
 import tkinter as tk
-from PIL import Image
 import numpy as np
 import os
-from wordcloud import WordCloud, STOPWORDS
+from collections import Counter
 from libs.font import TITLE
 from libs.book import Book
 from libs.plot import Plot
@@ -23,7 +22,8 @@ class TextViewPage(tk.Frame):
     def reload(self):
         self.s = self.controller.STR
         self.ctrl_pane.s = self.s
-        book = Book(self.vertical, string=self.s)
+        self.book.destroy()
+        book = Book(self.vertical, self.s)
         self.book = book
         self.vertical.add(self.book)
         self.ctrl_pane.reload()
@@ -37,7 +37,7 @@ class TextViewPage(tk.Frame):
         ctrl_pane = ViewControlPane(self.vertical, self)
         self.ctrl_pane = ctrl_pane
         self.vertical.add(ctrl_pane)
-        book = Book(self.vertical, string=self.s)
+        book = Book(self.vertical, self.s)
         self.book = book
         self.vertical.add(book)
         plot = Plot(self.vertical)
@@ -70,11 +70,34 @@ class ViewControlPane(tk.Frame):
         )
         title_table.grid(row=self.row, column=0, columnspan=6)
 
+        # previous page and next page of lines
+        Button(self, "prev", 1, 0, 2, lambda: self.prev_view())
+        Button(self, "next", 0, 4, 2, lambda: self.next_view())
+
         # display random rows
         Button(self, "word cloud", 1, 2, 2, lambda: self.word_cloud())
 
+    def prev_view(self):
+        self.show_book()
+        self.controller.book.prev_view()
+
+    def next_view(self):
+        self.show_book()
+        self.controller.book.next_view()
+
     def word_cloud(self):
-        self.show_plot()
+        document = self.s
+        self.controller.controller.jobs.submit(
+            'word cloud ' + document.name,
+            lambda job: self.count_words(document, job),
+            on_done=self.show_word_cloud,
+            key=('text', 'word cloud')
+        )
+
+    @staticmethod
+    def count_words(document, job):
+        from PIL import Image
+        from wordcloud import WordCloud, STOPWORDS
         # set up the word cloud
         path_to_pic = os.getcwd() + '/static/default_pic.png'
         mask = np.array(Image.open(path_to_pic))
@@ -85,17 +108,25 @@ class ViewControlPane(tk.Frame):
             mask=mask,
             stopwords=stopwords
         )
-        # generate word cloud
-        wc.generate(self.s)
-        # show
+        # words are counted block by block instead of on the whole text
+        counts = Counter()
+        for text in document.blocks(job=job):
+            counts.update(wc.process_text(text))
+        if not counts:
+            raise ValueError('no words to draw')
+        return wc.generate_from_frequencies(counts)
+
+    def show_word_cloud(self, wc):
+        self.show_plot()
+        self.plot.clear()
         self.plot.ax.imshow(wc, interpolation='bilinear')
         self.plot.ax.axis("off")
         self.plot.canvas.draw()
 
     def show_plot(self):
-        self.controller.vertical.forget(self.book)
+        self.controller.vertical.forget(self.controller.book)
         self.controller.vertical.add(self.plot)
 
     def show_book(self):
         self.controller.vertical.forget(self.plot)
-        self.controller.vertical.add(self.book)
+        self.controller.vertical.add(self.controller.book)
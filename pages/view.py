@@ -1,12 +1,22 @@
 import tkinter as tk
 import numpy as np
 import math
-from pandas.plotting import scatter_matrix
 from libs.table import Table
 from libs.plot import Plot
-from libs.font import TITLE
+from libs.font import TITLE, LABEL
 from libs.button import Button
 from libs.select import Select
+from libs.ooc import is_out_of_core
+from libs.alert import Alert
+from libs.rowview import RowView, OPS
+from libs import colstats
+from libs.sketch import rank_error
+from engine import correlation, density, draw
+
+# strongest pairs listed next to the correlation heatmap
+TOP_PAIRS = 50
+# how scatter plots draw many rows, auto rasterizes large ones
+SCATTER_MODES = ['auto', 'points', 'sample', 'raster']
 
 
 class DataViewPage(tk.Frame):
@@ -20,18 +30,25 @@ class DataViewPage(tk.Frame):
 
     def reload(self):
         self.df = self.controller.DF
+        # the same frame keeps its sorts and filters, changed columns are
+        # sorted again through their versions
+        if self.rowview.df is self.df:
+            self.rowview.prune()
+        else:
+            self.rowview = RowView(self.df)
         self.table.destroy()
-        table = Table(self.vertical, self.df)
-        self.table = table
-        self.vertical.add(table)
+        self.table = self.create_table()
+        self.vertical.add(self.table)
         self.ctrl_pane.reload()
 
     def init_frame(self):
         # split out left panel
         vertical_split = tk.PanedWindow(self)
         vertical_split.pack(fill=tk.BOTH, expand=1)
+        self.vertical = vertical_split
         self.df = self.controller.DF
-        table = Table(vertical_split, self.df)
+        self.rowview = RowView(self.df)
+        table = self.create_table()
         self.table = table
         plot = Plot(vertical_split)
         self.plot = plot
@@ -39,7 +56,36 @@ class DataViewPage(tk.Frame):
         ctrl_pane = ViewControlPane(vertical_split, self)
         self.ctrl_pane = ctrl_pane
         vertical_split.add(ctrl_pane)
-        self.vertical = vertical_split
+
+    def create_table(self):
+        # the frame in the order of the row view, clicking a header sorts it
+        sort = self.rowview.sort
+        if sort is not None:
+            sort = ([str(c) for c in self.df.columns].index(str(sort[0])), sort[1])
+        return Table(self.vertical, self.df, order=self.rowview.rows(), on_sort=self.sort_by, sort=sort)
+
+    def show_rows(self):
+        self.ctrl_pane.show_table()
+        self.vertical.forget(self.table)
+        self.table.destroy()
+        self.table = self.create_table()
+        self.vertical.add(self.table)
+        self.ctrl_pane.update_filters()
+
+    def sort_by(self, j):
+        if not self.ctrl_pane.in_memory():
+            return
+        rowview = self.rowview
+        sort, seed = rowview.sort, rowview.seed
+        rowview.toggle_sort(self.df.columns[j])
+        try:
+            rowview.rows()
+        except TypeError as e:
+            # mixed types in an object column can't be ordered
+            rowview.sort, rowview.seed = sort, seed
+            Alert().warn('can not sort %s: %s' % (self.df.columns[j], e))
+            return
+        self.show_rows()
 
 
 class ViewControlPane(tk.Frame):
@@ -73,11 +119,94 @@ class ViewControlPane(tk.Frame):
         Button(self, "statistics", 0, 2, 2, lambda: self.statistic())
         Button(self, "correlation", 0, 4, 2, lambda: self.correlation())
 
+        # an empty seed draws a new one, shuffling again with it gives the
+        # same rows
+        self.row += 1
+        label_seed = tk.Label(self, text="seed", font=LABEL, bg='#F3F3F3')
+        label_seed.grid(row=self.row, column=0, columnspan=2)
+        entry_seed = tk.Entry(self, highlightbackground='#F3F3F3', width=12)
+        entry_seed.grid(row=self.row, column=2, columnspan=2)
+        self.entry_seed = entry_seed
+        Button(self, "unshuffle", 0, 4, 2, lambda: self.unshuffle())
+
+        # quartiles from kll sketches in one pass, out-of-core data always
+        # uses them
+        self.row += 1
+        label_stats = tk.Label(self, text="statistics", font=LABEL, bg='#F3F3F3')
+        label_stats.grid(row=self.row, column=0, columnspan=2)
+        approx = tk.IntVar(self)
+        check_approx = tk.Checkbutton(
+            self, text="approximate, rank error %.1f%%" % (100 * rank_error()), variable=approx, bg='#F3F3F3'
+        )
+        check_approx.grid(row=self.row, column=2, columnspan=4)
+        self.approx = approx
+
+        # correlation method, float32 halves the memory of wide frames
+        self.row += 1
+        label_corr = tk.Label(self, text="correlation", font=LABEL, bg='#F3F3F3')
+        label_corr.grid(row=self.row, column=0, columnspan=2)
+        corr_method = tk.StringVar(self)
+        corr_method.set(correlation.METHODS[0])
+        corr_menu = tk.OptionMenu(self, corr_method, *correlation.METHODS)
+        corr_menu.config(bg='#F3F3F3')
+        corr_menu.grid(row=self.row, column=2, columnspan=2)
+        self.corr_method = corr_method
+        corr_float32 = tk.IntVar(self)
+        check_float32 = tk.Checkbutton(self, text="float32", variable=corr_float32, bg='#F3F3F3')
+        check_float32.grid(row=self.row, column=4, columnspan=2)
+        self.corr_float32 = corr_float32
+
         # previous page and next page button
         Button(self, "prev", 1, 0, 2, lambda: self.prev_view())
         Button(self, "refresh", 0, 2, 2, lambda: self.controller.reload())
         Button(self, "next", 0, 4, 2, lambda: self.next_view())
 
+        # jump straight to a row or a page
+        self.row += 1
+        label_jump = tk.Label(self, text="row / page", font=LABEL, bg='#F3F3F3')
+        label_jump.grid(row=self.row, column=0, columnspan=2)
+        entry_jump = tk.Entry(self, highlightbackground='#F3F3F3', width=12)
+        entry_jump.grid(row=self.row, column=2, columnspan=4)
+        self.entry_jump = entry_jump
+        Button(self, "go to row", 1, 0, 3, lambda: self.go_to_row())
+        Button(self, "go to page", 0, 3, 3, lambda: self.go_to_page())
+
+        # jump to a column by name or position
+        self.row += 1
+        label_column = tk.Label(self, text="column", font=LABEL, bg='#F3F3F3')
+        label_column.grid(row=self.row, column=0, columnspan=2)
+        entry_column = tk.Entry(self, highlightbackground='#F3F3F3', width=12)
+        entry_column.grid(row=self.row, column=2, columnspan=2)
+        self.entry_column = entry_column
+        Button(self, "go", 0, 4, 2, lambda: self.go_to_column())
+
+        # keep the rows matching a condition, headers sort on click
+        self.row += 1
+        label_filter = tk.Label(self, text="filter", font=LABEL, bg='#F3F3F3')
+        label_filter.grid(row=self.row, column=0, columnspan=2)
+        entry_filter = tk.Entry(self, highlightbackground='#F3F3F3', width=12)
+        entry_filter.grid(row=self.row, column=2, columnspan=2)
+        self.entry_filter = entry_filter
+        op = tk.StringVar(self)
+        op.set(OPS[0])
+        op_menu = tk.OptionMenu(self, op, *OPS)
+        op_menu.config(bg='#F3F3F3')
+        op_menu.grid(row=self.row, column=4, columnspan=2)
+        self.op = op
+        self.row += 1
+        label_value = tk.Label(self, text="value", font=LABEL, bg='#F3F3F3')
+        label_value.grid(row=self.row, column=0, columnspan=2)
+        entry_value = tk.Entry(self, highlightbackground='#F3F3F3', width=12)
+        entry_value.grid(row=self.row, column=2, columnspan=2)
+        self.entry_value = entry_value
+        Button(self, "add", 0, 4, 2, lambda: self.add_filter())
+        Button(self, "clear filters", 1, 0, 6, lambda: self.clear_filters())
+        self.row += 1
+        label_filters = tk.Label(self, text='', font=LABEL, bg='#F3F3F3', wraplength=240)
+        label_filters.grid(row=self.row, column=0, columnspan=6)
+        self.label_filters = label_filters
+        self.update_filters()
+
         # display in plot
         self.row += 7
         title_plot = tk.Label(
@@ -102,6 +231,17 @@ class ViewControlPane(tk.Frame):
         Button(self, "hexbin", 0, 2, 2, lambda: self.plot_hexbin())
         Button(self, "3d scatter", 0, 4, 2, lambda: self.plot_3d())
 
+        # every point, a stratified sample or a density raster
+        self.row += 1
+        label_mode = tk.Label(self, text="many points", font=LABEL, bg='#F3F3F3')
+        label_mode.grid(row=self.row, column=0, columnspan=2)
+        scatter_mode = tk.StringVar(self)
+        scatter_mode.set(SCATTER_MODES[0])
+        mode_menu = tk.OptionMenu(self, scatter_mode, *SCATTER_MODES)
+        mode_menu.config(bg='#F3F3F3')
+        mode_menu.grid(row=self.row, column=2, columnspan=4)
+        self.scatter_mode = scatter_mode
+
         # clear plot
         Button(self, "clear", 1, 0, 6, lambda: self.clear())
 
@@ -113,40 +253,169 @@ class ViewControlPane(tk.Frame):
             self.grid_rowconfigure(row, minsize=20)
 
     def shuffle(self):
-        self.show_table()
         df = self.controller.df
-        df = df.sample(frac=1).reset_index(drop=True)
-        self.controller.table.destroy()
-        table = Table(self.controller.vertical, df)
-        self.controller.table = table
-        self.controller.vertical.add(table)
+        if is_out_of_core(df):
+            # random rows drawn from disk instead of a full shuffle
+            self.submit('shuffle', lambda job: df.sample(1000, job=job).reset_index(drop=True),
+                        self.show_dataframe)
+            return
+        # a seeded permutation of the rows, pages take their rows from it
+        seed = self.entry_seed.get().strip()
+        try:
+            seed = self.controller.rowview.shuffle(int(seed) if seed else None)
+        except ValueError:
+            Alert().warn('the seed must be an integer')
+            return
+        self.entry_seed.delete(0, tk.END)
+        self.entry_seed.insert(0, str(seed))
+        self.controller.show_rows()
+
+    def unshuffle(self):
+        rowview = self.controller.rowview
+        if rowview.seed is not None:
+            rowview.seed = None
+            self.controller.show_rows()
 
     def statistic(self):
-        self.show_table()
+        df = self.controller.df
+        if is_out_of_core(df):
+            self.submit('statistics', lambda job: df.describe(job=job),
+                        lambda stats: self.show_statistic(stats, df.dtypes))
+            return
+        if self.approx.get():
+            self.submit('statistics', lambda job: colstats.describe_approx(df, job),
+                        lambda stats: self.show_statistic(stats, df.dtypes))
+            return
+        # only columns changed since the last time are described again
+        self.show_statistic(colstats.describe(df), df.dtypes)
+
+    def show_statistic(self, stats, dtypes):
+        dataframe = stats.T
+        dataframe['dtype'] = dtypes
+        self.show_dataframe(dataframe)
+
+    def correlation(self):
+        df = self.controller.df
+        method = self.corr_method.get()
+        dtype = 'float32' if self.corr_float32.get() else 'float64'
+        if is_out_of_core(df):
+            # chunked sums only give pearson, ranks need the whole column
+            if method != 'pearson' and not self.in_memory():
+                return
+            self.submit('correlation', lambda job: df.corr(job, dtype), self.show_correlation)
+            return
+        self.submit('correlation', lambda job: colstats.corr(df, method, dtype, job), self.show_correlation)
+
+    def show_correlation(self, matrix):
+        # a heatmap instead of a grid of labels, the strongest pairs go to
+        # the table next to it
+        self.show_plot()
+        im = draw.heatmap(self.plot.ax, matrix.values, [str(c) for c in matrix.columns])
+        self.plot.add_color_bar(im, 'correlation')
+        self.plot.canvas.draw()
+        pairs = correlation.top_pairs(matrix.values, matrix.columns, TOP_PAIRS)
         self.controller.table.destroy()
-        dataframe = self.controller.df.describe().T
-        dataframe['dtype'] = self.controller.df.dtypes
-        table = Table(self.controller.vertical, dataframe)
+        table = Table(self.controller.vertical, pairs)
         self.controller.table = table
-        self.controller.vertical.add(table)
+        self.controller.vertical.add(table, before=self.plot)
 
-    def correlation(self):
+    def show_dataframe(self, dataframe):
         self.show_table()
         self.controller.table.destroy()
-        table = Table(self.controller.vertical,
-                      self.controller.df.corr())
+        table = Table(self.controller.vertical, dataframe)
         self.controller.table = table
         self.controller.vertical.add(table)
 
+    def submit(self, label, func, on_done):
+        # chunked passes over out-of-core data run in the background
+        self.controller.controller.jobs.submit(
+            label, func, on_done=on_done, key=('view', label)
+        )
+
+    def in_memory(self):
+        if is_out_of_core(self.df):
+            self.controller.controller.ask_sample()
+            return False
+        return True
+
     def prev_view(self):
         self.controller.table.prev_view()
 
     def next_view(self):
         self.controller.table.next_view()
 
+    def read_jump(self, smallest):
+        # a whole number from the jump entry, None after a warning
+        try:
+            value = int(self.entry_jump.get().strip().replace(',', ''))
+        except ValueError:
+            value = smallest - 1
+        if value < smallest:
+            Alert().warn('enter a whole number of at least %d' % smallest)
+            return None
+        return value
+
+    def go_to_row(self):
+        row = self.read_jump(0)
+        if row is None:
+            return
+        self.show_table()
+        self.controller.table.show_row(row)
+
+    def go_to_column(self):
+        self.show_table()
+        column = self.entry_column.get().strip()
+        names = [str(c) for c in self.df.columns]
+        if column in names:
+            column = names.index(column)
+        elif column.isdigit():
+            column = int(column)
+        else:
+            Alert().warn('no column named %s' % column)
+            return
+        self.controller.table.show_column(column)
+
+    def add_filter(self):
+        if not self.in_memory():
+            return
+        column = self.entry_filter.get().strip()
+        if column not in [str(c) for c in self.df.columns]:
+            Alert().warn('no column named %s' % column)
+            return
+        column = self.df.columns[[str(c) for c in self.df.columns].index(column)]
+        rowview = self.controller.rowview
+        rowview.add_filter(column, self.op.get(), self.entry_value.get())
+        try:
+            rowview.rows()
+        except (ValueError, TypeError) as e:
+            rowview.filters.pop()
+            Alert().warn(str(e))
+            return
+        self.controller.show_rows()
+
+    def clear_filters(self):
+        self.controller.rowview.clear_filters()
+        self.controller.show_rows()
+
+    def update_filters(self):
+        self.label_filters.config(text=self.controller.rowview.describe())
+
+    def go_to_page(self):
+        # pages are numbered from 1 like in the status line
+        page = self.read_jump(1)
+        if page is None:
+            return
+        self.show_table()
+        self.controller.table.show_page(page - 1)
+
     def plot_hist(self):
-        self.show_plot()
         feat_list = list(self.select.tags)
+        if is_out_of_core(self.df):
+            df = self.df
+            self.submit('histogram', lambda job: [df.histogram(f, 50, job) for f in feat_list],
+                        lambda hists: self.plot_binned(hists, feat_list))
+            return
+        self.show_plot()
         X = self.df[feat_list].values
         for i in range(len(feat_list)):
             values = X[:, i]
@@ -157,29 +426,41 @@ class ViewControlPane(tk.Frame):
         )
         self.plot.canvas.draw()
 
+    def plot_binned(self, hists, feat_list):
+        self.show_plot()
+        for counts, edges in hists:
+            self.plot.ax.hist(edges[:-1], bins=edges, weights=counts, edgecolor='black')
+        self.plot.ax.legend(
+            labels=feat_list, loc='best', labelspacing=0
+        )
+        self.plot.canvas.draw()
+
     def plot_kde(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         feat_list = list(self.select.tags)
-        dist = self.df[feat_list]
-        dist.plot.kde(ax=self.plot.ax, legend=False)
-        dist.plot.hist(density=True, ax=self.plot.ax,
-                       alpha=0.7, edgecolor='black')
+        # binned kde and histogram, their cost hardly depends on the rows
+        for f in feat_list:
+            grid, values = density.kde(self.df[f].values)
+            self.plot.ax.plot(grid, values)
+        for f in feat_list:
+            counts, edges = np.histogram(density.finite(self.df[f].values), bins=10, density=True)
+            self.plot.ax.hist(edges[:-1], bins=edges, weights=counts, alpha=0.7, edgecolor='black')
         self.plot.ax.set_ylabel('Probability')
         self.plot.ax.grid(axis='x')
 
     def plot_line(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         feat_list = list(self.select.tags)
-        X = self.df[feat_list].values
-        for i in range(len(feat_list)):
-            values = X[:, i]
-            self.plot.ax.plot(values)
-        self.plot.ax.legend(
-            labels=feat_list, loc='best', labelspacing=0
-        )
-        self.plot.canvas.draw()
+        # decimated to the width of the plot, zooming decimates again
+        self.plot.plot_lines([self.df[f].values for f in feat_list], feat_list)
 
     def plot_box(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         feat_list = list(self.select.tags)
         dist = self.df[feat_list]
@@ -187,6 +468,8 @@ class ViewControlPane(tk.Frame):
         self.plot.ax.grid(axis='x')
 
     def plot_bar(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         feat_list = list(self.select.tags)
         dist = self.df[feat_list]
@@ -194,20 +477,27 @@ class ViewControlPane(tk.Frame):
         self.plot.ax.grid(axis='x')
 
     def plot_area(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         feat_list = list(self.select.tags)
-        dist = self.df[feat_list]
-        dist.plot.area(ax=self.plot.ax)
         self.plot.ax.grid(axis='x')
+        self.plot.plot_area([self.df[f].values for f in feat_list], feat_list)
 
     def plot_scatter_matrix(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         feat_list = list(self.select.tags)
-        tmp = self.df[feat_list]
-        scatter_matrix(tmp, ax=self.plot.ax, diagonal='kde')
+        self.plot.ax.remove()
+        draw.scatter_matrix(
+            self.plot.fig, [self.df[f].values for f in feat_list], feat_list, self.scatter_mode.get()
+        )
         self.plot.canvas.draw()
 
     def plot_hexbin(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         feat_list = list(self.select.tags)
         dist = self.df[feat_list]
@@ -223,13 +513,15 @@ class ViewControlPane(tk.Frame):
         self.plot.ax.grid(axis='x')
 
     def plot_3d(self):
+        if not self.in_memory():
+            return
         self.show_plot()
         self.plot.switch_to_3d_ax()
         feat_list = list(self.select.tags)
-        X = self.df[feat_list].values
         if len(feat_list) != 3:
             return False
-        self.plot.ax.scatter(X[:, 0], X[:, 1], X[:, 2])
+        X = self.df[feat_list].values.astype('float64')
+        draw.scatter_3d(self.plot.ax, X, self.scatter_mode.get(), self.plot.raster_points)
         self.plot.ax.set_xlabel(feat_list[0])
         self.plot.ax.set_ylabel(feat_list[1])
         self.plot.ax.set_zlabel(feat_list[2])
@@ -248,3 +540,4 @@ class ViewControlPane(tk.Frame):
         self.show_plot()
         self.select.clear()
         self.plot.clear()
+        self.plot.canvas.draw()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from engine import correlation
+from libs import colstats
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.RandomState(0)
+    X = rng.randn(400, 12)
+    X[:, 1] += X[:, 0]
+    X[:, 5] = np.exp(X[:, 4])
+    return pd.DataFrame(X, columns=['c%d' % i for i in range(12)])
+
+
+def with_gaps(df):
+    df = df.copy()
+    rng = np.random.RandomState(1)
+    df[rng.rand(*df.shape) < 0.15] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('method', correlation.METHODS)
+def test_matrix_matches_pandas(frame, method):
+    # blocks smaller than the matrix, the pairs cross block borders
+    R = correlation.matrix(frame.values, method, size=5)
+    np.testing.assert_allclose(R, frame.corr(method).values, atol=1e-12)
+
+
+def test_pairwise_missing_values(frame):
+    df = with_gaps(frame)
+    np.testing.assert_allclose(correlation.matrix(df.values, size=5), df.corr().values, atol=1e-12)
+
+
+def test_spearman_with_missing_values_ranks_whole_columns(frame):
+    # each column is ranked once over all its values, the pearson
+    # correlation of those ranks on the common rows
+    df = with_gaps(frame)
+    expected = df.rank().corr().values
+    np.testing.assert_allclose(correlation.matrix(df.values, 'spearman'), expected, atol=1e-12)
+
+
+def test_float32(frame):
+    R = correlation.matrix(frame.values, dtype='float32')
+    assert R.dtype == np.float32
+    np.testing.assert_allclose(R, frame.corr().values, atol=1e-5)
+
+
+def test_cross(frame):
+    df = with_gaps(frame)
+    R = correlation.cross(df.values[:, :3], df.values, size=4)
+    np.testing.assert_allclose(R, df.corr().values[:3], atol=1e-12)
+
+
+def test_constant_and_short_columns_are_nan():
+    df = pd.DataFrame({'a': [1.0, 2, 3, 4], 'b': [1.0] * 4, 'c': [np.nan, np.nan, np.nan, 1]})
+    np.testing.assert_array_equal(np.isnan(correlation.matrix(df.values)), df.corr().isnull().values)
+
+
+def test_top_pairs(frame):
+    R = frame.corr().values
+    top = correlation.top_pairs(R, frame.columns, k=3)
+    i, j = np.triu_indices(len(R), 1)
+    strongest = np.argmax(np.abs(R[i, j]))
+    assert list(top.iloc[0][['feature 1', 'feature 2']]) == [frame.columns[i[strongest]], frame.columns[j[strongest]]]
+    strengths = np.abs(top['correlation'].values)
+    assert (np.diff(strengths) <= 0).all()
+    upper = np.abs(R[i, j])
+    np.testing.assert_allclose(strengths, np.sort(upper)[::-1][:3])
+
+
+def test_cached_corr_after_a_change(frame):
+    df = frame.copy()
+    colstats.corr(df)
+    df['c3'] = df['c3'] ** 2
+    colstats.bump(df, ['c3'])
+    np.testing.assert_allclose(colstats.corr(df).values, df.corr().values, atol=1e-12)
@@ -0,0 +1,63 @@
+import numpy as np
+from engine import decimate
+
+
+def series():
+    rng = np.random.RandomState(0)
+    y = np.cumsum(rng.randn(100000))
+    # a single spike and a gap that must survive
+    y[12345] = 1e4
+    y[50000:50500] = np.nan
+    return y
+
+
+def test_window_reaches_past_the_edges():
+    assert decimate.window(1000, (100.2, 200.7)) == (99, 203)
+    assert decimate.window(1000, (-50, 5000)) == (0, 1000)
+    lo, hi = decimate.window(1000, (2000, 3000))
+    assert lo == hi
+
+
+def test_minmax_keeps_the_extremes():
+    y = series()
+    x, values = decimate.minmax(y, 0, len(y), 800)
+    assert len(x) <= 2 * 800 + 2
+    assert (np.diff(x) >= 0).all()
+    np.testing.assert_array_equal(values, y[x])
+    # every bucket keeps its min and max, so the whole range is there
+    assert np.nanmax(values) == np.nanmax(y)
+    assert np.nanmin(values) == np.nanmin(y)
+    size = decimate.bucket_size(0, len(y), 800)
+    for start in range(0, len(y), size):
+        bucket = y[start: start + size]
+        if np.isnan(bucket).all():
+            continue
+        inside = values[(x >= start) & (x < start + size)]
+        assert np.nanmax(inside) == np.nanmax(bucket)
+        assert np.nanmin(inside) == np.nanmin(bucket)
+
+
+def test_minmax_keeps_gaps():
+    y = series()
+    x, values = decimate.minmax(y, 0, len(y), 800)
+    size = decimate.bucket_size(0, len(y), 800)
+    # buckets inside the gap are only nan
+    gap = (x >= 50000 + size) & (x < 50500 - size)
+    assert gap.any() and np.isnan(values[gap]).all()
+
+
+def test_short_ranges_are_unchanged():
+    y = series()
+    x, values = decimate.minmax(y, 100, 300, 800)
+    np.testing.assert_array_equal(x, np.arange(100, 300))
+    np.testing.assert_array_equal(values, y[100:300])
+
+
+def test_envelope_covers_both_series():
+    y = series()
+    lower, upper = y - 1, y + 1
+    x, low, high = decimate.envelope(lower, upper, 0, len(y), 500)
+    assert len(x) == len(low) == len(high)
+    assert np.nanmin(low) == np.nanmin(lower)
+    assert np.nanmax(high) == np.nanmax(upper)
+    assert x[0] == 0 and x[-1] == len(y) - 1
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from engine import density
+
+
+def exact_kde(values, grid, bw):
+    z = (grid[:, None] - values[None, :]) / bw
+    return np.exp(-0.5 * z ** 2).sum(axis=1) / (len(values) * bw * np.sqrt(2 * np.pi))
+
+
+@pytest.fixture
+def values():
+    rng = np.random.RandomState(0)
+    return np.concatenate([rng.randn(3000), rng.randn(1000) * 0.3 + 4])
+
+
+def test_kde_matches_the_exact_gaussian_kde(values):
+    grid, estimate = density.kde(values)
+    exact = exact_kde(values, grid, density.bandwidth(values))
+    assert np.abs(estimate - exact).max() < 1e-4 * exact.max()
+    # a density, the area is one
+    assert estimate.sum() * (grid[1] - grid[0]) == pytest.approx(1, abs=1e-3)
+
+
+def test_kde_skips_missing_values(values):
+    with_gaps = np.concatenate([values, [np.nan, np.inf]])
+    np.testing.assert_allclose(density.kde(with_gaps)[1], density.kde(values)[1])
+    grid, estimate = density.kde([np.nan])
+    assert len(grid) == len(estimate) == 0
+
+
+def test_bandwidth_is_scotts_rule(values):
+    expected = values.std(ddof=1) * len(values) ** (-1 / 5)
+    assert density.bandwidth(values) == pytest.approx(expected)
+    assert density.bandwidth(np.ones(10)) == pytest.approx(10 ** (-1 / 5))
+
+
+def test_linear_bins_keep_the_weight(values):
+    lo, size = values.min(), 64
+    dx = (values.max() - lo) / (size - 1)
+    counts = density.linear_bins(values, lo, dx, size)
+    assert counts.sum() == pytest.approx(len(values))
+    # the weighted mean of the grid is the mean of the values
+    assert (counts * (lo + dx * np.arange(size))).sum() / len(values) == pytest.approx(values.mean())
+
+
+def test_stratified_sample():
+    rows = density.stratified_sample(10000, 100, seed=1)
+    assert len(rows) == 100
+    assert (np.diff(rows) > 0).all()
+    # one row from each block
+    np.testing.assert_array_equal(rows // 100, np.arange(100))
+    np.testing.assert_array_equal(density.stratified_sample(50, 100), np.arange(50))
+
+
+def test_raster_matches_histogram2d(values):
+    rng = np.random.RandomState(1)
+    x, y = values, rng.randn(len(values))
+    y[::10] = np.nan
+    counts, extent = density.raster(x, y, bins=32)
+    keep = ~np.isnan(y)
+    expected, _, _ = np.histogram2d(x[keep], y[keep], bins=32, range=[extent[:2], extent[2:]])
+    # rows of the raster go up in y
+    np.testing.assert_array_equal(counts, expected.T)
+
+
+def test_class_rasters_add_up(values):
+    rng = np.random.RandomState(2)
+    x, y = values, rng.randn(len(values))
+    labels = rng.choice(['a', 'b', 'c'], len(values))
+    counts, classes, extent = density.class_rasters(x, y, labels, 20, 10)
+    assert list(classes) == ['a', 'b', 'c']
+    assert counts.shape == (3, 10, 20)
+    assert counts.sum() == len(values)
+    assert counts[0].sum() == (labels == 'a').sum()
+
+
+def test_voxels():
+    rng = np.random.RandomState(3)
+    X = rng.rand(5000, 3)
+    X[0] = np.nan
+    centers, counts = density.voxels(X, bins=4)
+    assert counts.sum() == 4999
+    assert len(centers) == len(counts) <= 4 ** 3
+    assert ((centers > 0) & (centers < 1)).all()
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+from libs import ooc, sidecar
+from libs.ooc import ChunkedDataset, Summary
+from libs.sketch import rank_error
+
+ROWS = 2500
+CHUNK = 700
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'a': rng.randn(ROWS),
+        'b': rng.exponential(size=ROWS),
+        'c': rng.randint(0, 100, ROWS).astype('float64'),
+    })
+    df['b'] += df['a']
+    # gaps inside chunks and across their borders
+    df.loc[rng.rand(ROWS) < 0.2, 'a'] = np.nan
+    df.loc[CHUNK - 5: CHUNK + 5, 'b'] = np.nan
+    df.loc[:3, 'c'] = np.nan
+    return df
+
+
+@pytest.fixture
+def dataset(frame, tmp_path, monkeypatch):
+    monkeypatch.setattr(ooc, 'OOC_DIR', str(tmp_path / 'ooc'))
+    filename = str(tmp_path / 'data.csv')
+    frame.to_csv(filename, index=False)
+    return ChunkedDataset.open(filename, chunksize=CHUNK)
+
+
+def test_chunks_hold_the_csv(dataset, frame):
+    assert len(dataset) == ROWS
+    assert len(dataset.manifest['chunks']) == -(-ROWS // CHUNK)
+    pd.testing.assert_frame_equal(dataset.slice(0, ROWS), frame)
+    pd.testing.assert_frame_equal(dataset.slice(CHUNK - 3, CHUNK + 3), frame.iloc[CHUNK - 3: CHUNK + 3])
+
+
+def test_describe_matches_pandas(dataset, frame):
+    approx, exact = dataset.describe(), frame.describe()
+    for stat in ['count', 'mean', 'std', 'min', 'max']:
+        np.testing.assert_allclose(approx.loc[stat], exact.loc[stat], rtol=1e-10)
+    # the quartiles are within the rank error of the sketches
+    for column in frame.columns:
+        values = np.sort(frame[column].dropna().values)
+        for q, stat in [(0.25, '25%'), (0.5, '50%'), (0.75, '75%')]:
+            rank = np.searchsorted(values, approx.loc[stat, column], side='right') / len(values)
+            assert abs(rank - q) <= rank_error()
+
+
+def test_summaries_merge(frame):
+    whole, first, second = (Summary(frame.columns) for _ in range(3))
+    X = frame.values
+    whole.update(X)
+    first.update(X[:1000])
+    second.update(X[1000:])
+    first.merge(second)
+    np.testing.assert_allclose(first.n, whole.n)
+    np.testing.assert_allclose(first.mean, whole.mean)
+    np.testing.assert_allclose(first.std(), whole.std())
+
+
+def test_corr_matches_pandas(dataset, frame):
+    np.testing.assert_allclose(dataset.corr().values, frame.corr().values, atol=1e-12)
+    np.testing.assert_allclose(dataset.corr(dtype='float32').values, frame.corr().values, atol=1e-5)
+
+
+def test_histogram_counts_every_value(dataset, frame):
+    counts, edges = dataset.histogram('b', 20)
+    expected, _ = np.histogram(frame['b'].dropna(), bins=edges)
+    np.testing.assert_array_equal(counts, expected)
+
+
+@pytest.mark.parametrize('step, expected', [
+    (lambda d: d.dropna(), lambda df: df.dropna()),
+    (lambda d: d.fillna(0), lambda df: df.fillna(0)),
+    (lambda d: d.ffill(), lambda df: df.ffill()),
+    (lambda d: d.bfill(), lambda df: df.bfill()),
+    (lambda d: d.interpolate(), lambda df: df.interpolate()),
+    (lambda d: d.drop_columns(['b']), lambda df: df.drop(columns=['b'])),
+])
+def test_rewrites_match_pandas(dataset, frame, step, expected):
+    step(dataset)
+    pd.testing.assert_frame_equal(dataset.slice(0, len(dataset)), expected(frame))
+
+
+def test_fill_mean(dataset, frame):
+    dataset.fill_mean()
+    pd.testing.assert_frame_equal(dataset.slice(0, ROWS), frame.fillna(frame.mean()))
+
+
+def test_standard_scale(dataset, frame):
+    dataset.scale(['a', 'b'], 'standard')
+    result = dataset.slice(0, ROWS)
+    for c in ['a', 'b']:
+        np.testing.assert_allclose(result[c], (frame[c] - frame[c].mean()) / frame[c].std())
+
+
+def test_rewrite_keeps_the_conversion(dataset, frame, tmp_path):
+    # importing the csv again gives its rows, not the rewritten ones
+    dataset.dropna()
+    assert len(dataset) < ROWS
+    again = ChunkedDataset.open(str(tmp_path / 'data.csv'), chunksize=CHUNK)
+    assert again.path != dataset.path
+    pd.testing.assert_frame_equal(again.slice(0, ROWS), frame)
+
+
+def test_sample(dataset, frame):
+    sample = dataset.sample(300, seed=0)
+    assert sample.shape[0] == 300
+    assert sample.index.is_unique
+    pd.testing.assert_frame_equal(sample, frame.loc[sample.index])
+
+
+def test_slices_read_only_their_rows(dataset, frame):
+    for start, stop in [(0, 100), (650, 750), (CHUNK - 1, 3 * CHUNK + 1), (2400, 2600), (5, 5)]:
+        pd.testing.assert_frame_equal(dataset.slice(start, stop), frame.iloc[start: stop])
+
+
+def test_row_range_of_a_sidecar(tmp_path):
+    df = pd.DataFrame({'n': np.arange(10), 's': list('abcdefghij'), 'c': pd.Categorical(list('xyxyxyxyxy'))})
+    sidecar.write_columns(df, str(tmp_path / 'cols'))
+    objects = {}
+    part = sidecar.read_columns(str(tmp_path / 'cols'), rows=(3, 7), objects=objects)
+    pd.testing.assert_frame_equal(part, df.iloc[3:7])
+    assert len(objects) == 1
+    dropped = df.iloc[::2]
+    sidecar.write_columns(dropped, str(tmp_path / 'dropped'))
+    pd.testing.assert_frame_equal(sidecar.read_columns(str(tmp_path / 'dropped'), rows=(1, 3)), dropped.iloc[1:3])
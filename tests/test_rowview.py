@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+from libs import colstats
+from libs.rowview import RowView, MAX_ORDERS
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'x': rng.randint(0, 20, 500).astype('float64'),
+        'name': rng.choice(['smith', 'jones', 'brown'], 500),
+    }, index=np.arange(500) * 3)
+    df.loc[df.index[::7], 'x'] = np.nan
+    return df
+
+
+def positions(df, labels):
+    return df.index.get_indexer(labels)
+
+
+@pytest.mark.parametrize('ascending', [True, False])
+def test_sort_matches_pandas(frame, ascending):
+    view = RowView(frame)
+    view.set_sort('x', ascending)
+    expected = frame.sort_values('x', ascending=ascending, kind='mergesort', na_position='last')
+    np.testing.assert_array_equal(view.rows(), positions(frame, expected.index))
+
+
+def test_toggle_sort_cycles(frame):
+    view = RowView(frame)
+    for expected in [('x', True), ('x', False), None]:
+        view.toggle_sort('x')
+        assert view.sort == expected
+    assert view.rows() is None
+
+
+@pytest.mark.parametrize('op, value, expected', [
+    ('>', '10', lambda df: df['x'] > 10),
+    ('<=', '3', lambda df: df['x'] <= 3),
+    ('==', 'smith', lambda df: df['name'] == 'smith'),
+    ('contains', 'ne', lambda df: df['name'].str.contains('ne')),
+    ('is null', '', lambda df: df['x'].isnull()),
+    ('not null', '', lambda df: df['x'].notnull()),
+])
+def test_filters_match_pandas(frame, op, value, expected):
+    view = RowView(frame)
+    column = 'name' if op in ('==', 'contains') else 'x'
+    view.add_filter(column, op, value)
+    np.testing.assert_array_equal(view.rows(), np.flatnonzero(expected(frame).values))
+
+
+def test_sort_and_filter(frame):
+    view = RowView(frame)
+    view.add_filter('name', '!=', 'brown')
+    view.set_sort('x', False)
+    expected = frame[frame['name'] != 'brown'].sort_values('x', ascending=False, kind='mergesort')
+    np.testing.assert_array_equal(view.rows(), positions(frame, expected.index))
+
+
+def test_shuffle_is_seeded(frame):
+    view = RowView(frame)
+    view.shuffle(7)
+    first = view.rows().copy()
+    assert sorted(first) == list(range(len(frame)))
+    view.shuffle(8)
+    assert not np.array_equal(view.rows(), first)
+    view.shuffle(7)
+    np.testing.assert_array_equal(view.rows(), first)
+
+
+def test_caches_are_bounded(frame):
+    view = RowView(frame)
+    for seed in range(10):
+        view.shuffle(seed)
+        view.rows()
+    # only the permutation of the current seed is kept
+    assert view.shuffled[0] == (9, len(frame))
+    for i in range(MAX_ORDERS + 4):
+        frame['c%d' % i] = np.arange(len(frame))[::-1]
+        view.set_sort('c%d' % i)
+        view.rows()
+    assert len(view.orders) == MAX_ORDERS
+    assert view.shuffled[0] is None
+
+
+def test_changed_column_is_sorted_again(frame):
+    view = RowView(frame)
+    view.set_sort('x')
+    view.rows()
+    frame['x'] = -frame['x']
+    colstats.bump(frame, ['x'])
+    expected = frame.sort_values('x', kind='mergesort')
+    np.testing.assert_array_equal(view.rows(), positions(frame, expected.index))
+
+
+def test_mixed_types_can_not_be_sorted():
+    view = RowView(pd.DataFrame({'a': ['x', 1.5, 'y', 2]}))
+    view.set_sort('a')
+    with pytest.raises(TypeError):
+        view.rows()
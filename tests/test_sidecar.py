@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from libs import sidecar
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(sidecar, 'CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path
+
+
+def csv(folder, name, rows=1000):
+    filename = str(folder / name)
+    pd.DataFrame({'a': np.arange(rows), 's': ['x'] * rows}).to_csv(filename, index=False)
+    return filename
+
+
+def test_round_trip(cache):
+    filename = csv(cache, 'a.csv')
+    df = pd.read_csv(filename)
+    sidecar.save(filename, df)
+    pd.testing.assert_frame_equal(sidecar.load(filename), df)
+    # a compact cache doesn't serve a plain load
+    sidecar.save(filename, df, compact=True)
+    assert sidecar.load(filename) is None
+    pd.testing.assert_frame_equal(sidecar.load(filename, compact=True), df)
+
+
+def test_broken_cache_is_dropped(cache):
+    filename = csv(cache, 'a.csv')
+    sidecar.save(filename, pd.read_csv(filename))
+    path = sidecar.sidecar_dir(filename)
+    with open(os.path.join(path, '1.npy'), 'wb') as fout:
+        fout.write(b'not a column')
+    assert sidecar.load(filename) is None
+    assert not os.path.exists(path)
+
+
+def test_least_recently_used_go_first(cache):
+    names = [csv(cache, '%d.csv' % i) for i in range(3)]
+    for i, filename in enumerate(names):
+        sidecar.save(filename, pd.read_csv(filename))
+        os.utime(os.path.join(sidecar.sidecar_dir(filename), 'meta.json'), (i, i))
+    # the first one is used again, the second is now the oldest
+    sidecar.load(names[0])
+    size = sidecar.folder_size(sidecar.sidecar_dir(names[0]))
+    sidecar.trim(2 * size + size // 2)
+    assert [os.path.exists(sidecar.sidecar_dir(f)) for f in names] == [True, False, True]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from libs.sketch import KLL, rank_error
+
+N = 200000
+
+
+def worst_rank_error(sketch, values):
+    values = np.sort(values)
+    qs = np.linspace(0.01, 0.99, 99)
+    ranks = np.searchsorted(values, [sketch.quantile(q) for q in qs], side='right') / len(values)
+    return np.abs(ranks - qs).max()
+
+
+@pytest.fixture
+def values():
+    return np.random.RandomState(0).lognormal(size=N)
+
+
+def test_one_batch(values):
+    sketch = KLL(seed=0)
+    sketch.update(values)
+    assert len(sketch) == N
+    assert worst_rank_error(sketch, values) <= rank_error()
+    # o(k) items for any number of values
+    assert sum(len(level) for level in sketch.levels) < 3 * sketch.k
+
+
+def test_many_batches(values):
+    sketch = KLL(seed=0)
+    for chunk in np.array_split(values, 101):
+        sketch.update(chunk)
+    assert len(sketch) == N
+    assert worst_rank_error(sketch, values) <= rank_error()
+
+
+def test_merge(values):
+    parts = []
+    for i, chunk in enumerate(np.array_split(values, 7)):
+        part = KLL(seed=i)
+        part.update(chunk)
+        parts.append(part)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert len(merged) == N
+    assert worst_rank_error(merged, values) <= rank_error()
+
+
+def test_missing_values_are_skipped():
+    sketch = KLL()
+    sketch.update([np.nan, 1.0, 2.0, np.nan, 3.0])
+    assert len(sketch) == 3
+    assert sketch.quantile(0.5) == 2.0
+    assert np.isnan(KLL().quantile(0.5))
+
+
+def test_small_input_is_exact():
+    values = np.arange(100.0)
+    sketch = KLL()
+    sketch.update(values)
+    assert sketch.quantile(0) == 0
+    assert sketch.quantile(1) == 99
+    # the smallest value with at least half of the weight at or below it
+    assert sketch.quantile(0.5) == 49
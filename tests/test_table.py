@@ -0,0 +1,10 @@
+import numpy as np
+from libs.table import format_column
+
+
+def test_float32_like_float64():
+    values = [-0.00012345, 123456.7, 0.1, np.nan, 1e-5, 3.14159265, 0.0]
+    wide = format_column(np.array(values, dtype='float64'))
+    narrow = format_column(np.array(values, dtype='float32'))
+    assert list(narrow) == list(wide)
+    assert narrow[0] == '-0.0001'